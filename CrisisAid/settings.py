@@ -73,18 +73,31 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Lean* subclasses step aside for token-authenticated /api/ calls (LEAN_API_MIDDLEWARE below)
+    'core.middleware.LeanSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
+    'core.middleware.LeanCsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.LeanMessageMiddleware',
+    'core.middleware.LeanXFrameOptionsMiddleware',
+    # Skipped for lean API requests too, see core.middleware.lean_account_middleware
     "allauth.account.middleware.AccountMiddleware",
 ]
 
+# Skip session, CSRF, messages, X-Frame-Options and allauth for API requests carrying `Authorization: Token`.
+# `manage.py benchmark_middleware` shows the per-request cost of both profiles.
+LEAN_API_MIDDLEWARE = env.bool("LEAN_API_MIDDLEWARE", default=True)
+LEAN_API_PATH_PREFIXES = ("/api/",)
+
 CORS_ALLOW_ALL_ORIGINS = True 
 
+# Per-request SQL recording and N+1 warnings (core/middleware.py). Opt-in: it captures a stack trace per query.
+# QueryBudgetMixin turns it on for its own tests.
+QUERY_INSPECTOR = env.bool("QUERY_INSPECTOR", default=False)
+QUERY_INSPECTOR_NPLUSONE_THRESHOLD = 3
+
 ROOT_URLCONF = 'CrisisAid.urls'
 
 TEMPLATES = [
@@ -125,18 +138,85 @@ LOGIN_URL = 'login'
 SOCIALACCOUNT_AUTO_SIGNUP = True
 
 
+API_FAST_JSON = env.bool("API_FAST_JSON", default=True)
+API_BROWSABLE = env.bool("API_BROWSABLE", default=DEBUG)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     
+    # orjson renderer/parser (core/renderers.py); the browsable API only outside production
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
-    ]
+        "core.renderers.FastJSONRenderer" if API_FAST_JSON else "rest_framework.renderers.JSONRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if API_BROWSABLE else []),
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.renderers.FastJSONParser" if API_FAST_JSON else "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+
+    # Keyset (cursor) pagination for every list endpoint, see core/pagination.py
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": env.int("API_PAGE_SIZE", default=20),
 }
 
+# Hard upper bound for ?page_size=
+API_MAX_PAGE_SIZE = env.int("API_MAX_PAGE_SIZE", default=100)
+
+# Most GETs one /api/batch/ call may carry (core/batch.py)
+API_BATCH_MAX_REQUESTS = env.int("API_BATCH_MAX_REQUESTS", default=10)
+
+# Days of change log kept for /api/sync/; older cursors must download afresh (core/sync.py)
+SYNC_RETENTION_DAYS = env.int("SYNC_RETENTION_DAYS", default=30)
+
+# Cache backend, e.g. CACHE_URL=filecache:///var/tmp/crisisaid for a cache shared by worker processes
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+# Worker processes serving requests (gunicorn reads the same variable). Above 1 the cache
+# must be shared by the workers (CACHE_URL), which core/cache.py checks at startup
+WEB_CONCURRENCY = env.int("WEB_CONCURRENCY", default=1)
+
+# Public read endpoints cache rendered responses (core/cache.py); invalidated by model signals
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", default=60)
+
+# Retries of a POST with the same Idempotency-Key replay the stored response for this long (core/idempotency.py)
+IDEMPOTENCY_KEY_TTL = env.int("IDEMPOTENCY_KEY_TTL", default=24 * 60 * 60)
+
+# Settlement-file rows validated and bulk-inserted per transaction (donations/ingest.py)
+DONATION_IMPORT_CHUNK_SIZE = env.int("DONATION_IMPORT_CHUNK_SIZE", default=500)
+
+# Donations not on any provider statement this long after donating become "missing" (donations/reconciliation.py)
+RECONCILIATION_GRACE_HOURS = env.int("RECONCILIATION_GRACE_HOURS", default=48)
+
+# Newest money / goods donations embedded in a crisis' donation summary; the rest are paged (donations/views.py)
+SUMMARY_RECENT_DONATIONS = env.int("SUMMARY_RECENT_DONATIONS", default=10)
+
+# Rows fetched per round trip by the streaming export endpoints (crisis/exports.py)
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+# Most IDs one bulk approve/reject request may carry (core/moderation.py)
+MODERATION_BULK_LIMIT = env.int("MODERATION_BULK_LIMIT", default=500)
+
+# How long a moderator's claim on a batch of the moderation queue lasts (crisis/moderation_queue.py)
+MODERATION_LEASE_SECONDS = env.int("MODERATION_LEASE_SECONDS", default=15 * 60)
+
+# Most rows a large-table admin changelist counts before it stops paginating (core/admin_tools.py)
+ADMIN_COUNT_LIMIT = env.int("ADMIN_COUNT_LIMIT", default=10000)
+
+# Worker processes rendering image variants after upload (core/image_pipeline.py); 0 renders inline
+IMAGE_WORKERS = env.int("IMAGE_WORKERS", default=2)
+
+# Per-process token -> user snapshot cache used by CachedTokenAuthentication, checked against
+# per-user generations in the shared cache on every hit (accounts/authentication.py)
+TOKEN_AUTH_CACHE_SIZE = env.int("TOKEN_AUTH_CACHE_SIZE", default=10000)
+TOKEN_AUTH_CACHE_TTL = env.int("TOKEN_AUTH_CACHE_TTL", default=60)
+
 WSGI_APPLICATION = 'CrisisAid.wsgi.application'
 
 
@@ -147,6 +227,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Counter tables (crisis.CrisisStats) are written in the same transaction as the row that changed them
+        'ATOMIC_REQUESTS': True,
     }
 }
 
@@ -3,6 +3,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
+from core.batch import BatchView
+from core.sync import SyncView
 
 # Simple redirect view
 # def home_redirect(request):
@@ -31,6 +33,12 @@ urlpatterns = [
     
     # Updates & Comments
     path("api/updates/", include("updates.urls")),
+    
+    # Several API GETs in one round trip
+    path("api/batch/", BatchView.as_view(), name="api_batch"),
+    
+    # Changes since a cursor, for offline clients
+    path("api/sync/", SyncView.as_view(), name="api_sync"),
 ]
 
 # Serve media files in development
@@ -1,43 +1,29 @@
 from allauth.account.adapter import DefaultAccountAdapter
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
+from .outbox import queue_email
 
 class CustomAccountAdapter(DefaultAccountAdapter):
     def send_confirmation_mail(self, request, emailconfirmation, signup):
         """
-        Send custom email verification using accounts/templates/email_confirmation.html
+        Queue the verification email (accounts/templates/email_confirmation.html) in the
+        outbox; `manage.py send_queued_emails` renders and delivers it.
         """
-        ctx = {
-            "user": emailconfirmation.email_address.user,
-            "activate_url": f"{settings.FRONTEND_URL}/verify-email/{emailconfirmation.key}/",
-            "key": emailconfirmation.key,
-            "current_site": request.get_host(),
-        }
-
-        subject = "Verify your email - Crisis Aid"
-        from_email = settings.EMAIL_HOST_USER
-        recipient = [emailconfirmation.email_address.email]
-
-        # Render HTML and plain text versions
-        html_content = render_to_string("email_confirmation.html", ctx)
-        text_content = render_to_string("email_confirmation.txt", ctx) if \
-                       self.template_exists("email_confirmation.txt") else \
-                       f"Please verify your email by visiting: {ctx['activate_url']}"
-
-        msg = EmailMultiAlternatives(subject, text_content, from_email, recipient)
-        msg.attach_alternative(html_content, "text/html")
-        msg.send()
-
-    def template_exists(self, template_name):
-        """Check if a template exists to avoid errors."""
-        from django.template import engines
-        try:
-            engines['django'].engine.get_template(template_name)
-            return True
-        except:
-            return False
+        user = emailconfirmation.email_address.user
+        activate_url = f"{settings.FRONTEND_URL}/verify-email/{emailconfirmation.key}/"
+        queue_email(
+            [emailconfirmation.email_address.email],
+            "Verify your email - Crisis Aid",
+            template_name="email_confirmation",
+            context={
+                "user": {"username": user.username, "first_name": user.first_name, "email": user.email},
+                "activate_url": activate_url,
+                "key": emailconfirmation.key,
+                "current_site": request.get_host(),
+            },
+            body=f"Please verify your email by visiting: {activate_url}",
+            from_email=settings.EMAIL_HOST_USER,
+        )
 
 
 class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
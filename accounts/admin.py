@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import CustomUser
+from django.utils import timezone
+from .models import CustomUser, OutgoingEmail
 
 
 @admin.register(CustomUser)
@@ -49,3 +50,17 @@ class CustomUserAdmin(UserAdmin):
 
     search_fields = ("username", "email", "first_name", "last_name")
     ordering = ("id",)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "to", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("subject", "to")
+    readonly_fields = ("created_at", "sent_at", "last_error")
+    actions = ["retry_emails"]
+
+    def retry_emails(self, request, queryset):
+        updated = queryset.exclude(status="sent").update(status="pending", attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} email(s) queued again.")
+    retry_emails.short_description = "Retry selected emails"
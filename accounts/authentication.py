@@ -0,0 +1,178 @@
+"""
+Token authentication with an in-process cache of token -> user snapshot.
+
+TokenAuthentication runs `SELECT ... FROM authtoken_token JOIN accounts_customuser`
+on every request. CachedTokenAuthentication keeps a bounded LRU of the user's
+column values per token (TOKEN_AUTH_CACHE_SIZE entries, TOKEN_AUTH_CACHE_TTL
+seconds) and rebuilds a fresh, unshared User instance from it on a hit.
+
+accounts.signals drops entries when a token is deleted (logout), when a
+user is deleted and when a save changes one of REVOKING_FIELDS
+(deactivation, password, is_staff / role changes); a `last_login` update
+keeps them. Each entry remembers the user's generation and a global one in
+the shared response cache (core.cache), and a hit is only served while both
+still match: one cache read instead of the database query, and a revocation
+in one worker reaches the others on their next request. `revoke_users`
+bumps a user's generation; a bulk `User.objects.filter(...).update()` of
+one of those fields bumps the global one through UserQuerySet, without
+loading the ids it touched.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.cache import generations, invalidate
+
+# Saving a user revokes its cached snapshots only when one of these changes
+REVOKING_FIELDS = ("is_active", "password", "is_staff", "is_superuser", "role")
+ALL_USERS = "tokenauth:all"
+
+
+def _namespaces(user_id):
+    return f"tokenauth:{user_id}", ALL_USERS
+
+
+class TokenCache:
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (expires_at, user_id, values, generation)
+        self._keys_by_user = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    @property
+    def maxsize(self):
+        return getattr(settings, "TOKEN_AUTH_CACHE_SIZE", 10000)
+
+    @property
+    def ttl(self):
+        return getattr(settings, "TOKEN_AUTH_CACHE_TTL", 60)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            user_id, values, entry_generation = entry[1:]
+        if generations(*_namespaces(user_id)) != entry_generation:
+            # Revoked, possibly by another process
+            self.invalidate_key(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        User = get_user_model()
+        return User.from_db("default", [f.attname for f in User._meta.concrete_fields], copy.deepcopy(values))
+
+    def set(self, key, user):
+        if self.maxsize <= 0:
+            return
+        values = [getattr(user, f.attname) for f in type(user)._meta.concrete_fields]
+        user_generation = generations(*_namespaces(user.pk))
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user.pk, copy.deepcopy(values), user_generation)
+            self._keys_by_user[user.pk].add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user[entry[1]]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1]]
+        return entry is not None
+
+    def invalidate_key(self, key):
+        with self._lock:
+            if self._discard(key):
+                self.invalidations += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+                self.invalidations += 1
+
+    def clear_entries(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+token_cache = TokenCache()
+
+
+def revoke_users(user_ids):
+    """
+    Stop serving cached snapshots of these users, in every process: the
+    shared generation is bumped now and after commit, in case a racing
+    request re-cached the old row meanwhile.
+    """
+    user_ids = list(user_ids)
+
+    def drop_local():
+        for user_id in user_ids:
+            token_cache.invalidate_user(user_id)
+
+    drop_local()
+    invalidate(*[_namespaces(user_id)[0] for user_id in user_ids])
+    transaction.on_commit(drop_local)
+
+
+def revoke_all_users():
+    """Bulk updates: every snapshot stops matching the global generation, in every process"""
+    token_cache.clear_entries()
+    invalidate(ALL_USERS)
+    transaction.on_commit(token_cache.clear_entries)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for TokenAuthentication backed by `token_cache`"""
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return user, token
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        return user, token
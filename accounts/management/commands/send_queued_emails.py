@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox over a reused mail connection, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Emails claimed and sent per connection (default: 50)'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Attempts before an email is marked failed (default: 5)'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting when it is empty'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Seconds to sleep between polls with --loop (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = send_batch(batch_size=batch_size, max_attempts=options['max_attempts'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'  sent {total_sent}, failed {total_failed}...')
+            elif options['loop']:
+                time.sleep(options['interval'])
+            else:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Sent {total_sent} email(s), {total_failed} failed.'))
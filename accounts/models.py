@@ -1,11 +1,31 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Bulk updates (e.g. deactivating users) send no post_save: one touching
+        an auth field revokes every cached token snapshot, without loading ids
+        """
+        from .authentication import REVOKING_FIELDS, revoke_all_users
+
+        updated = super().update(**kwargs)
+        if updated and any(field in kwargs for field in REVOKING_FIELDS):
+            revoke_all_users()
+        return updated
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class CustomUser(AbstractUser):
     email = models.EmailField(_("email address"), unique=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     profile_picture = models.ImageField(upload_to="profiles/", blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)  # core.image_pipeline
     facebook_account = models.URLField(blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
     occupation = models.CharField(max_length=100, blank=True, null=True)
@@ -21,5 +41,43 @@ class CustomUser(AbstractUser):
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["email"]
 
+    objects = CustomUserManager()
+
     def __str__(self):
         return self.username
+
+
+class OutgoingEmail(models.Model):
+    """
+    Email queued in the request's transaction and delivered by
+    `manage.py send_queued_emails` (see accounts/outbox.py).
+    """
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    )
+
+    to = models.JSONField(default=list)
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    # Rendered by the worker from <template_name>.html / .txt; `body` is the fallback text
+    template_name = models.CharField(max_length=100, blank=True)
+    context = models.JSONField(default=dict, blank=True)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="accounts_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
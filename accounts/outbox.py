@@ -0,0 +1,140 @@
+"""
+Database-backed email outbox.
+
+Requests only insert an OutgoingEmail row, inside the same transaction as
+the data it belongs to (ATOMIC_REQUESTS), so no SMTP server is contacted
+while a user waits and a rolled-back signup sends nothing.
+`manage.py send_queued_emails` claims due rows in batches, renders them with
+compiled templates cached per process and delivers the batch over one
+backend connection. Each message is marked sent as soon as it is delivered,
+so a worker dying mid-batch only resends the ones it had not reached. A
+failed message is retried with exponential backoff until `max_attempts`,
+then marked failed.
+"""
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(hours=1)
+
+# How long a claimed batch is hidden from other workers; a crashed worker's rows come back after it
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def queue_email(to, subject, template_name="", context=None, body="", from_email=None):
+    return OutgoingEmail.objects.create(
+        to=list(to),
+        subject=subject,
+        template_name=template_name,
+        context=context or {},
+        body=body,
+        from_email=from_email or "",
+    )
+
+
+@lru_cache(maxsize=None)
+def get_compiled_template(template_name):
+    """Compiled template, or None if it does not exist (both cached for the worker's lifetime)"""
+    try:
+        return get_template(template_name)
+    except TemplateDoesNotExist:
+        return None
+
+
+def build_message(email, connection=None):
+    body, html_body = email.body, email.html_body
+    if email.template_name:
+        html_template = get_compiled_template(f"{email.template_name}.html")
+        text_template = get_compiled_template(f"{email.template_name}.txt")
+        if html_template is not None:
+            html_body = html_template.render(email.context)
+        if text_template is not None:
+            body = text_template.render(email.context)
+    message = EmailMultiAlternatives(
+        email.subject, body, email.from_email or settings.DEFAULT_FROM_EMAIL, email.to, connection=connection
+    )
+    if html_body:
+        message.attach_alternative(html_body, "text/html")
+    return message
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+# ------------------- Worker -------------------
+def claim_batch(batch_size):
+    """Lock the next due emails and push them out of reach of other workers for CLAIM_LEASE"""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + CLAIM_LEASE
+        )
+    return emails
+
+
+def _record_failure(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"[:2000]
+    if email.attempts >= max_attempts:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def _record_sent(email):
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        status="sent", sent_at=timezone.now(), attempts=F("attempts") + 1, last_error=""
+    )
+
+
+def send_batch(batch_size=50, max_attempts=5, connection=None):
+    """Deliver one batch of due emails; returns (sent, failed) counts"""
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in emails:
+            _record_failure(email, exc, max_attempts)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            try:
+                build_message(email, connection).send()
+            except Exception as exc:
+                failed += 1
+                _record_failure(email, exc, max_attempts)
+                # The session may be broken; start a fresh one for the rest of the batch
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+            else:
+                sent += 1
+                _record_sent(email)
+    finally:
+        connection.close()
+    return sent, failed
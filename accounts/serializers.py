@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from allauth.account.adapter import get_adapter
 from allauth.account.utils import setup_user_email
+from core.image_pipeline import ImageVariantsField
 
 User = get_user_model()
 
@@ -43,26 +43,29 @@ class RegisterSerializer(serializers.ModelSerializer):
 
         # Email confirmation
         request = self.context.get("request")
-        adapter = get_adapter()
         setup_user_email(request, user, [])
         email_address = user.emailaddress_set.first()
         if email_address:
-            adapter.send_confirmation_mail(request, email_address, True)
+            # Builds the EmailConfirmation and hands it to the adapter, which queues the email
+            email_address.send_confirmation(request, signup=True)
 
         return user
 
 
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture_variants = ImageVariantsField()
+
     class Meta:
         model = User
         fields = [
             "id", "email", "first_name", "last_name", "phone",
-            "profile_picture", "facebook_account", "location", "occupation"
+            "profile_picture", "profile_picture_variants", "facebook_account", "location", "occupation"
         ]
 
 class UserProfileSerializer(serializers.ModelSerializer):
     # Add a field to check if user logged in via social auth
     is_social_user = serializers.SerializerMethodField()
+    profile_picture_variants = ImageVariantsField()
     
     class Meta:
         model = User
@@ -72,6 +75,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'email', 
             'phone', 
             'profile_picture', 
+            'profile_picture_variants',
             'facebook_account', 
             'location', 
             'occupation',
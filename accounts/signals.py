@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from core.image_pipeline import register_image_fields
+from .authentication import REVOKING_FIELDS, revoke_users, token_cache
+from .models import CustomUser
+
+register_image_fields(CustomUser, "profile_picture")
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """dj_rest_auth logout deletes the token; dropped again after commit in case a racing request re-cached it"""
+    key = instance.key
+    token_cache.invalidate_key(key)
+    transaction.on_commit(lambda: token_cache.invalidate_key(key))
+    revoke_users([instance.user_id])  # other processes only see the user's generation
+
+
+def _auth_state(instance):
+    """Loaded values of REVOKING_FIELDS; never loads a deferred field"""
+    return tuple(instance.__dict__.get(field) for field in REVOKING_FIELDS)
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_auth_state(sender, instance, **kwargs):
+    instance._auth_state = _auth_state(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, **kwargs):
+    """Deactivation, password and is_staff / role changes must not be served from a stale snapshot"""
+    state = _auth_state(instance)
+    if not created and state != instance._auth_state:
+        revoke_users([instance.pk])
+    instance._auth_state = state
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    revoke_users([instance.pk])
@@ -1,3 +1,192 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.authentication import token_cache
+from accounts.models import OutgoingEmail
+from accounts.outbox import queue_email, send_batch
+from core.cache import invalidate
+
+User = get_user_model()
+
+
+class EmailOutboxTests(APITestCase):
+
+    def register(self):
+        return self.client.post(reverse("register"), {
+            "username": "rahim",
+            "email": "rahim@test.com",
+            "password": "pass12345",
+            "confirm_password": "pass12345",
+            "first_name": "Rahim",
+        })
+
+    def test_signup_queues_instead_of_sending(self):
+        response = self.register()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, ["rahim@test.com"])
+        self.assertEqual(email.status, "pending")
+
+    def test_worker_renders_and_sends(self):
+        self.register()
+        out = StringIO()
+        call_command("send_queued_emails", stdout=out)
+
+        self.assertIn("Sent 1 email(s)", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, "Verify your email - Crisis Aid")
+        html, mimetype = message.alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn("/verify-email/", html)
+        self.assertIn("Rahim", html)
+        self.assertEqual(OutgoingEmail.objects.get().status, "sent")
+
+    def test_batch_shares_one_connection(self):
+        for index in range(3):
+            queue_email([f"user{index}@test.com"], "Hello", body="Hi")
+
+        with patch("django.core.mail.backends.locmem.EmailBackend.open") as opened:
+            self.assertEqual(send_batch(batch_size=10), (3, 0))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_crash_mid_batch_keeps_what_was_delivered(self):
+        first, second = [queue_email([f"user{index}@test.com"], "Hello", body="Hi") for index in range(2)]
+        send_messages = mail.get_connection().send_messages
+        calls = []
+
+        def deliver_then_die(self, messages):
+            calls.append(messages)
+            if len(calls) > 1:
+                raise SystemExit("worker killed")
+            return send_messages(messages)
+
+        with patch("django.core.mail.backends.locmem.EmailBackend.send_messages", deliver_then_die):
+            with self.assertRaises(SystemExit):
+                send_batch(batch_size=10)
+        self.assertEqual(OutgoingEmail.objects.get(pk=first.pk).status, "sent")
+        self.assertEqual(OutgoingEmail.objects.get(pk=second.pk).status, "pending")
+
+    def test_failure_backs_off_then_gives_up(self):
+        email = queue_email(["user@test.com"], "Hello", body="Hi")
+        failing = "django.core.mail.backends.locmem.EmailBackend.send_messages"
+
+        with patch(failing, side_effect=ConnectionError("SMTP down")):
+            self.assertEqual(send_batch(max_attempts=2), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("pending", 1))
+        self.assertIn("SMTP down", email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=30))
+
+        # Not due yet
+        self.assertEqual(send_batch(max_attempts=2), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        with patch(failing, side_effect=ConnectionError("SMTP down")):
+            send_batch(max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("failed", 2))
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="vol", email="vol@test.com", password="pass123")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse("user_profile")
+
+    def test_repeat_requests_skip_token_lookup(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["username"], "vol")
+        self.assertFalse([q for q in ctx.captured_queries if "authtoken_token" in q["sql"]])
+        self.assertEqual(token_cache.stats()["hits"], 1)
+
+    def test_logout_revokes_cached_token(self):
+        self.client.get(self.url)
+        self.client.post(reverse("rest_logout"))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_and_role_changes_invalidate(self):
+        self.client.get(self.url)
+        self.user.role = "ngo"
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).data["role"], "ngo")
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_deactivation_revokes(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_last_login_keeps_the_snapshot(self):
+        self.client.get(self.url)
+        update_last_login(None, self.user)
+        User.objects.filter(pk=self.user.pk).update(last_login=timezone.now())
+        self.client.get(self.url)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+
+        self.user.set_password("changed123")
+        self.user.save()
+        self.client.get(self.url)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+
+    def test_bulk_update_loads_no_ids(self):
+        with CaptureQueriesContext(connection) as ctx:
+            User.objects.filter(username__startswith="v").update(is_active=False)
+        self.assertEqual(len([q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]), 0)
+
+    def test_generations_outlive_the_cache_timeout(self):
+        self.client.get(self.url)
+        with patch("django.core.cache.backends.locmem.time.time", return_value=time.time() + 3600):
+            self.client.get(self.url)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+
+    def test_revocation_in_another_process_is_seen(self):
+        self.client.get(self.url)
+        # Another worker revoking the user only reaches this one through the shared cache
+        invalidate(f"tokenauth:{self.user.pk}")
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.assertTrue([q for q in ctx.captured_queries if "authtoken_token" in q["sql"]])
+        self.assertEqual(token_cache.stats()["hits"], 0)
+
+    def test_lru_bound_and_stats_endpoint(self):
+        with self.settings(TOKEN_AUTH_CACHE_SIZE=1):
+            other = User.objects.create_user(username="other", email="o@test.com", password="pass123")
+            other_token = Token.objects.create(user=other)
+            self.client.get(self.url)
+            self.client.credentials(HTTP_AUTHORIZATION=f"Token {other_token.key}")
+            self.client.get(self.url)
+            self.assertEqual(token_cache.stats()["size"], 1)
+            self.assertEqual(token_cache.stats()["evictions"], 1)
+
+        admin = User.objects.create_superuser(username="admin", email="a@test.com", password="pass123")
+        self.client.credentials()
+        self.client.force_authenticate(admin)
+        data = self.client.get(reverse("token_cache_stats")).data
+        self.assertEqual(data["misses"], 2)
+        self.assertIn("hit_rate", data)
@@ -6,6 +6,7 @@ urlpatterns = [
     path("register/", RegisterView.as_view(), name="register"),
     path('auth/', include('dj_rest_auth.urls')),
     path('profile/', views.UserProfileView.as_view(), name='user_profile'),
+    path('auth-cache/', views.TokenCacheStatsView.as_view(), name='token_cache_stats'),
 
     # Social logins
     path("google/", GoogleLogin.as_view(), name="google_login"),
@@ -8,6 +8,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
+from .authentication import token_cache
 
 # Social login imports
 from dj_rest_auth.registration.views import SocialLoginView
@@ -66,6 +67,15 @@ class UserProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# ------------------- Auth cache -------------------
+class TokenCacheStatsView(APIView):
+    """Hit-rate counters of this process's token cache (admin only)"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response(token_cache.stats())
+
+
 # ------------------- Social Login -------------------
 class GoogleLogin(SocialLoginView):
     """Google OAuth2 login"""
@@ -1,3 +1,27 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IdempotencyKey, ModerationEvent, SyncChange
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("key_hash", "status_code", "created_at")
+    readonly_fields = ("key_hash", "fingerprint", "status_code", "response_body", "created_at")
+    date_hierarchy = "created_at"
+
+
+@admin.register(ModerationEvent)
+class ModerationEventAdmin(admin.ModelAdmin):
+    list_display = ("target_type", "target_id", "from_status", "to_status", "moderator", "created_at")
+    list_filter = ("target_type", "to_status")
+    search_fields = ("moderator__username",)
+    readonly_fields = ("moderator", "target_type", "target_id", "from_status", "to_status", "created_at")
+    date_hierarchy = "created_at"
+
+
+@admin.register(SyncChange)
+class SyncChangeAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "object_id", "crisis_post_id", "user_id", "changed_at")
+    list_filter = ("kind",)
+    readonly_fields = ("kind", "object_id", "crisis_post_id", "user_id", "changed_at")
+    show_full_result_count = False
@@ -0,0 +1,187 @@
+"""
+ModelAdmin pieces for changelists over large tables (donations, volunteer
+applications, ...).
+
+* AutocompleteFilter: a related-object filter that renders the admin's
+  autocomplete widget instead of one link per related row, so the sidebar
+  only loads the selected object.
+* IndexedDateHierarchy: date drilldowns computed with one index seek per
+  candidate year / month / day, instead of the SELECT DISTINCT over every
+  matching row that Django's date_hierarchy tag runs. Needs an index leading with
+  the hierarchy field (or with the filtered columns, then that field).
+* CappedCountPaginator: counts at most ADMIN_COUNT_LIMIT matching rows, so
+  a broad filter costs a bounded index range instead of a full COUNT(*).
+* LargeTableAdminMixin: all of the above, no second unfiltered COUNT(*)
+  and no facet counts.
+"""
+import copy
+from datetime import date, datetime, timedelta
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Exists
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    list_filter = (("crisis_post", AutocompleteFilter),)
+
+    The related model's admin needs search_fields, as for autocomplete_fields.
+    """
+    template = "admin/core/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        values = params.get(self.lookup_kwarg)
+        self.lookup_val = values[-1] if values else None
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            to_field_name=field.target_field.name,
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "display": "All",
+        }
+
+    def widget(self):
+        """The select for the sidebar; only the selected object (if any) is fetched"""
+        return self.form_field.widget.render(
+            self.lookup_kwarg, self.lookup_val, attrs={"id": f"autocomplete_filter_{self.field_path}"}
+        )
+
+
+def _start(value, kind):
+    """First instant of the year / month / day holding `value` (naive, local time)"""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        value = datetime(value.year, value.month, value.day)
+    else:
+        value = date(value.year, value.month, value.day)
+    if kind in ("year", "month"):
+        value = value.replace(day=1)
+    if kind == "year":
+        value = value.replace(month=1)
+    return value
+
+
+def _next(start, kind):
+    if kind == "year":
+        return start.replace(year=start.year + 1)
+    if kind == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=1)
+
+
+def _aware(start):
+    if isinstance(start, datetime) and settings.USE_TZ:
+        return timezone.make_aware(start)
+    return start
+
+
+class IndexedDateHierarchy:
+    """
+    Stands in for `cl.queryset` inside Django's date_hierarchy(): it answers
+    the two calls that function makes from index seeks.
+    """
+
+    def __init__(self, queryset, field_name):
+        self.queryset = queryset.filter(**{f"{field_name}__isnull": False})
+        self.field_name = field_name
+        self._range = None
+
+    def _first(self, order):
+        return self.queryset.order_by(order).values_list(self.field_name, flat=True).first()
+
+    def aggregate(self, **aggregates):
+        # Called with first=Min(field), last=Max(field). SQLite only short-cuts
+        # a lone MIN or MAX to an index seek, so run them as two ORDER BY ... LIMIT 1
+        if self._range is None:
+            self._range = {"first": self._first(self.field_name), "last": self._first(f"-{self.field_name}")}
+        return self._range
+
+    def datetimes(self, field_name, kind, *args, **kwargs):
+        """
+        Periods between the first and last row that hold any row: one query
+        with an EXISTS (a single index seek) per candidate period.
+        """
+        first, last = self.aggregate().values()
+        if first is None:
+            return []
+        starts = [_start(first, kind)]
+        while starts[-1] < _start(last, kind):
+            starts.append(_next(starts[-1], kind))
+        bounds = [_aware(start) for start in starts + [_next(starts[-1], kind)]]
+
+        # The period range goes first in the WHERE clause: when a drilldown already
+        # bounds the same column, SQLite seeks the index with the first range it finds
+        model = self.queryset.model
+        probes = {
+            f"period_{index}": Exists(model._default_manager.filter(**{
+                f"{self.field_name}__gte": bounds[index], f"{self.field_name}__lt": bounds[index + 1],
+            }) & self.queryset.order_by())
+            for index in range(len(starts))
+        }
+        found = self.queryset.order_by().annotate(**probes).values(*probes)[0]
+        return [bounds[index] for index in range(len(starts)) if found[f"period_{index}"]]
+
+    dates = datetimes
+
+
+def indexed_changelist(cl):
+    """A copy of the ChangeList whose queryset answers date_hierarchy() from the index"""
+    cl = copy.copy(cl)
+    cl.queryset = IndexedDateHierarchy(cl.queryset, cl.date_hierarchy)
+    return cl
+
+
+class CappedCountPaginator(Paginator):
+    """
+    Stops counting after ADMIN_COUNT_LIMIT rows: `count` is then the limit,
+    `capped` is True and later pages are not offered (narrow the filter).
+    """
+    capped = False
+
+    @cached_property
+    def count(self):
+        limit = getattr(settings, "ADMIN_COUNT_LIMIT", 10000)
+        count = self.object_list[:limit + 1].count()  # COUNT(*) over a LIMITed subquery
+        self.capped = count > limit
+        return min(count, limit)
+
+
+class LargeTableAdminMixin:
+    """
+    For changelists over tables too big to count or scan on every page load.
+    Pair it with list_select_related for the columns shown, AutocompleteFilter
+    for related filters, and a date_hierarchy on an indexed field.
+    """
+    show_full_result_count = False  # "x results (y total)" needs a second, unfiltered COUNT(*)
+    show_facets = admin.ShowFacets.NEVER  # one COUNT per filter choice
+    paginator = CappedCountPaginator
+    change_list_template = "admin/core/change_list.html"
+
+    @property
+    def media(self):
+        return (
+            super().media
+            + AutocompleteSelect(None, self.admin_site).media
+            + forms.Media(js=["core/admin/autocomplete_filter.js"])
+        )
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from allauth.account import middleware as account_middleware
+
+        from .cache import check_shared_cache
+        from .middleware import lean_account_middleware
+        check_shared_cache()
+        if not getattr(account_middleware.AccountMiddleware, "lean_wrapped", False):
+            account_middleware.AccountMiddleware = lean_account_middleware(account_middleware.AccountMiddleware)
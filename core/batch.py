@@ -0,0 +1,142 @@
+"""
+Batched reads: several API GETs in one round trip.
+
+    POST /api/batch/
+    {"requests": ["/api/crisis/12/", {"url": "/api/updates/crisis/12/", "etag": "\"4f...\""}]}
+
+Each URL goes through the normal URL resolver and its view is called
+in-process, in order, on the caller's thread. Subrequests therefore share
+the batch's database connection and transaction, the response cache, and
+the caller's already-authenticated user: DRF is handed that user instead of
+running the authentication classes again (anonymous callers keep the
+normal 401 challenge). They skip the middleware stack, which the batch
+request itself has been through. Only GETs under /api/ can be batched, at
+most API_BATCH_MAX_REQUESTS per call.
+
+Results come back in request order with their own status code and ETag:
+
+    {"responses": [{"url": "/api/crisis/12/", "status": 200, "etag": "...", "body": {...}}, ...]}
+
+A subrequest sent with a matching `etag` gets a 304 and a null body.
+Rendered JSON bodies (including response-cache hits) are spliced into the
+batch response as they are, without being parsed and encoded again.
+"""
+import copy
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils.datastructures import MultiValueDict
+from rest_framework import permissions, serializers
+from rest_framework.views import APIView
+
+logger = logging.getLogger("crisisaid.batch")
+
+API_PREFIX = "/api/"
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = serializers.ListField(child=serializers.JSONField(), allow_empty=False)
+
+    def validate_requests(self, items):
+        """Normalise to [(url, etag or None)]"""
+        limit = getattr(settings, "API_BATCH_MAX_REQUESTS", 10)
+        if len(items) > limit:
+            raise serializers.ValidationError(f"At most {limit} requests per batch.")
+        requests = []
+        for item in items:
+            url, etag = (item.get("url"), item.get("etag")) if isinstance(item, dict) else (item, None)
+            if not isinstance(url, str) or not url.startswith(API_PREFIX) or "://" in url or url.startswith("//"):
+                raise serializers.ValidationError(f"Expected a relative {API_PREFIX} URL, got {url!r}.")
+            if etag is not None and not isinstance(etag, str):
+                raise serializers.ValidationError(f"`etag` must be a string ({url}).")
+            requests.append((url, etag))
+        return requests
+
+
+def _json(data):
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def build_subrequest(request, url, etag=None):
+    """A GET for `url` carrying the caller's host, cookies, session and authenticated user"""
+    path, _, query = url.partition("?")
+    outer = request._request
+    sub = copy.copy(outer)
+    sub.method = "GET"
+    sub.path = sub.path_info = path
+    sub.META = {
+        key: value for key, value in outer.META.items()
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH", "HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+    }
+    sub.META.update(
+        REQUEST_METHOD="GET", PATH_INFO=path, QUERY_STRING=query, HTTP_ACCEPT="application/json",
+    )
+    if etag:
+        sub.META["HTTP_IF_NONE_MATCH"] = etag
+    sub.GET = QueryDict(query)
+    sub._body, sub._post, sub._files = b"", QueryDict(), MultiValueDict()
+    sub.resolver_match = None
+    if request.user.is_authenticated:
+        # Read by rest_framework.request.Request: reuse the caller's user instead of authenticating again
+        sub._force_auth_user, sub._force_auth_token = request.user, request.auth
+    return sub
+
+
+def run_subrequest(request, url, etag=None):
+    """(status, etag, body bytes) for one batched GET"""
+    sub = build_subrequest(request, url, etag)
+    try:
+        match = resolve(sub.path_info)
+    except Resolver404:
+        return 404, None, _json({"detail": "Not found."})
+    if match.url_name == "api_batch":
+        return 400, None, _json({"detail": "Batch requests cannot be nested."})
+    sub.resolver_match = match
+
+    try:
+        # A savepoint per subrequest, so a failing one does not break the batch's transaction
+        with transaction.atomic():
+            response = match.func(sub, *match.args, **match.kwargs)
+            if getattr(response, "streaming", False):
+                return 400, None, _json({"detail": "Streaming responses cannot be batched."})
+            if hasattr(response, "render"):
+                response.render()  # also runs the response-cache store callback
+    except Http404:
+        return 404, None, _json({"detail": "Not found."})
+    except Exception:
+        logger.exception("Batched GET %s failed", url)
+        return 500, None, _json({"detail": "Server error."})
+
+    content = response.content
+    if not content:
+        body = b"null"
+    elif "json" in response.get("Content-Type", ""):
+        body = content
+    else:
+        body = _json(content.decode(response.charset or "utf-8", errors="replace"))
+    return response.status_code, response.get("ETag"), body
+
+
+class BatchView(APIView):
+    """
+    POST {"requests": [url or {"url", "etag"}, ...]}: run the GETs in one round trip.
+    Statuses are per subrequest; the batch itself answers 200 unless its body is invalid.
+    """
+    permission_classes = [permissions.AllowAny]  # each subrequest applies its own view's permissions
+
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        parts = []
+        for url, etag in serializer.validated_data["requests"]:
+            status_code, response_etag, body = run_subrequest(request, url, etag)
+            head = {"url": url, "status": status_code}
+            if response_etag:
+                head["etag"] = response_etag
+            parts.append(_json(head)[:-1] + b',"body":' + body + b"}")
+        return HttpResponse(b'{"responses":[' + b",".join(parts) + b"]}", content_type="application/json")
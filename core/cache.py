@@ -0,0 +1,156 @@
+"""
+Response cache for public read endpoints.
+
+Entries are keyed by absolute URL (with query string), Accept header and the
+caller's visibility class (anonymous / authenticated / staff), plus the
+current generation of every namespace the response depends on, e.g.
+`feed`, `post:12`, `summary:12`. `invalidate("summary:12")` bumps that
+generation, so older entries are never read again and simply expire. This
+only needs get/set/incr and works on the local-memory and file-based
+backends. Generations must be shared by every worker process, or workers
+hand out different ETags and keep entries another worker invalidated: with
+WEB_CONCURRENCY above 1 the local-memory backend is refused at startup.
+
+The same generations give every cached endpoint a strong ETag, see
+CachedResponseMixin.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def get_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def check_shared_cache():
+    """Called at startup (CoreConfig.ready)"""
+    workers = getattr(settings, "WEB_CONCURRENCY", 1)
+    if workers > 1 and isinstance(get_cache(), LocMemCache):
+        raise ImproperlyConfigured(
+            f"WEB_CONCURRENCY={workers} with a per-process local-memory cache: set CACHE_URL to a backend "
+            "shared by the workers (e.g. filecache:// or redis://) so cache invalidations reach all of them."
+        )
+
+
+def _generation_key(namespace):
+    return f"respgen:{namespace}"
+
+
+def _generations(namespaces):
+    cache = get_cache()
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Start from the clock so an evicted counter cannot come back to an old value. Never
+            # expires: a timed-out generation would drop every entry and snapshot built on it
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [str(found[key]) for key in keys]
+
+
+def generations(*namespaces):
+    """Current generations of `namespaces` in one read, for callers keeping copies (e.g. accounts.authentication)"""
+    return tuple(_generations(namespaces))
+
+
+def _bump(namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def invalidate(*namespaces):
+    """
+    Drop every cached response depending on `namespaces`. Bumped now and again
+    after commit, so a request racing the transaction cannot keep the old data.
+    """
+    namespaces = [namespace for namespace in namespaces if namespace]
+    if not namespaces:
+        return
+    _bump(namespaces)
+    transaction.on_commit(lambda: _bump(namespaces))
+
+
+def visibility_class(user):
+    if user is None or not user.is_authenticated:
+        return "anon"
+    return "staff" if user.is_staff else "auth"
+
+
+class CachedResponseMixin:
+    """
+    Cache successful GET responses of an APIView / viewset and answer
+    conditional requests.
+
+    Views return the namespaces a response depends on from
+    get_cache_namespaces(); returning None skips caching for that request.
+    The cache key doubles as a strong ETag: it changes whenever one of the
+    namespaces is invalidated, so `If-None-Match` is answered with a 304
+    before the handler (queryset, serializer) runs.
+    """
+    cache_timeout = None
+
+    def get_cache_namespaces(self):
+        return None
+
+    def get_response_cache_key(self, request, namespaces):
+        generations = ":".join(_generations(namespaces))
+        # Absolute URI: pagination links embed the host
+        url = request.build_absolute_uri() + "|" + request.META.get("HTTP_ACCEPT", "")
+        digest = hashlib.md5(url.encode("utf-8")).hexdigest()
+        return f"resp:{visibility_class(request.user)}:{generations}:{digest}"
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._response_cache_key = None
+        self._response_etag = None
+        if request.method not in ("GET", "HEAD"):
+            return
+        namespaces = self.get_cache_namespaces()
+        if namespaces is None:
+            return
+        key = self.get_response_cache_key(request, namespaces)
+        self._response_etag = quote_etag(hashlib.md5(key.encode("utf-8")).hexdigest())
+
+        response = get_conditional_response(request, etag=self._response_etag)
+        if response is None and request.method == "GET":
+            self._response_cache_key = key
+            cached = get_cache().get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response["X-Cache"] = "HIT"
+        if response is not None:
+            # Serve the 304 / stored body instead of running the handler
+            setattr(self, request.method.lower(), lambda *args, **kwargs: response)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "_response_etag", None)
+        if etag and response.status_code in (200, 304):
+            response["ETag"] = etag
+        key = getattr(self, "_response_cache_key", None)
+        if key and response.status_code == 200 and not response.has_header("X-Cache"):
+            response["X-Cache"] = "MISS"
+            timeout = self.cache_timeout or getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60)
+
+            def store(rendered):
+                get_cache().set(key, (rendered.content, rendered["Content-Type"]), timeout)
+
+            if hasattr(response, "add_post_render_callback"):
+                response.add_post_render_callback(store)
+        return response
@@ -0,0 +1,37 @@
+import inspect
+
+
+def query_hints(*paths, annotations=None):
+    """
+    Declare what a model property reads, so serializers exposing it can be
+    planned by core.optimization.
+
+    `paths` are ORM lookups relative to the model (`"donor__username"`,
+    `"is_anonymous"`); `annotations` are added to the queryset when the
+    property is read at the top level of a serializer. Annotation values may
+    be zero-argument callables, for expressions built from models defined
+    later in the module.
+
+        @property
+        @query_hints("owner__username")
+        def owner_name(self):
+            return self.owner.username
+    """
+    def decorator(func):
+        func.query_paths = paths
+        func.query_annotations = annotations or {}
+        return func
+    return decorator
+
+
+def get_query_hints(model, attr):
+    """Return (paths, annotations) declared for `model.attr`, or None if unknown"""
+    try:
+        value = inspect.getattr_static(model, attr)
+    except AttributeError:
+        return None
+    if isinstance(value, property):
+        value = value.fget
+    if not hasattr(value, "query_paths"):
+        return None
+    return value.query_paths, value.query_annotations
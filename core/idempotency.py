@@ -0,0 +1,83 @@
+"""
+`Idempotency-Key` support for create endpoints.
+
+A client sends a unique key with a POST; the first 2xx response is stored
+in IdempotencyKey and returned as-is (with `Idempotent-Replayed: true`) for
+every retry carrying the same key, after a single indexed read. Keys are
+scoped to the endpoint and the authenticated user, and expire after
+IDEMPOTENCY_KEY_TTL seconds (`manage.py purge_idempotency_keys` deletes
+them). Reusing a key with a different body is rejected with 422.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+
+class IdempotentCreateMixin:
+    """For CreateAPIView subclasses; requests without the header are unaffected"""
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return super().post(request, *args, **kwargs)
+        if len(key) > 255:
+            raise ValidationError({HEADER: "Must be at most 255 characters."})
+
+        key_hash = self.idempotency_key_hash(request, key)
+        fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        record = IdempotencyKey.objects.filter(key_hash=key_hash).first()
+        if record is not None and record.created_at < timezone.now() - key_ttl():
+            record.delete()
+            record = None
+        if record is None:
+            try:
+                with transaction.atomic():
+                    response = super().post(request, *args, **kwargs)
+                    if status.is_success(response.status_code):
+                        IdempotencyKey.objects.create(
+                            key_hash=key_hash,
+                            fingerprint=fingerprint,
+                            status_code=response.status_code,
+                            response_body=response.data,
+                        )
+                return response
+            except IntegrityError:
+                # A concurrent request with the same key won; our insert was rolled back
+                record = IdempotencyKey.objects.filter(key_hash=key_hash).first()
+                if record is None:
+                    return Response(
+                        {"detail": "A request with this Idempotency-Key is already in progress."},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+
+        if record.fingerprint != fingerprint:
+            return Response(
+                {"detail": "This Idempotency-Key was already used with a different request body."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(record.response_body, status=record.status_code, headers={REPLAY_HEADER: "true"})
+
+    def idempotency_key_hash(self, request, key):
+        match = request.resolver_match
+        scope = match.view_name if match else request.path
+        user = request.user.pk if request.user.is_authenticated else ""
+        return hashlib.sha256(f"{scope}\0{user}\0{key}".encode()).hexdigest()
@@ -0,0 +1,178 @@
+"""
+Off-request processing of uploaded images.
+
+Apps register their image fields in signals.py:
+
+    register_image_fields(CrisisPost, "banner_image")
+
+Each registered field needs a `<field>_variants` JSONField next to it. When a
+saved instance has an image without a manifest, core.images.render_variants
+is queued after commit on a process pool (IMAGE_WORKERS processes, 0 renders
+inline), so uploads return immediately. The manifest is written back with a
+single UPDATE guarded by the image name, and `variants_ready` is sent so
+cached responses can be invalidated.
+
+The pool spawns fresh interpreters rather than forking: it is created inside
+threaded web workers, and a fork copies locks held by other threads.
+Rendering reads and writes files under the storage's location, so image
+fields must use a FileSystemStorage; registering any other storage fails.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection, transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import Signal
+from rest_framework import serializers
+
+from .images import VARIANT_FORMATS, render_variants
+
+logger = logging.getLogger("crisisaid.images")
+
+# Sent with sender=<model>, pk, field_name, variants once a manifest is stored
+variants_ready = Signal()
+
+image_fields = {}
+_pool = None
+
+
+def variants_field(field_name):
+    return f"{field_name}_variants"
+
+
+def media_root(model, field_name):
+    """Directory the field's files live in; core.images works on local paths only"""
+    storage = model._meta.get_field(field_name).storage
+    if not isinstance(storage, FileSystemStorage):
+        raise ImproperlyConfigured(
+            f"{model._meta.label}.{field_name} uses {type(storage).__name__}; "
+            "the image pipeline needs a FileSystemStorage."
+        )
+    return storage.location
+
+
+def register_image_fields(model, *field_names):
+    for field_name in field_names:
+        media_root(model, field_name)
+    image_fields[model] = field_names
+    uid = f"image_pipeline:{model._meta.label}"
+    pre_save.connect(_reset_stale_variants, sender=model, dispatch_uid=uid)
+    post_save.connect(_schedule_variants, sender=model, dispatch_uid=uid)
+
+
+def _reset_stale_variants(sender, instance, raw=False, **kwargs):
+    """A replaced or cleared image invalidates its manifest (and files) in the same save"""
+    if raw:
+        return
+    for field_name in image_fields[sender]:
+        variants = getattr(instance, variants_field(field_name))
+        if variants and variants.get("source") != getattr(instance, field_name).name:
+            setattr(instance, variants_field(field_name), {})
+            storage = sender._meta.get_field(field_name).storage
+            transaction.on_commit(lambda storage=storage, variants=variants: delete_variant_files(storage, variants))
+
+
+def delete_variant_files(storage, variants):
+    for key in VARIANT_FORMATS:
+        for name in variants.get(key, {}).values():
+            storage.delete(name)
+
+
+def _schedule_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    for field_name in image_fields[sender]:
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        name = getattr(instance, field_name).name
+        if name and not getattr(instance, variants_field(field_name)):
+            transaction.on_commit(
+                lambda field_name=field_name, name=name: submit(sender, instance.pk, field_name, name)
+            )
+
+
+# ------------------- Processing -------------------
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def submit(model, pk, field_name, name):
+    """Render `name` for `model.pk.field_name`, on the pool unless IMAGE_WORKERS is 0"""
+    root = media_root(model, field_name)
+    if settings.IMAGE_WORKERS <= 0:
+        save_variants(model, pk, field_name, render_variants(root, name))
+        return
+    future = get_pool().submit(render_variants, root, name)
+    future.add_done_callback(lambda done: _finish(model, pk, field_name, done))
+
+
+def _finish(model, pk, field_name, future):
+    """Runs on the executor's thread: store the manifest, then release that thread's connection"""
+    try:
+        save_variants(model, pk, field_name, future.result())
+    except Exception:
+        logger.exception("Rendering %s.%s for pk=%s failed", model._meta.label, field_name, pk)
+    finally:
+        connection.close()
+
+
+def save_variants(model, pk, field_name, variants):
+    """Store the manifest unless the image changed while it was rendered"""
+    updated = model._default_manager.filter(pk=pk, **{field_name: variants["source"]}).update(
+        **{variants_field(field_name): variants}
+    )
+    if updated:
+        variants_ready.send(sender=model, pk=pk, field_name=field_name, variants=variants)
+    return bool(updated)
+
+
+# ------------------- API -------------------
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Render a `<field>_variants` manifest for clients:
+
+        {"src": ".../640w.jpg", "srcset": {"webp": ".../320w.webp 320w, ...", "jpeg": "..."},
+         "width": 4000, "height": 3000, "placeholder": "data:image/jpeg;base64,..."}
+
+    None until the image has been processed.
+    """
+
+    def __init__(self, storage=None, **kwargs):
+        self.storage = storage
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        if not variants:
+            return None
+        storage = self.storage or default_storage
+        request = self.context.get("request")
+
+        def url(name):
+            value = storage.url(name)
+            return request.build_absolute_uri(value) if request is not None else value
+
+        def by_width(key):
+            return sorted((int(width), name) for width, name in variants.get(key, {}).items())
+
+        srcset = {
+            key: ", ".join(f"{url(name)} {width}w" for width, name in by_width(key))
+            for key in VARIANT_FORMATS if variants.get(key)
+        }
+        jpeg = by_width("jpeg")
+        src = next((name for width, name in jpeg if width >= 640), jpeg[-1][1] if jpeg else None)
+        return {
+            "src": url(src) if src else None,
+            "srcset": srcset,
+            "width": variants.get("width"),
+            "height": variants.get("height"),
+            "placeholder": variants.get("placeholder"),
+        }
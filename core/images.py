@@ -0,0 +1,112 @@
+"""
+Image rendering for uploaded banners, update photos and profile pictures.
+
+This module only depends on Pillow so it can run in worker processes
+without Django being set up; core.image_pipeline decides what to render and
+stores the result.
+
+For one source image render_variants() writes, under MEDIA_ROOT:
+
+    variants/<name without extension>/<width>w.webp
+    variants/<name without extension>/<width>w.jpg
+
+for every width in VARIANT_WIDTHS narrower than the original (plus the
+original width itself), and returns a manifest with the variant paths, the
+oriented size and a tiny blurred JPEG placeholder as a data URI. EXIF data
+(GPS position, camera details) is dropped from the variants and stripped
+from the original file in place.
+"""
+import base64
+import io
+import os
+
+from PIL import Image, ImageFilter, ImageOps
+
+VARIANTS_DIR = "variants"
+VARIANT_WIDTHS = (320, 640, 1024, 1600)
+
+# manifest key -> (file extension, Pillow format, save options)
+VARIANT_FORMATS = {
+    "webp": ("webp", "WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+PLACEHOLDER_WIDTH = 16
+
+
+def variant_widths(width):
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    if width <= VARIANT_WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def variant_name(name, width, extension):
+    base = os.path.splitext(name)[0]
+    return f"{VARIANTS_DIR}/{base}/{width}w.{extension}"
+
+
+def _flatten(image):
+    """RGB copy with transparency composited on white (for JPEG)"""
+    if image.mode == "RGB":
+        return image
+    rgba = image.convert("RGBA")
+    background = Image.new("RGB", rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel("A"))
+    return background
+
+
+def _save_atomic(image, path, image_format, **options):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    image.save(tmp_path, image_format, **options)
+    os.replace(tmp_path, path)
+
+
+def _strip_original(image, oriented, path):
+    """Rewrite the uploaded file without metadata, keeping its name and format"""
+    if not image.getexif() and "exif" not in image.info:
+        return
+    image_format = image.format or "JPEG"
+    options = {"quality": 90} if image_format in ("JPEG", "WEBP") else {}
+    target = _flatten(oriented) if image_format == "JPEG" else oriented
+    _save_atomic(target, path, image_format, **options)
+
+
+def placeholder(image):
+    """A ~16px wide blurred JPEG, small enough to inline in API responses"""
+    thumb = _flatten(image).copy()
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    thumb = thumb.resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BILINEAR)
+    thumb = thumb.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    thumb.save(buffer, "JPEG", quality=50)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def render_variants(media_root, name):
+    """Render every variant of `name` (relative to `media_root`) and return its manifest"""
+    path = os.path.join(media_root, name)
+    with Image.open(path) as image:
+        image.load()
+        oriented = ImageOps.exif_transpose(image)
+        _strip_original(image, oriented, path)
+
+    manifest = {
+        "source": name,
+        "width": oriented.width,
+        "height": oriented.height,
+        "placeholder": placeholder(oriented),
+    }
+    flat = _flatten(oriented)
+    full = oriented if oriented.mode in ("RGB", "RGBA") else oriented.convert("RGBA")
+    for key, (extension, image_format, options) in VARIANT_FORMATS.items():
+        manifest[key] = {}
+        source = flat if image_format == "JPEG" else full
+        for width in variant_widths(oriented.width):
+            height = max(1, round(oriented.height * width / oriented.width))
+            resized = source if width == oriented.width else source.resize((width, height), Image.Resampling.LANCZOS)
+            target = variant_name(name, width, extension)
+            _save_atomic(resized, os.path.join(media_root, target), image_format, **options)
+            manifest[key][str(width)] = target
+    return manifest
@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.image_pipeline import image_fields, media_root, save_variants, variants_field
+from core.images import render_variants
+
+
+class Command(BaseCommand):
+    help = 'Render responsive variants and placeholders for images uploaded before the image pipeline existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Re-render images that already have variants'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=max(1, settings.IMAGE_WORKERS),
+            help='Worker processes (default: IMAGE_WORKERS)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='Images rendered per batch (default: 100)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        done = failed = 0
+
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            for model, field_names in image_fields.items():
+                for field_name in field_names:
+                    for rows in self.pending(model, field_name, options['force'], chunk_size):
+                        root = media_root(model, field_name)
+                        futures = {
+                            pool.submit(render_variants, root, name): (pk, name) for pk, name in rows
+                        }
+                        for future in as_completed(futures):
+                            pk, name = futures[future]
+                            try:
+                                save_variants(model, pk, field_name, future.result())
+                                done += 1
+                            except Exception as exc:
+                                failed += 1
+                                self.stderr.write(f'  {model._meta.label} #{pk} {name}: {exc}')
+                        self.stdout.write(f'  {model._meta.label}.{field_name}: {done} image(s) rendered...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rendered variants for {done} image(s), {failed} failed.'))
+
+    def pending(self, model, field_name, force, chunk_size):
+        """(pk, file name) batches in primary-key order"""
+        queryset = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        if not force:
+            queryset = queryset.filter(**{variants_field(field_name): {}})
+        last_pk = None
+        while True:
+            chunk = queryset.order_by('pk')
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            rows = list(chunk.values_list('pk', field_name)[:chunk_size])
+            if not rows:
+                break
+            yield rows
+            last_pk = rows[-1][0]
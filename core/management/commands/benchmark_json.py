@@ -0,0 +1,87 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer, orjson
+from donations.serializers import DonationGoodsSerializer, DonationMoneySerializer
+
+
+class Command(BaseCommand):
+    help = 'Time DRF JSONRenderer against FastJSONRenderer on CrisisDonationSummaryView-shaped payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Donation rows per payload (default: 1000 10000 100000)'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Renders per size and renderer; the best one is reported (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: FastJSONRenderer falls back to the stdlib encoder.'))
+
+        repeat = max(1, options['repeat'])
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        for size in options['sizes']:
+            data = self.payload(size)
+            stock_time = self.best(stock, data, repeat)
+            fast_time = self.best(fast, data, repeat)
+            speedup = stock_time / fast_time if fast_time else 0
+            self.stdout.write(
+                f'  {size:>7} rows: JSONRenderer {stock_time * 1000:9.1f} ms | '
+                f'FastJSONRenderer {fast_time * 1000:9.1f} ms | {speedup:5.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS('✅ JSON benchmark finished.'))
+
+    @staticmethod
+    def best(renderer, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            renderer.render(data, 'application/json')
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    @staticmethod
+    def payload(size):
+        """Same keys as CrisisDonationSummaryView; rows as the donation serializers emit them"""
+        now = timezone.now()
+        money_fields = DonationMoneySerializer.Meta.fields
+        goods_fields = DonationGoodsSerializer.Meta.fields
+        money, goods = [], []
+        for index in range(size):
+            row = {
+                'id': index + 1,
+                'crisis_post': 1,
+                'crisis_title': 'Flood relief in Sylhet',
+                'display_name': 'Anonymous Donor' if index % 5 == 0 else f'Donor {index}',
+                'amount': str(Decimal(index % 5000) + Decimal('0.50')),
+                'payment_method': 'bkash',
+                'transaction_id': f'TX{index:010d}',
+                'message': 'Stay strong',
+                'is_anonymous': index % 5 == 0,
+                'donated_at': (now - timedelta(minutes=index)).isoformat(),
+                'item_description': '10 blankets, 5kg rice',
+                'quantity': '15',
+                'delivery_method': 'Courier',
+            }
+            money.append({field: row[field] for field in money_fields})
+            goods.append({field: row[field] for field in goods_fields})
+        return {
+            'crisis_id': 1,
+            'crisis_title': 'Flood relief in Sylhet',
+            'total_money': 1234567.5,
+            'total_donors_money': size,
+            'total_goods_donations': size,
+            'funding_goal': 5000000.0,
+            'funding_progress': 24.69,
+            'money_donations': money,
+            'goods_donations': goods,
+        }
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path, set_urlconf
+
+
+@transaction.non_atomic_requests
+def ping(request):
+    return HttpResponse(b'{}', content_type='application/json')
+
+
+class BenchmarkURLConf:
+    """A trivial view on its own urlconf, so only the middleware (and URL resolving) is measured"""
+    urlpatterns = [path('api/ping/', ping)]
+
+
+class Command(BaseCommand):
+    help = 'Time the MIDDLEWARE stack for a token-authenticated API request with and without the lean API profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Requests per profile (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        count = max(1, options['requests'])
+        urlconf = BenchmarkURLConf
+        factory = RequestFactory()
+
+        def run(lean):
+            with override_settings(LEAN_API_MIDDLEWARE=lean):
+                handler = BaseHandler()
+                handler.load_middleware()
+                for _ in range(min(count, 50)):  # warm-up
+                    handler.get_response(self.request(factory, urlconf))
+                started = time.perf_counter()
+                for _ in range(count):
+                    handler.get_response(self.request(factory, urlconf))
+                return (time.perf_counter() - started) / count * 1e6
+
+        try:
+            full = run(False)
+            lean = run(True)
+        finally:
+            set_urlconf(None)  # get_response() leaves the benchmark urlconf active on this thread
+        saving = (full - lean) / full * 100 if full else 0
+        self.stdout.write(f'  full stack: {full:8.1f} µs/request')
+        self.stdout.write(f'  lean stack: {lean:8.1f} µs/request')
+        self.stdout.write(self.style.SUCCESS(f'✅ Lean API profile saves {full - lean:.1f} µs per request ({saving:.0f}%).'))
+
+    @staticmethod
+    def request(factory, urlconf):
+        host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost')
+        request = factory.get('/api/ping/', HTTP_HOST=host, HTTP_AUTHORIZATION='Token benchmark')
+        request.urlconf = urlconf
+        return request
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.idempotency import key_ttl
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL'
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - key_ttl()).delete()
+        self.stdout.write(self.style.SUCCESS(f'✅ Purged {deleted} expired idempotency key(s).'))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import SyncChange
+from core.sync import latest_cursor
+
+
+class Command(BaseCommand):
+    help = 'Delete /api/sync/ change-log entries older than SYNC_RETENTION_DAYS (the newest entry is always kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'SYNC_RETENTION_DAYS', 30),
+            help='Keep this many days of changes (default: SYNC_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Everything below the first recent entry goes, so the log stays a contiguous run of ids
+        # and a cursor older than its start can be told apart (410 Gone)
+        keep_from = (
+            SyncChange.objects.filter(changed_at__gte=cutoff).order_by('id').values_list('id', flat=True).first()
+            or latest_cursor()
+        )
+        deleted, _ = SyncChange.objects.filter(id__lt=keep_from).delete()
+        self.stdout.write(self.style.SUCCESS(f'✅ Purged {deleted} sync change(s).'))
@@ -0,0 +1,113 @@
+import logging
+
+from django.conf import settings
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+from .querylog import QueryRecorder, query_report
+
+logger = logging.getLogger("crisisaid.queries")
+
+
+class QueryInspectorMiddleware:
+    """
+    Record the SQL of every request (settings.QUERY_INSPECTOR).
+    Adds an `X-Query-Count` header, logs likely N+1 patterns and sends
+    `core.querylog.query_report` so tests can enforce query budgets.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_INSPECTOR", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        label = match.view_name if match else request.path
+        report = recorder.report(label)
+
+        response["X-Query-Count"] = str(report.count)
+        if report.duplicates():
+            logger.warning("%s %s\n%s", request.method, request.get_full_path(), report)
+
+        query_report.send(sender=self.__class__, request=request, report=report)
+        return response
+
+
+# ------------------- Lean API profile -------------------
+def is_lean_api_request(request):
+    """
+    Token-authenticated API calls (LEAN_API_PATH_PREFIXES + `Authorization: Token ...`)
+    need no session, CSRF, messages, frame-options or allauth account handling.
+    Admin and allauth HTML flows never match and keep the full stack.
+    """
+    lean = getattr(request, "_lean_api", None)
+    if lean is None:
+        lean = (
+            getattr(settings, "LEAN_API_MIDDLEWARE", False)
+            and request.path_info.startswith(tuple(getattr(settings, "LEAN_API_PATH_PREFIXES", ("/api/",))))
+            and request.META.get("HTTP_AUTHORIZATION", "").startswith("Token ")
+        )
+        request._lean_api = lean
+    return lean
+
+
+class LeanAPIMixin:
+    """Skip a stock middleware entirely for lean API requests"""
+
+    def __call__(self, request):
+        if is_lean_api_request(request):
+            self.lean_request(request)
+            return self.get_response(request)
+        return super().__call__(request)
+
+    def lean_request(self, request):
+        pass
+
+
+class LeanSessionMiddleware(LeanAPIMixin, SessionMiddleware):
+    def lean_request(self, request):
+        # Empty, never-saved session: code calling logout() or session.flush() still works
+        request.session = self.SessionStore()
+
+
+class LeanCsrfViewMiddleware(LeanAPIMixin, CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class LeanMessageMiddleware(LeanAPIMixin, MessageMiddleware):
+    pass
+
+
+class LeanXFrameOptionsMiddleware(LeanAPIMixin, XFrameOptionsMiddleware):
+    pass
+
+
+def lean_account_middleware(account_middleware):
+    """
+    Wrap allauth's AccountMiddleware factory (a function, so it cannot take
+    LeanAPIMixin). allauth refuses to start unless its own dotted path is in
+    MIDDLEWARE, so CoreConfig.ready installs the wrapper under that name.
+    """
+    def factory(get_response):
+        full = account_middleware(get_response)
+
+        def middleware(request):
+            if is_lean_api_request(request):
+                return get_response(request)
+            return full(request)
+
+        middleware.process_exception = full.process_exception
+        return middleware
+
+    factory.lean_wrapped = True
+    return factory
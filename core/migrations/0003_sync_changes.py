@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_moderation_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.PositiveIntegerField()),
+                ('crisis_post_id', models.PositiveIntegerField(null=True)),
+                ('user_id', models.PositiveIntegerField(null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_sync_changes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='syncchange',
+            index=models.Index(fields=['crisis_post_id', 'id'], name='sync_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='syncchange',
+            index=models.Index(fields=['kind', 'user_id', 'id'], name='sync_kind_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='syncchange',
+            index=models.Index(fields=['changed_at'], name='sync_changed_at_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from rest_framework import permissions
+
+from .optimization import optimize_queryset
+
+
+class OptimizedQuerysetMixin:
+    """
+    For generic views and viewsets: plan select_related / prefetch_related /
+    only() from the active serializer, so list endpoints run a fixed number
+    of queries however many rows they return.
+
+    only() is applied to safe methods only; writes load full rows.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return optimize_queryset(
+            queryset,
+            self.get_serializer(),
+            defer=self.request.method in permissions.SAFE_METHODS,
+        )
@@ -1,3 +1,60 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class IdempotencyKey(models.Model):
+    """
+    First successful response to a request carrying an `Idempotency-Key`
+    header, replayed for retries of the same request (see core/idempotency.py).
+    """
+    # sha256 of endpoint + user + client key; the raw key is never stored
+    key_hash = models.CharField(max_length=64, unique=True)
+    fingerprint = models.CharField(max_length=64)  # sha256 of the request body
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key_hash[:12]}... ({self.status_code})"
+
+
+class ModerationEvent(models.Model):
+    """One status transition applied by a moderator (see core/moderation.py)"""
+    moderator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+")
+    target_type = models.CharField(max_length=50)  # model label, e.g. "crisis.crisispost"
+    target_id = models.PositiveIntegerField()
+    from_status = models.CharField(max_length=20)
+    to_status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["target_type", "target_id", "-created_at"], name="moderation_target_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.target_type} #{self.target_id}: {self.from_status} -> {self.to_status}"
+
+
+class SyncChange(models.Model):
+    """One change an offline client may need to fetch (see core/sync.py); the id is the sync cursor"""
+    kind = models.CharField(max_length=30)  # e.g. "crisis_post", "comment", "donation_summary"
+    object_id = models.PositiveIntegerField()
+    # Plain ids rather than foreign keys: the entries outlive what they describe
+    crisis_post_id = models.PositiveIntegerField(null=True)
+    user_id = models.PositiveIntegerField(null=True)  # the applicant, for volunteer applications
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # core.sync.visible_entries: entries under pending / own posts, volunteer applications per user
+            models.Index(fields=["crisis_post_id", "id"], name="sync_post_idx"),
+            models.Index(fields=["kind", "user_id", "id"], name="sync_kind_user_idx"),
+            models.Index(fields=["changed_at"], name="sync_changed_at_idx"),  # purge_sync_changes cutoff
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} {self.object_id}"
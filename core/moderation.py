@@ -0,0 +1,107 @@
+"""
+Status transitions for moderated objects (crisis posts, volunteer applications).
+
+`moderate()` takes a list of IDs and a target status. One locking read
+fetches each row's status and owner, so permissions and outcomes are decided
+without a query per item. The transition itself is a single
+
+    UPDATE ... SET status = :target WHERE id IN (...) AND status <> :target
+
+and one ModerationEvent is written per row it moved. The rows stay locked
+until the transaction ends, so two moderators clearing the same queue cannot
+both apply a transition. Where the backend cannot lock rows, an UPDATE that
+moves fewer rows than were read rolls back with 409 instead.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .models import ModerationEvent
+
+NOT_FOUND = "not_found"
+FORBIDDEN = "forbidden"
+UNCHANGED = "unchanged"
+
+
+class ModerationConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of these items were moderated by someone else meanwhile; reload and retry."
+    default_code = "moderation_conflict"
+
+
+class BulkModerationSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=getattr(settings, "MODERATION_BULK_LIMIT", 500),
+    )
+
+
+def moderate(model, ids, target, user, owner_field=None, fields=()):
+    """
+    Move the `model` rows in `ids` to status `target`.
+
+    Staff may moderate any row; other users only rows whose `owner_field`
+    (e.g. "crisis_post__owner_id") is their id, or none when `owner_field`
+    is None. Returns ({id: outcome}, [changed rows]): the outcome is `target`
+    for rows moved now, else "unchanged", "forbidden" or "not_found". Changed
+    rows are dicts holding "id", the old "status" and any extra `fields`.
+    """
+    ids = list(dict.fromkeys(ids))
+    columns = ["id", "status", *fields] + ([owner_field] if owner_field else [])
+    with transaction.atomic():
+        rows = {
+            row["id"]: row
+            for row in model.objects.select_for_update(of=("self",)).filter(pk__in=ids).order_by().values(*columns)
+        }
+
+        outcomes = {}
+        changed = []
+        for pk in ids:
+            row = rows.get(pk)
+            if row is None:
+                outcomes[pk] = NOT_FOUND
+            elif not user.is_staff and (owner_field is None or row[owner_field] != user.id):
+                outcomes[pk] = FORBIDDEN
+            elif row["status"] == target:
+                outcomes[pk] = UNCHANGED
+            else:
+                outcomes[pk] = target
+                changed.append(row)
+        if not changed:
+            return outcomes, changed
+
+        now = timezone.now()
+        updates = {"status": target}
+        updates.update({field.name: now for field in model._meta.concrete_fields if getattr(field, "auto_now", False)})
+        updated = (
+            model.objects.filter(pk__in=[row["id"] for row in changed])
+            .exclude(status=target)
+            .update(**updates)
+        )
+        if updated != len(changed):
+            raise ModerationConflict()
+
+        ModerationEvent.objects.bulk_create([
+            ModerationEvent(
+                moderator=user, target_type=model._meta.label_lower, target_id=row["id"],
+                from_status=row["status"], to_status=target, created_at=now,
+            )
+            for row in changed
+        ])
+    return outcomes, changed
+
+
+def bulk_moderation_response(outcomes, target):
+    """Per-ID outcomes in request order, with totals per outcome"""
+    counts = {}
+    for outcome in outcomes.values():
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return Response({
+        "status": target,
+        "results": [{"id": pk, "outcome": outcome} for pk, outcome in outcomes.items()],
+        "counts": counts,
+    })
@@ -0,0 +1,171 @@
+"""
+Derive select_related / prefetch_related / only() for a queryset from the
+serializer that will render it.
+
+Every readable field is resolved through its `source` path:
+
+* concrete columns are added to `only()`;
+* forward FKs and one-to-one relations become `select_related` joins;
+* to-many relations rendered by a nested `many=True` serializer become a
+  `Prefetch` whose queryset is planned from the child serializer;
+* model properties are followed through the paths declared with
+  `core.hints.query_hints`.
+
+When a field cannot be resolved (e.g. a SerializerMethodField) the joins and
+prefetches are still applied but `only()` is skipped, so nothing is deferred
+that the serializer might read.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .hints import get_query_hints
+
+_plan_cache = {}
+
+
+class QueryPlan:
+    def __init__(self, model):
+        self.model = model
+        self.select = set()
+        self.only = {"pk"}
+        self.prefetch = {}
+        self.plain_prefetch = set()
+        self.annotations = {}
+        self.complete = True
+
+    def apply(self, queryset, defer=True):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        for lookup, child in sorted(self.prefetch.items()):
+            child_queryset = child.apply(child.model._default_manager.all(), defer)
+            queryset = queryset.prefetch_related(Prefetch(lookup, queryset=child_queryset))
+        if self.plain_prefetch:
+            queryset = queryset.prefetch_related(*sorted(self.plain_prefetch))
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        if defer and self.complete and self._covers_existing_joins(queryset):
+            queryset = queryset.only(*sorted(self.only - {"pk"}) or ["pk"])
+        return queryset
+
+    def _covers_existing_joins(self, queryset):
+        """only() must not defer a relation the view already joins with select_related"""
+        existing = queryset.query.select_related
+        if existing is True:
+            return False
+        if not existing:
+            return True
+
+        def walk(tree, prefix=""):
+            for name, subtree in tree.items():
+                path = prefix + name
+                yield path
+                yield from walk(subtree, path + "__")
+
+        return all(path in self.select for path in walk(existing))
+
+
+class _Planner:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def add_serializer(self, serializer, model, prefix=(), trail=()):
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField) or field.source == "*":
+                self.plan.complete = False
+                continue
+            self.add_source(field.source_attrs, model, prefix, trail, field)
+
+    def add_source(self, attrs, model, prefix, trail, field=None):
+        """
+        Resolve one source path. `prefix` is the ORM path of `model` from the root,
+        `trail` the relation fields walked to get there (to detect walking back).
+        """
+        for index, attr in enumerate(attrs):
+            last = index == len(attrs) - 1
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                self.add_property(model, attr, prefix, trail)
+                return
+
+            if not model_field.is_relation:
+                self.plan.only.add("__".join(prefix + (attr,)))
+                return
+
+            # `stats.crisis_post` after `crisis_post.stats`: Django already links them
+            if trail and model_field.remote_field is trail[-1][0]:
+                _, model, prefix = trail[-1]
+                trail = trail[:-1]
+                continue
+
+            if model_field.many_to_many or model_field.one_to_many:
+                if last and isinstance(field, serializers.ListSerializer):
+                    self.add_prefetch(field.child, model_field, prefix + (attr,))
+                else:
+                    # Primary-key lists and other to-many reads: prefetch the related rows as they are
+                    self.plan.complete = False
+                    self.plan.plain_prefetch.add("__".join(prefix + (attr,)))
+                return
+
+            if model_field.concrete:
+                self.plan.only.add("__".join(prefix + (attr,)))
+            if last and not isinstance(field, serializers.BaseSerializer):
+                if model_field.concrete:
+                    return  # e.g. PrimaryKeyRelatedField: the FK column is enough
+                self.plan.select.add("__".join(prefix + (attr,)))
+                self.plan.complete = False
+                return
+
+            trail = trail + ((model_field, model, prefix),)
+            prefix = prefix + (attr,)
+            model = model_field.related_model
+            self.plan.select.add("__".join(prefix))
+
+        if isinstance(field, serializers.BaseSerializer):
+            self.add_serializer(field, model, prefix, trail)
+
+    def add_property(self, model, attr, prefix, trail):
+        if not hasattr(model, attr):
+            return  # set by an annotation (e.g. search_rank), no query involved
+        hints = get_query_hints(model, attr)
+        if hints is None:
+            self.plan.complete = False
+            return
+        paths, annotations = hints
+        for path in paths:
+            self.add_source(path.split("__"), model, prefix, trail)
+        if not prefix:
+            self.plan.annotations.update(
+                {name: value() if callable(value) else value for name, value in annotations.items()}
+            )
+
+    def add_prefetch(self, serializer, relation, prefix):
+        child = QueryPlan(relation.related_model)
+        # The prefetch join needs the FK pointing back at the parent
+        if relation.one_to_many:
+            child.only.add(relation.field.name)
+        _Planner(child).add_serializer(serializer, relation.related_model)
+        self.plan.prefetch["__".join(prefix)] = child
+
+
+def get_query_plan(serializer):
+    """Build (and cache per serializer class) the query plan for a serializer instance"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    key = type(serializer)
+    if key not in _plan_cache:
+        model = serializer.Meta.model
+        plan = QueryPlan(model)
+        _Planner(plan).add_serializer(serializer, model)
+        _plan_cache[key] = plan
+    return _plan_cache[key]
+
+
+def optimize_queryset(queryset, serializer, defer=True):
+    """Apply the serializer's query plan to `queryset`"""
+    if not isinstance(getattr(serializer, "child", serializer), serializers.ModelSerializer):
+        return queryset
+    return get_query_plan(serializer).apply(queryset, defer=defer)
@@ -0,0 +1,167 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination on a (timestamp, id) key.
+
+    Rows are fetched with `WHERE (created_at, id) < (:ts, :id) ORDER BY ... LIMIT n + 1`,
+    so the cost of a page does not depend on how deep the client has scrolled
+    and no COUNT(*) is issued. Views pick their key with `pagination_ordering`
+    (default: newest first by `created_at`); the primary key is always added as
+    a tie-breaker.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-created_at',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE or 20
+        self.max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-'), self.get_key_field(queryset, name.lstrip('-')))
+            for name in self.ordering
+        ]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else '-' + name for name in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Going forwards: "more" means a next page, and having a cursor means a previous one.
+        # Going backwards the two are swapped.
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Use the view's OrderingFilter choice when one was requested, else the view's
+        `pagination_ordering`. The primary key is appended so the key is unique.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter) and backend.ordering_param in request.query_params:
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'pagination_ordering', self.ordering)
+        ordering = [name for name in ordering if name.lstrip('-') not in ('id', 'pk')]
+        descending = ordering[0].startswith('-') if ordering else True
+        return [*ordering, '-id' if descending else 'id']
+
+    def get_key_field(self, queryset, name):
+        """Model field or annotation (e.g. a search rank) used to decode cursor values"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def position_filter(self, position, reverse):
+        """Build the lexicographic `(a, b) < (x, y)` comparison as OR-ed Q objects"""
+        condition = Q()
+        for index, (name, descending, _) in enumerate(self.fields):
+            lookup = 'gt' if descending == reverse else 'lt'
+            clause = Q(**{f'{name}__{lookup}': position[index]})
+            for prev_index in range(index):
+                clause &= Q(**{self.fields[prev_index][0]: position[prev_index]})
+            condition |= clause
+        return condition
+
+    # ------------------- Cursor encoding -------------------
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for (_, _, field), value in zip(self.fields, values)]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        values = [self.encode_value(getattr(obj, name)) for name, _, _ in self.fields]
+        payload = json.dumps({'p': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def encode_value(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, (int, float, str)) or value is None:
+            return value
+        return str(value)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
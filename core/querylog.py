@@ -0,0 +1,127 @@
+"""
+Per-request SQL recording.
+
+QueryRecorder hooks `connection.execute_wrapper` and keeps every statement
+with its normalized shape and the project call site that issued it.
+Statements with the same shape repeated within one request are reported as
+likely N+1 patterns (e.g. one `SELECT ... FROM accounts_customuser` per row
+for `owner_name`).
+"""
+import re
+import time
+import traceback
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.dispatch import Signal
+
+# Sent by core.middleware.QueryInspectorMiddleware with `request` and `report`
+query_report = Signal()
+
+TRANSACTION_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK", "BEGIN", "COMMIT")
+
+_IN_LIST = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN lists so repeated per-row queries share one shape"""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+_OWN_FILES = {
+    str(Path(__file__).resolve()),
+    str(Path(__file__).resolve().with_name("middleware.py")),
+}
+
+
+def _call_site():
+    """Innermost stack frame that belongs to the project (not Django, DRF or the recorder)"""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    for frame in reversed(traceback.extract_stack()):
+        filename = str(Path(frame.filename).resolve())
+        if filename in _OWN_FILES or "site-packages" in filename:
+            continue
+        if filename.startswith(str(base_dir)):
+            return f"{Path(filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+class QueryReport:
+    def __init__(self, queries, label=""):
+        self.queries = queries
+        self.label = label
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(query["duration"] for query in self.queries)
+
+    def duplicates(self, threshold=None):
+        """[(shape, times, call sites)] for shapes run at least `threshold` times"""
+        if threshold is None:
+            threshold = getattr(settings, "QUERY_INSPECTOR_NPLUSONE_THRESHOLD", 3)
+        counts = Counter(query["shape"] for query in self.queries)
+        sites = defaultdict(Counter)
+        for query in self.queries:
+            sites[query["shape"]][query["site"]] += 1
+        return [
+            (shape, times, sites[shape].most_common())
+            for shape, times in counts.most_common()
+            if times >= threshold
+        ]
+
+    def format(self, threshold=None):
+        lines = [f"{self.label}: {self.count} queries in {self.duration * 1000:.1f} ms"]
+        for shape, times, sites in self.duplicates(threshold):
+            lines.append(f"  possible N+1, {times}x: {shape[:200]}")
+            for site, site_times in sites:
+                lines.append(f"      {site_times}x at {site}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+class QueryRecorder:
+    """Context manager recording every statement run on the default connection"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+                self.queries.append({
+                    "sql": sql,
+                    "params": params,
+                    "shape": normalize_sql(sql),
+                    "site": _call_site(),
+                    "duration": duration,
+                })
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def report(self, label=""):
+        return QueryReport(list(self.queries), label)
@@ -0,0 +1,142 @@
+"""
+orjson-backed JSON renderer and parser.
+
+Drop-in replacements for DRF's JSONRenderer / JSONParser, selected by the
+API_FAST_JSON setting. orjson encodes strings, numbers, UUIDs and
+containers itself; datetimes, dates and times are passed through to DRF's own
+JSONEncoder.default along with everything orjson can't encode (Decimal, lazy
+translation strings, querysets, ...), so they are formatted exactly as the
+stdlib renderer formats them. orjson writes NaN and infinity as null where
+the stdlib renderer rejects them (or writes them as-is when STRICT_JSON is
+off), so a response containing one is re-rendered by the stdlib renderer.
+Without orjson installed both classes fall back to the stdlib implementation.
+
+NDJSONRenderer / CSVRenderer serve the streaming export endpoints
+(crisis.exports): rows are encoded one at a time as the response is sent.
+"""
+import csv
+import datetime
+import decimal
+import json
+import math
+import re
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_encoder = JSONEncoder()
+
+# a signed number or phone number: "-12.50", "+880 1712-345678", "+1 (555) 010"
+_SIGNED_NUMBER = re.compile(r'[+-][\d .,()-]*\d[\d .,()-]*')
+
+
+def _has_non_finite(value):
+    if isinstance(value, (float, decimal.Decimal)):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            options |= orjson.OPT_INDENT_2  # the only indent orjson supports
+        rendered = orjson.dumps(data, default=_encoder.default, option=options)
+        # NaN/inf come out as null; only look for them when there is a null
+        if b'null' in rendered and _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        return rendered
+
+
+class FastJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+# ------------------- Streaming export formats -------------------
+class _Echo:
+    """csv.writer target that hands back each formatted line instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    One JSON document per line. `stream()` encodes rows lazily for a
+    StreamingHttpResponse; `render()` covers error responses.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return FastJSONRenderer.render(self, data) + b'\n'
+
+    def stream(self, columns, rows):
+        for row in rows:
+            yield self.render(dict(zip(columns, row)))
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Exports are opened in spreadsheets, and some cells hold donor-written
+    text: a string starting like a formula is prefixed with a quote so it is
+    shown, not evaluated. A leading + or - is left alone when the value is
+    just a number (a negative amount, a phone number like +8801...), as OWASP
+    suggests, so those cells keep their value.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    formula_prefixes = ('=', '+', '-', '@', '\t', '\r')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        return b''.join(self.stream(list(data), [list(data.values())]))
+
+    def stream(self, columns, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns).encode()
+        for row in rows:
+            yield writer.writerow([self.cell(value) for value in row]).encode()
+
+    @staticmethod
+    def cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, cls=JSONEncoder)
+        if isinstance(value, str) and value.startswith(CSVRenderer.formula_prefixes):
+            if value[0] in '+-' and _SIGNED_NUMBER.fullmatch(value):
+                return value
+            return "'" + value
+        return value
@@ -0,0 +1,14 @@
+'use strict';
+{
+    // Select2 fires jQuery events only, so listen through django.jQuery
+    django.jQuery(document).on('change', '.autocomplete-filter select', function() {
+        const params = new URLSearchParams(window.location.search);
+        params.delete('p');
+        if (this.value) {
+            params.set(this.name, this.value);
+        } else {
+            params.delete(this.name);
+        }
+        window.location.search = params.toString();
+    });
+}
@@ -0,0 +1,272 @@
+"""
+Delta sync for offline-first field clients.
+
+    GET /api/sync/              -> {"cursor": "1042", "has_more": false, "changes": []}
+    GET /api/sync/?since=1042   -> what changed after that cursor
+
+Every change to a crisis post, post section, update, comment, volunteer
+application or a post's donation totals appends a SyncChange row, from the
+model signals and from the bulk paths that skip them (moderation, the
+admin actions, donation imports). The row id is the cursor: a client keeps
+the last cursor it was given and asks for what happened since.
+
+A page reads at most `page_size` entries along the primary key
+(`WHERE id > :since ORDER BY id LIMIT n + 1`), keeps the last entry per
+object and loads the objects with one query per kind. An object comes back
+with its current data, or as a tombstone when it is gone or not visible to
+the caller (drop it if you have it):
+
+    {"type": "comment", "id": 7, "crisis_post": 3, "deleted": true, "data": null}
+
+While `has_more` is true the client calls again with the new cursor. Anyone
+sees approved posts and everything under them; owners also their pending
+and rejected posts; volunteer applications only reach the applicant, the
+post owner and staff. Entries under other users' pending posts are left out
+of the page altogether, and a post changing status logs its contents again
+(record_post_contents) so the clients that could not see them catch up.
+Donation summaries carry the totals, not the donation lists.
+
+Entries older than SYNC_RETENTION_DAYS are purged (purge_sync_changes);
+a cursor from before the oldest kept entry answers 410 Gone and the client
+downloads afresh, then syncs from the cursor of a bare GET taken before.
+
+Cursors rely on ids being handed out in commit order, which holds on SQLite
+(one writer at a time). Behind concurrent writers a transaction can commit
+an id lower than a cursor already returned.
+"""
+from collections import defaultdict
+
+from django.db.models import CharField, IntegerField, Q, Value
+from rest_framework import permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import SyncChange
+from .optimization import optimize_queryset
+from .pagination import KeysetPagination
+
+CRISIS_POST = "crisis_post"
+POST_SECTION = "post_section"
+CRISIS_UPDATE = "crisis_update"
+COMMENT = "comment"
+VOLUNTEER_APPLICATION = "volunteer_application"
+DONATION_SUMMARY = "donation_summary"  # object_id is the crisis post's
+
+
+# ------------------- Recording -------------------
+def record(kind, object_id, crisis_post_id=None, user_id=None):
+    SyncChange.objects.create(kind=kind, object_id=object_id, crisis_post_id=crisis_post_id, user_id=user_id)
+
+
+def record_many(kind, rows):
+    """One entry per (object_id, crisis_post_id, user_id), for paths that bypass the signals"""
+    SyncChange.objects.bulk_create([
+        SyncChange(kind=kind, object_id=object_id, crisis_post_id=crisis_post_id, user_id=user_id)
+        for object_id, crisis_post_id, user_id in rows
+    ])
+
+
+def record_post_contents(post_ids):
+    """
+    Log everything under these posts again, after a status change: what was
+    written while a post was pending reached other clients as nothing (or as
+    tombstones) and their cursors have moved past it. One SELECT (a UNION of
+    the kinds) and one INSERT.
+    """
+    from crisis.models import PostSection
+    from updates.models import Comment, CrisisUpdate
+    from volunteers.models import VolunteerApplication
+
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+
+    def rows(kind, queryset, crisis_post, user=Value(None, output_field=IntegerField())):
+        return queryset.order_by().values_list(Value(kind, output_field=CharField()), "id", crisis_post, user)
+
+    contents = rows(POST_SECTION, PostSection.objects.filter(post_id__in=post_ids), "post_id").union(
+        rows(CRISIS_UPDATE, CrisisUpdate.objects.filter(crisis_post_id__in=post_ids), "crisis_post_id"),
+        rows(COMMENT, Comment.objects.filter(update__crisis_post_id__in=post_ids), "update__crisis_post_id"),
+        rows(
+            VOLUNTEER_APPLICATION, VolunteerApplication.objects.filter(crisis_post_id__in=post_ids),
+            "crisis_post_id", "user_id",
+        ),
+        all=True,
+    )
+    entries = [
+        SyncChange(kind=kind, object_id=object_id, crisis_post_id=crisis_post_id, user_id=user_id)
+        for kind, object_id, crisis_post_id, user_id in contents
+    ]
+    entries += [SyncChange(kind=DONATION_SUMMARY, object_id=post_id, crisis_post_id=post_id) for post_id in post_ids]
+    SyncChange.objects.bulk_create(entries)
+
+
+def latest_cursor():
+    return SyncChange.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+# ------------------- Visibility -------------------
+def visible_posts(user):
+    from crisis.models import CrisisPost
+
+    if user.is_staff:
+        return CrisisPost.objects.all()
+    if user.is_authenticated:
+        return CrisisPost.objects.filter(Q(status="approved") | Q(owner=user))
+    return CrisisPost.objects.filter(status="approved")
+
+
+def visible_entries(user):
+    """
+    Entries under other users' pending posts and other users' volunteer
+    applications are left out in SQL, so their ids never leak and a page is
+    not spent on tombstones.
+    """
+    from crisis.models import CrisisPost
+
+    entries = SyncChange.objects.all()
+    if user.is_staff:
+        return entries
+    pending = CrisisPost.objects.filter(status="pending")
+    if not user.is_authenticated:
+        return entries.exclude(kind=VOLUNTEER_APPLICATION).exclude(crisis_post_id__in=pending.values("id"))
+    return entries.filter(
+        ~Q(kind=VOLUNTEER_APPLICATION)
+        | Q(user_id=user.id)
+        | Q(crisis_post_id__in=CrisisPost.objects.filter(owner=user).values("id"))
+    ).exclude(crisis_post_id__in=pending.exclude(owner=user).values("id"))
+
+
+# ------------------- Loading -------------------
+def _serialize(queryset, serializer_class, extra=None):
+    """{pk: data} for the rows of `queryset` that exist, in one query (plus the serializer's prefetches)"""
+    objects = list(optimize_queryset(queryset, serializer_class(many=True), defer=False))
+    data = serializer_class(objects, many=True).data
+    return {obj.pk: {**item, **extra(obj)} if extra else item for obj, item in zip(objects, data)}
+
+
+def load_posts(ids, user):
+    from crisis.serializers import CrisisPostSerializer
+
+    return _serialize(visible_posts(user).filter(id__in=ids), CrisisPostSerializer)
+
+
+def load_sections(ids, user):
+    from crisis.models import PostSection
+    from crisis.serializers import PostSectionSerializer
+
+    return _serialize(PostSection.objects.filter(id__in=ids, post__in=visible_posts(user)), PostSectionSerializer)
+
+
+def load_updates(ids, user):
+    from updates.models import CrisisUpdate
+    from updates.serializers import CrisisUpdateListSerializer
+
+    return _serialize(
+        CrisisUpdate.objects.filter(id__in=ids, crisis_post__in=visible_posts(user)), CrisisUpdateListSerializer
+    )
+
+
+def load_comments(ids, user):
+    from updates.models import Comment
+    from updates.serializers import CommentSerializer
+
+    return _serialize(
+        Comment.objects.filter(id__in=ids, update__crisis_post__in=visible_posts(user)), CommentSerializer,
+        extra=lambda comment: {"update": comment.update_id},
+    )
+
+
+def load_applications(ids, user):
+    from volunteers.models import VolunteerApplication
+    from volunteers.serializers import VolunteerApplicationSerializer
+
+    applications = VolunteerApplication.objects.filter(id__in=ids)
+    if not user.is_staff:
+        applications = applications.filter(Q(user=user) | Q(crisis_post__owner=user))
+    return _serialize(applications, VolunteerApplicationSerializer)
+
+
+def load_donation_summaries(ids, user):
+    """The totals of the post's donation summary (see donations.views.CrisisDonationSummaryView)"""
+    from crisis.stats import get_stats
+
+    summaries = {}
+    for post in visible_posts(user).filter(id__in=ids).select_related("stats"):
+        stats = get_stats(post)
+        summaries[post.id] = {
+            "crisis_id": post.id,
+            "total_money": float(stats.total_money),
+            "total_donors_money": stats.total_donors_money,
+            "total_goods_donations": stats.total_goods_donations,
+            "funding_goal": float(post.funding_goal) if post.funding_goal is not None else None,
+            "funding_progress": stats.funding_progress,
+        }
+    return summaries
+
+
+LOADERS = {
+    CRISIS_POST: load_posts,
+    POST_SECTION: load_sections,
+    CRISIS_UPDATE: load_updates,
+    COMMENT: load_comments,
+    VOLUNTEER_APPLICATION: load_applications,
+    DONATION_SUMMARY: load_donation_summaries,
+}
+
+
+class SyncView(APIView):
+    """
+    GET ?since=<cursor>[&page_size=n]: the caller's changes after `since`.
+    Without `since`: the current cursor, to sync from after a full download.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"cursor": str(latest_cursor()), "has_more": False, "changes": []})
+        if not since.isdigit():
+            raise ValidationError({"since": "Expected a cursor returned by /api/sync/."})
+        since = int(since)
+
+        oldest = SyncChange.objects.order_by("id").values_list("id", flat=True).first()
+        if oldest is not None and since < oldest - 1:
+            return Response(
+                {"detail": "This cursor is older than the change log; download afresh."},
+                status=status.HTTP_410_GONE,
+            )
+
+        page_size = KeysetPagination().get_page_size(request)
+        entries = list(visible_entries(request.user).filter(id__gt=since).order_by("id")[:page_size + 1])
+        has_more = len(entries) > page_size
+        entries = entries[:page_size]
+
+        # The last entry per object wins, in the order of those last entries
+        latest = {}
+        for entry in entries:
+            latest.pop((entry.kind, entry.object_id), None)
+            latest[(entry.kind, entry.object_id)] = entry
+        ids = defaultdict(list)
+        for kind, object_id in latest:
+            ids[kind].append(object_id)
+        found = {kind: LOADERS[kind](object_ids, request.user) for kind, object_ids in ids.items() if kind in LOADERS}
+
+        changes = []
+        for (kind, object_id), entry in latest.items():
+            if kind not in LOADERS:
+                continue
+            data = found[kind].get(object_id)
+            changes.append({
+                "type": kind,
+                "id": object_id,
+                "crisis_post": entry.crisis_post_id,
+                "deleted": data is None,
+                "data": data,
+            })
+        return Response({
+            "cursor": str(entries[-1].id if entries else since),
+            "has_more": has_more,
+            "changes": changes,
+        })
@@ -0,0 +1,26 @@
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+
+from core.admin_tools import indexed_changelist
+
+register = template.Library()
+
+
+def indexed_date_hierarchy(cl):
+    if cl.query:
+        # A search scans anyway, and each index seek would repeat that scan
+        return date_hierarchy(cl)
+    return date_hierarchy(indexed_changelist(cl))
+
+
+@register.tag(name="indexed_date_hierarchy")
+def indexed_date_hierarchy_tag(parser, token):
+    """{% date_hierarchy cl %} with the year / month / day choices read from the index"""
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=indexed_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
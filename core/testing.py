@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from .querylog import query_report
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin enforcing per-endpoint query budgets.
+
+        class CrisisPostTests(QueryBudgetMixin, APITestCase):
+            query_budgets = {"crisispost-list": 3, "POST crisispost-list": 8}
+
+    Budgets are keyed by URL name (GET/HEAD requests) or "METHOD url_name",
+    and count every statement except transaction control. A request going over budget raises
+    QueryBudgetExceeded from the client call, with the repeated query shapes
+    and their call sites in the message. The mixin switches
+    settings.QUERY_INSPECTOR on for its class, so budgets are enforced
+    whatever the environment says.
+    """
+    query_budgets = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if "core.middleware.QueryInspectorMiddleware" not in settings.MIDDLEWARE:
+            raise ImproperlyConfigured("QueryBudgetMixin needs core.middleware.QueryInspectorMiddleware in MIDDLEWARE.")
+        cls.enterClassContext(override_settings(QUERY_INSPECTOR=True))
+        query_report.connect(cls._check_query_budget, weak=False, dispatch_uid=cls._budget_uid())
+
+    @classmethod
+    def tearDownClass(cls):
+        query_report.disconnect(dispatch_uid=cls._budget_uid())
+        super().tearDownClass()
+
+    @classmethod
+    def _budget_uid(cls):
+        return f"query-budget-{cls.__module__}.{cls.__qualname__}"
+
+    @classmethod
+    def _check_query_budget(cls, sender, request, report, **kwargs):
+        match = getattr(request, "resolver_match", None)
+        if not match:
+            return
+        budget = cls.query_budgets.get(f"{request.method} {match.url_name}")
+        if budget is None and request.method in ("GET", "HEAD"):
+            budget = cls.query_budgets.get(match.url_name)
+        if budget is not None and report.count > budget:
+            raise QueryBudgetExceeded(
+                f"{request.method} {request.get_full_path()} ran {report.count} queries "
+                f"(budget {budget})\n{report.format(threshold=2)}"
+            )
+
+
+def explain_query_plan(sql, params=()):
+    """EXPLAIN QUERY PLAN detail lines for a statement (SQLite)"""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class ExplainPlanMixin:
+    """
+    TestCase helpers asserting that an endpoint's main query is served from an index:
+    no `SCAN <table>` without an index and no temporary B-tree for ORDER BY.
+    """
+
+    def main_query(self, url, table, data=None):
+        """Run a GET and return (sql, params) of the first statement reading `table`"""
+        from .querylog import QueryRecorder
+
+        with QueryRecorder() as recorder:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        for query in recorder.queries:
+            if f'FROM "{table}"' in query["sql"]:
+                return query["sql"], query["params"]
+        self.fail(f"GET {url} issued no query on {table}")
+
+    def assertIndexedPlan(self, url, table, data=None):
+        sql, params = self.main_query(url, table, data)
+        return self._assert_indexed(sql, params, f"GET {url}")
+
+    def assertIndexedQuerySet(self, queryset):
+        """Same check for a queryset built outside a view (workers, commands, lookups)"""
+        sql, params = queryset.query.sql_with_params()
+        return self._assert_indexed(sql, params, "Query")
+
+    def _assert_indexed(self, sql, params, label):
+        plan = explain_query_plan(sql, params)
+        problems = [
+            line for line in plan
+            if (line.startswith("SCAN ") and " USING " not in line) or "TEMP B-TREE" in line
+        ]
+        self.assertFalse(problems, f"{label} query plan regressed:\n  " + "\n  ".join(plan) + f"\n{sql}")
+        return plan
@@ -1,3 +1,486 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import InMemoryStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from core import image_pipeline
+from core.renderers import CSVRenderer, FastJSONRenderer
+from core.testing import ExplainPlanMixin
+from core.models import SyncChange
+from crisis.models import CrisisPost, PostSection
+from crisis.moderation_queue import moderate_posts
+from donations.models import DonationMoney, DonationGoods
+from volunteers.models import VolunteerApplication
+from updates.models import CrisisUpdate, Comment
+
+User = get_user_model()
+
+
+class QueryPlanTests(ExplainPlanMixin, APITestCase):
+    """Each endpoint's main query must stay on an index (see the Meta.indexes of each model)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", email="p@test.com", password="pass123")
+        self.post = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.user, status="approved"
+        )
+        DonationMoney.objects.create(crisis_post=self.post, donor=self.user, amount=10)
+        DonationGoods.objects.create(crisis_post=self.post, donor=self.user, item_description="rice")
+        VolunteerApplication.objects.create(crisis_post=self.post, user=self.user)
+        self.update = CrisisUpdate.objects.create(
+            crisis_post=self.post, created_by=self.user, title="Day 1", description="..."
+        )
+        Comment.objects.create(update=self.update, user=self.user, text="ok")
+
+    def test_crisis_feed(self):
+        self.assertIndexedPlan(reverse("crisispost-list"), "crisis_crisispost")
+        self.assertIndexedPlan(reverse("crisispost-list"), "crisis_crisispost", {"post_type": "district"})
+
+    def test_my_posts(self):
+        self.client.force_authenticate(self.user)
+        self.assertIndexedPlan(reverse("crisispost-my-posts"), "crisis_crisispost")
+
+    def test_crisis_donations(self):
+        kwargs = {"crisis_id": self.post.id}
+        self.assertIndexedPlan(reverse("crisis_money_donations", kwargs=kwargs), "donations_donationmoney")
+        self.assertIndexedPlan(reverse("crisis_goods_donations", kwargs=kwargs), "donations_donationgoods")
+        self.assertIndexedPlan(reverse("crisis_inventory", kwargs=kwargs), "donations_inventorytotal")
+
+    def test_transaction_id_lookups(self):
+        # Retry fast path (CreateMoneyDonationView) and duplicate check (donations.ingest)
+        lookup = DonationMoney.objects.filter(payment_method="bkash", transaction_id="TX1", transaction_id__gt="")
+        self.assertIndexedQuerySet(lookup.order_by())
+        batch = DonationMoney.objects.filter(
+            payment_method__in=["bkash", "nagad"], transaction_id__in=["TX1", "TX2"], transaction_id__gt=""
+        )
+        self.assertIndexedQuerySet(batch.order_by().values_list("payment_method", "transaction_id"))
+
+    def test_sync_change_lookups(self):
+        # core.sync.visible_entries subqueries and the purge_sync_changes cutoff
+        self.assertIndexedQuerySet(SyncChange.objects.filter(crisis_post_id__in=[self.post.id]).values_list("id"))
+        self.assertIndexedQuerySet(SyncChange.objects.filter(kind="volunteer_application", user_id=self.user.id))
+        self.assertIndexedQuerySet(SyncChange.objects.filter(changed_at__gte=timezone.now()).values_list("id"))
+
+    def test_crisis_volunteers(self):
+        self.client.force_authenticate(self.user)
+        self.assertIndexedPlan(
+            reverse("crisis_volunteers", kwargs={"crisis_id": self.post.id}), "volunteers_volunteerapplication"
+        )
+        self.assertIndexedPlan(reverse("my_volunteer_applications"), "volunteers_volunteerapplication")
+
+    def test_updates_and_comments(self):
+        self.assertIndexedPlan(
+            reverse("crisis_updates_list", kwargs={"crisis_id": self.post.id}), "updates_crisisupdate"
+        )
+        self.assertIndexedPlan(
+            reverse("update_comments_list", kwargs={"update_id": self.update.id}), "updates_comment"
+        )
+        self.client.force_authenticate(self.user)
+        self.assertIndexedPlan(reverse("my_updates"), "updates_crisisupdate")
+        self.assertIndexedPlan(reverse("my_comments"), "updates_comment")
+
+
+def make_jpeg(width=800, height=600):
+    """A JPEG with an EXIF orientation tag and a camera model, like a phone photo"""
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90° clockwise
+    exif[0x0110] = "Pixel 7"
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+class ImagePipelineTests(APITestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_WORKERS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username="photographer", email="ph@test.com", password="pass123")
+
+    def create_post(self, **kwargs):
+        return CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.user, status="approved", **kwargs
+        )
+
+    def test_upload_renders_variants_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = self.create_post(banner_image=make_jpeg())
+        post.refresh_from_db()
+
+        variants = post.banner_image_variants
+        self.assertEqual(variants["source"], post.banner_image.name)
+        # EXIF orientation applied: 800x600 stored sideways is a 600x800 portrait
+        self.assertEqual((variants["width"], variants["height"]), (600, 800))
+        self.assertEqual(sorted(variants["webp"], key=int), ["320", "600"])
+        self.assertTrue(variants["placeholder"].startswith("data:image/jpeg;base64,"))
+
+        with Image.open(os.path.join(self.media_root, variants["jpeg"]["320"])) as image:
+            self.assertEqual(image.size, (320, 427))
+            self.assertFalse(image.getexif())
+        with Image.open(post.banner_image.path) as original:
+            self.assertFalse(original.getexif())
+
+        data = self.client.get(reverse("crisispost-detail", kwargs={"pk": post.id})).json()
+        srcset = data["banner_image_variants"]["srcset"]
+        self.assertIn("320w.webp 320w", srcset["webp"])
+        self.assertTrue(data["banner_image_variants"]["src"].endswith("600w.jpg"))
+
+    def test_replacing_image_resets_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = self.create_post(banner_image=make_jpeg())
+        post.refresh_from_db()
+        old_file = os.path.join(self.media_root, post.banner_image_variants["webp"]["320"])
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            post.banner_image = make_jpeg(width=400, height=300)
+            post.save()
+        self.assertEqual(post.banner_image_variants, {})
+        for callback in callbacks:
+            callback()
+
+        post.refresh_from_db()
+        self.assertEqual(sorted(post.banner_image_variants["jpeg"], key=int), ["300"])
+        self.assertFalse(os.path.exists(old_file))
+
+    def test_pool_spawns_and_needs_local_files(self):
+        with override_settings(IMAGE_WORKERS=1), patch.object(image_pipeline, "_pool", None):
+            pool = image_pipeline.get_pool()
+            self.addCleanup(pool.shutdown)
+            self.assertEqual(pool._mp_context.get_start_method(), "spawn")
+
+        field = CrisisPost._meta.get_field("banner_image")
+        with patch.object(field, "storage", InMemoryStorage()):
+            with self.assertRaises(ImproperlyConfigured):
+                image_pipeline.register_image_fields(CrisisPost, "banner_image")
+
+    def test_backfill_command(self):
+        post = self.create_post(banner_image=make_jpeg())  # on_commit never fires inside the test
+        self.assertEqual(CrisisPost.objects.get(pk=post.pk).banner_image_variants, {})
+
+        call_command("backfill_image_variants", workers=1, stdout=StringIO())
+
+        self.assertEqual(CrisisPost.objects.get(pk=post.pk).banner_image_variants["source"], post.banner_image.name)
+
+
+class LeanAPIMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="tok", email="tok@test.com", password="pass123")
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse("user_profile")
+
+    def test_token_api_requests_skip_browser_middleware(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Frame-Options", response)
+        self.assertFalse(response.cookies)
+        self.assertFalse(hasattr(response.wsgi_request, "allauth"))  # AccountMiddleware bypassed
+
+    def test_other_requests_keep_full_stack(self):
+        self.client.login(username="tok", password="pass123")
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+        self.assertTrue(hasattr(response.wsgi_request, "allauth"))
+        self.assertIn("X-Frame-Options", self.client.get("/admin/login/"))
+
+        with self.settings(LEAN_API_MIDDLEWARE=False):
+            response = self.client.get(self.url, HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.assertIn("X-Frame-Options", response)
+
+    def test_token_logout_without_session(self):
+        response = self.client.post(reverse("rest_logout"), HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_middleware", requests=5, stdout=out)
+        self.assertIn("lean stack", out.getvalue())
+
+
+class FastJSONTests(APITestCase):
+
+    def test_renders_like_stock_renderer(self):
+        data = {
+            "amount": Decimal("12.50"),
+            "at": timezone.make_aware(datetime(2024, 7, 1, 9, 30)),
+            "last_donated_at": timezone.make_aware(datetime(2024, 7, 1, 9, 30, 15, 123456)),
+            "naive": datetime(2024, 7, 1, 9, 30, 15, 999),
+            "day": datetime(2024, 7, 1).date(),
+            "label": gettext_lazy("Approved"),
+            "id": uuid.UUID(int=1),
+            "stats": [{"total": 1.5, "count": 3, "note": "ত্রাণ"}],
+            "1": None,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_non_finite_floats_match_stock_renderer(self):
+        data = {"ratio": float("nan"), "missing": None}
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+        with self.assertRaises(ValueError):
+            FastJSONRenderer().render(data)
+
+        # STRICT_JSON = False
+        lax_fast = type("LaxFastJSONRenderer", (FastJSONRenderer,), {"strict": False})
+        lax_stock = type("LaxJSONRenderer", (JSONRenderer,), {"strict": False})
+        self.assertEqual(lax_fast().render(data), lax_stock().render(data))
+
+    def test_api_uses_fast_renderer_and_parser(self):
+        response = self.client.get(reverse("crisispost-list"), HTTP_ACCEPT="application/json")
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+
+        response = self.client.post(reverse("register"), data="{not json", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.data["detail"])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_json", sizes=[10], repeat=1, stdout=out)
+        self.assertIn("10 rows", out.getvalue())
+
+
+class CSVRendererTests(APITestCase):
+
+    def test_csv_escapes_formulas_but_not_signed_numbers(self):
+        for value in ("-12.50", "+8801712345678", "+880 1712-345678", "-1,200"):
+            self.assertEqual(CSVRenderer.cell(value), value)
+        for value in ("-TX9", "+SUM(A1)", "-2+3", "=1+1", "@SUM(A1)", "\t-1", "\r5", "-", "+1 cmd|' /C calc'!A0"):
+            self.assertEqual(CSVRenderer.cell(value), "'" + value)
+
+
+class BatchAPITests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="field", email="field@test.com", password="pass123")
+        self.token = Token.objects.create(user=self.user)
+        self.posts = [
+            CrisisPost.objects.create(title=title, description="...", post_type="district", owner=self.user, status="approved")
+            for title in ("Flood", "Fire", "Storm")
+        ]
+        self.hidden = CrisisPost.objects.create(title="Pending", description="...", post_type="district", owner=self.user)
+        self.post = self.posts[0]
+
+    def batch(self, *requests, **headers):
+        response = self.client.post(reverse("api_batch"), {"requests": list(requests)}, format="json", **headers)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return json.loads(response.content)["responses"]
+
+    def test_runs_reads_in_one_round_trip(self):
+        summary = reverse("crisis_donation_summary", kwargs={"crisis_id": self.post.id})
+        results = self.batch(
+            reverse("crisispost-detail", args=[self.post.id]),
+            summary,
+            reverse("crisis_updates_list", kwargs={"crisis_id": self.post.id}),
+            "/api/crisis/999999/",
+            "/api/nowhere/",
+        )
+        self.assertEqual([result["status"] for result in results], [200, 200, 200, 404, 404])
+        self.assertEqual(results[0]["body"]["title"], "Flood")
+        self.assertEqual(results[1]["body"], json.loads(self.client.get(summary).content))
+        self.assertIn("etag", results[0])
+
+        # A known ETag comes back as 304 with no body
+        again = self.batch({"url": summary, "etag": results[1]["etag"]})
+        self.assertEqual((again[0]["status"], again[0]["body"]), (304, None))
+
+    def test_subrequests_use_the_callers_authentication(self):
+        url = reverse("my_volunteer_applications")
+        self.assertEqual(self.batch(url)[0]["status"], 401)
+        result = self.batch(url, HTTP_AUTHORIZATION=f"Token {self.token.key}")[0]
+        self.assertEqual(result["status"], 200)
+
+    def test_rejects_bad_batches(self):
+        url = reverse("api_batch")
+        for requests in ([], ["https://evil.example/api/crisis/"], ["/admin/"], [{"url": 5}]):
+            response = self.client.post(url, {"requests": requests}, format="json")
+            self.assertEqual(response.status_code, 400, requests)
+        with self.settings(API_BATCH_MAX_REQUESTS=2):
+            response = self.client.post(url, {"requests": ["/api/crisis/"] * 3}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.batch(url)[0]["status"], 400)  # no nesting
+
+    def test_posts_by_ids(self):
+        url = reverse("crisispost-list")
+        ids = f"{self.posts[2].id},{self.post.id},{self.hidden.id}"
+        response = self.client.get(url, {"ids": ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post["title"] for post in response.data], ["Storm", "Flood"])
+        self.assertEqual(self.client.get(url, {"ids": "1,x"}).status_code, 400)
+        self.assertEqual(self.batch(f"{url}?ids={ids}")[0]["body"][0]["title"], "Storm")
+
+
+class SyncAPITests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", email="owner@test.com", password="pass123")
+        self.field = User.objects.create_user(username="field", email="field@test.com", password="pass123")
+        self.staff = User.objects.create_user(username="staff", email="staff@test.com", password="pass123", is_staff=True)
+        self.post = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.owner, status="approved"
+        )
+        self.cursor = self.sync()["cursor"]
+
+    def sync(self, since=None, user=None, expected=200, **params):
+        self.client.force_authenticate(user)
+        if since is not None:
+            params["since"] = since
+        response = self.client.get(reverse("api_sync"), params)
+        self.assertEqual(response.status_code, expected, response.content[:300])
+        return response.data
+
+    def changes(self, data):
+        return {(change["type"], change["id"]): change for change in data["changes"]}
+
+    def test_returns_the_latest_state_of_each_changed_object(self):
+        section = PostSection.objects.create(post=self.post, section_type="shelter", content="School")
+        update = CrisisUpdate.objects.create(crisis_post=self.post, created_by=self.owner, title="Day 1", description="...")
+        comment = Comment.objects.create(update=update, user=self.field, text="On my way")
+        comment.text = "Arrived"
+        comment.save()
+        DonationMoney.objects.create(crisis_post=self.post, donor=self.field, amount=Decimal("250"))
+
+        data = self.sync(self.cursor)
+        changes = self.changes(data)
+        self.assertEqual(set(changes), {
+            ("post_section", section.id), ("crisis_update", update.id),
+            ("comment", comment.id), ("donation_summary", self.post.id),
+        })
+        self.assertEqual(len(data["changes"]), 4)  # the two comment entries are folded into one
+        self.assertEqual(changes[("comment", comment.id)]["data"]["text"], "Arrived")
+        self.assertEqual(changes[("comment", comment.id)]["data"]["update"], update.id)
+        self.assertEqual(changes[("comment", comment.id)]["crisis_post"], self.post.id)
+        self.assertEqual(changes[("donation_summary", self.post.id)]["data"]["total_money"], 250.0)
+        self.assertFalse(data["has_more"])
+
+        # Nothing new: same cursor, no changes
+        again = self.sync(data["cursor"])
+        self.assertEqual((again["cursor"], again["changes"]), (data["cursor"], []))
+
+    def test_deletions_come_back_as_tombstones(self):
+        update = CrisisUpdate.objects.create(crisis_post=self.post, created_by=self.owner, title="Day 1", description="...")
+        comment = Comment.objects.create(update=update, user=self.field, text="On my way")
+        update_id, comment_id = update.id, comment.id
+        cursor = self.sync()["cursor"]
+        update.delete()
+
+        changes = self.changes(self.sync(cursor))
+        self.assertEqual(set(changes), {("crisis_update", update_id), ("comment", comment_id)})
+        for change in changes.values():
+            self.assertEqual((change["deleted"], change["data"], change["crisis_post"]), (True, None, self.post.id))
+
+    def test_only_shows_what_the_caller_may_see(self):
+        pending = CrisisPost.objects.create(title="Fire", description="...", post_type="district", owner=self.owner)
+        application = VolunteerApplication.objects.create(crisis_post=self.post, user=self.field)
+
+        anonymous = self.changes(self.sync(self.cursor))
+        self.assertNotIn(("crisis_post", pending.id), anonymous)  # not even as a tombstone
+        self.assertNotIn(("volunteer_application", application.id), anonymous)
+
+        owner = self.changes(self.sync(self.cursor, user=self.owner))
+        self.assertEqual(owner[("crisis_post", pending.id)]["data"]["status"], "pending")
+        self.assertEqual(owner[("volunteer_application", application.id)]["data"]["user_id"], self.field.id)
+
+        applicant = self.changes(self.sync(self.cursor, user=self.field))
+        self.assertFalse(applicant[("volunteer_application", application.id)]["deleted"])
+
+        # Approval goes through the bulk UPDATE, which sends no post_save
+        cursor = self.sync()["cursor"]
+        moderate_posts([pending.id], "approved", self.staff)
+        approved = self.changes(self.sync(cursor))
+        self.assertEqual(approved[("crisis_post", pending.id)]["data"]["status"], "approved")
+
+    def test_contents_written_while_pending_arrive_on_approval(self):
+        pending = CrisisPost.objects.create(title="Fire", description="...", post_type="district", owner=self.owner)
+        update = CrisisUpdate.objects.create(crisis_post=pending, created_by=self.owner, title="Day 1", description="...")
+        comments = [Comment.objects.create(update=update, user=self.owner, text=str(index)) for index in range(5)]
+
+        # Hidden in SQL: none of them takes up the page or shows its id
+        data = self.sync(self.cursor, page_size=2)
+        self.assertEqual((data["changes"], data["has_more"]), ([], False))
+
+        moderate_posts([pending.id], "approved", self.staff)
+        changes = self.changes(self.sync(data["cursor"], page_size=50))
+        self.assertEqual(changes[("crisis_update", update.id)]["data"]["title"], "Day 1")
+        for comment in comments:
+            self.assertFalse(changes[("comment", comment.id)]["deleted"])
+        self.assertIn(("donation_summary", pending.id), changes)
+
+        # Rejecting through save() takes them back
+        cursor = self.sync()["cursor"]
+        pending.status = "rejected"
+        pending.save()
+        changes = self.changes(self.sync(cursor))
+        self.assertTrue(changes[("crisis_update", update.id)]["deleted"])
+        self.assertTrue(changes[("crisis_post", pending.id)]["deleted"])
+
+    def test_bulk_volunteer_moderation_is_logged(self):
+        application = VolunteerApplication.objects.create(crisis_post=self.post, user=self.field)
+        cursor = self.sync()["cursor"]
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(reverse("bulk_approve_volunteers"), {"ids": [application.id]}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        changes = self.changes(self.sync(cursor, user=self.field))
+        self.assertEqual(changes[("volunteer_application", application.id)]["data"]["status"], "approved")
+
+    def test_pages_are_bounded(self):
+        update = CrisisUpdate.objects.create(crisis_post=self.post, created_by=self.owner, title="Day 1", description="...")
+        comments = [Comment.objects.create(update=update, user=self.field, text=str(index)) for index in range(5)]
+
+        seen, cursor, pages = [], self.cursor, 0
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.sync(cursor, page_size=2)
+            # oldest entry, the page of entries, then one query per kind on the page
+            selects = [
+                query for query in queries
+                if query["sql"].startswith("SELECT") and "django_session" not in query["sql"]
+            ]
+            self.assertEqual(len(selects), 2 + len({change["type"] for change in data["changes"]}))
+            self.assertLessEqual(len(data["changes"]), 2)
+            seen += [change["id"] for change in data["changes"] if change["type"] == "comment"]
+            cursor, pages = data["cursor"], pages + 1
+            if not data["has_more"]:
+                break
+        self.assertEqual(seen, [comment.id for comment in comments])
+        self.assertEqual(pages, 3)
+
+    def test_purged_cursors_are_gone(self):
+        update = CrisisUpdate.objects.create(crisis_post=self.post, created_by=self.owner, title="Day 1", description="...")
+        Comment.objects.create(update=update, user=self.field, text="On my way")
+        SyncChange.objects.update(changed_at=timezone.now() - timedelta(days=60))
+        call_command("purge_sync_changes", stdout=StringIO())
+
+        self.assertEqual(SyncChange.objects.count(), 1)  # the newest entry is kept
+        self.sync(self.cursor, expected=410)
+        latest = self.sync()["cursor"]
+        self.assertEqual(self.sync(latest)["changes"], [])
@@ -1,11 +1,14 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import CrisisPost, PostSection
+from core.admin_tools import AutocompleteFilter
+from .models import CrisisPost, PostSection, CrisisStats, ModerationQueueEntry
+from .moderation_queue import moderate_posts
 
 @admin.register(CrisisPost)
 class CrisisPostAdmin(admin.ModelAdmin):
     list_display = ("title", "post_type", "owner", "colored_status", "location", "created_at")
     list_filter = ("post_type", "status", "created_at")
+    list_select_related = ("owner",)
     search_fields = ("title", "description", "owner__username", "location")
     readonly_fields = ("created_at", "updated_at")
     list_per_page = 20
@@ -28,19 +31,42 @@ class CrisisPostAdmin(admin.ModelAdmin):
     actions = ['approve_posts', 'reject_posts']
     
     def approve_posts(self, request, queryset):
-        updated = queryset.update(status='approved')
-        self.message_user(request, f'{updated} post(s) approved successfully.')
+        _, changed = moderate_posts(list(queryset.values_list('id', flat=True)), 'approved', request.user)
+        self.message_user(request, f'{len(changed)} post(s) approved successfully.')
     approve_posts.short_description = 'Approve selected posts'
     
     def reject_posts(self, request, queryset):
-        updated = queryset.update(status='rejected')
-        self.message_user(request, f'{updated} post(s) rejected.')
+        _, changed = moderate_posts(list(queryset.values_list('id', flat=True)), 'rejected', request.user)
+        self.message_user(request, f'{len(changed)} post(s) rejected.')
     reject_posts.short_description = 'Reject selected posts'
 
 
 @admin.register(PostSection)
 class PostSectionAdmin(admin.ModelAdmin):
     list_display = ("post", "section_type", "creator_name", "created_at")
-    list_filter = ("section_type", "created_at")
+    list_filter = ("section_type", "created_at", ("post", AutocompleteFilter))
+    list_select_related = ("post", "created_by")
     search_fields = ("post__title", "content", "created_by__username")
-    readonly_fields = ("created_at",)
\ No newline at end of file
+    readonly_fields = ("created_at",)
+
+
+@admin.register(CrisisStats)
+class CrisisStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "crisis_post", "total_money", "total_donors_money", "total_goods_donations",
+        "approved_volunteers", "pending_volunteers", "total_updates", "total_comments", "updated_at"
+    )
+    list_select_related = ("crisis_post",)
+    search_fields = ("crisis_post__title",)
+    readonly_fields = [f.name for f in CrisisStats._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+
+@admin.register(ModerationQueueEntry)
+class ModerationQueueEntryAdmin(admin.ModelAdmin):
+    list_display = ("post", "priority", "sort_key", "duplicate_of", "claimed_by", "lease_expires_at")
+    list_select_related = ("post", "claimed_by")
+    readonly_fields = ("post", "priority", "reasons", "duplicate_of", "sort_key", "claimed_by", "lease_expires_at", "updated_at")
@@ -0,0 +1,86 @@
+"""
+Streaming per-crisis exports (NDJSON by default, CSV with `?format=csv`).
+
+Subclasses of CrisisExportView declare the columns, a queryset for the
+crisis and how to turn one object into a row. Rows are read with
+`.iterator(chunk_size=EXPORT_CHUNK_SIZE)` and encoded one at a time into a
+StreamingHttpResponse, so memory stays flat however large the ledger is.
+
+Only the crisis owner and staff may export. `since` / `until` (ISO date or
+datetime, `until` inclusive of the whole day for plain dates) filter on the
+view's `date_field`.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+
+from core.renderers import CSVRenderer, NDJSONRenderer
+
+from .models import CrisisPost
+from .permissions import IsCrisisOwnerOrStaff
+
+
+class CrisisExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsCrisisOwnerOrStaff]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    columns = ()
+    date_field = None
+    export_name = None
+
+    def get_queryset(self, crisis_post):
+        raise NotImplementedError
+
+    def get_row(self, obj):
+        raise NotImplementedError
+
+    def get(self, request, crisis_id):
+        crisis_post = get_object_or_404(CrisisPost.objects.only("id", "owner_id"), id=crisis_id)
+        self.check_object_permissions(request, crisis_post)
+
+        queryset = self.filter_dates(self.get_queryset(crisis_post)).order_by(self.date_field, "id")
+        rows = (self.get_row(obj) for obj in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(self.columns, rows),
+            content_type=f"{renderer.media_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="crisis-{crisis_id}-{self.export_name}.{renderer.format}"'
+        )
+        return response
+
+    def filter_dates(self, queryset):
+        since = self.parse_bound("since")
+        until = self.parse_bound("until", end_of_day=True)
+        if since:
+            queryset = queryset.filter(**{f"{self.date_field}__gte": since})
+        if until:
+            queryset = queryset.filter(**{f"{self.date_field}__lt": until})
+        return queryset
+
+    def parse_bound(self, param, end_of_day=False):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+            moment = None if day else parse_datetime(value)
+        except ValueError:
+            day = moment = None
+        if day is not None:
+            moment = datetime.combine(day + timedelta(days=1) if end_of_day else day, time.min)
+        elif moment is None:
+            raise ValidationError({param: "Use an ISO date (2024-07-01) or datetime."})
+        elif end_of_day:
+            moment += timedelta(microseconds=1)  # `until` is inclusive
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from crisis.models import CrisisPost
+from crisis.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized CrisisStats counters from the donation, volunteer and update tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of crisis posts recomputed per transaction (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        last_id = 0
+        total = 0
+
+        while True:
+            ids = list(
+                CrisisPost.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                total += rebuild_stats(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'  rebuilt {total} post(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt stats for {total} crisis post(s).'))
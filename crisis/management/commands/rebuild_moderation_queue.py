@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from crisis.models import CrisisPost, ModerationQueueEntry
+from crisis.moderation_queue import refresh_posts
+
+
+class Command(BaseCommand):
+    help = 'Rescore every pending crisis post in the moderation queue and drop entries of moderated posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of pending posts rescored per transaction (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        ModerationQueueEntry.objects.exclude(post__status='pending').delete()
+        last_id = 0
+        total = 0
+
+        while True:
+            posts = list(CrisisPost.objects.filter(status='pending', id__gt=last_id).order_by('id')[:chunk_size])
+            if not posts:
+                break
+            with transaction.atomic():
+                total += refresh_posts(posts)
+            last_id = posts[-1].id
+            self.stdout.write(f'  queued {total} post(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt the moderation queue with {total} pending post(s).'))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0002_alter_crisispost_options_crisispost_location_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrisisStats',
+            fields=[
+                ('crisis_post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='crisis.crisispost')),
+                ('total_money', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_donors_money', models.PositiveIntegerField(default=0)),
+                ('total_goods_donations', models.PositiveIntegerField(default=0)),
+                ('approved_volunteers', models.PositiveIntegerField(default=0)),
+                ('pending_volunteers', models.PositiveIntegerField(default=0)),
+                ('total_updates', models.PositiveIntegerField(default=0)),
+                ('total_comments', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Crisis Stats',
+                'verbose_name_plural': 'Crisis Stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='crisispost',
+            name='funding_goal',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+    ]
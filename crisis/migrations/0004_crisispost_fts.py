@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# Frozen copies of crisis.search as of this migration; later edits there must not change it
+FTS_TABLE = "crisis_crisispost_fts"
+FTS_COLUMNS = ("title", "location", "description", "post_type")
+# unicode61 keeping Bengali vowel signs, virama and other combining marks inside words
+BANGLA_MARKS = "".join(
+    chr(code) for code in [
+        0x0981, 0x0982, 0x0983, 0x09BC,
+        *range(0x09BE, 0x09C5), 0x09C7, 0x09C8,
+        0x09CB, 0x09CC, 0x09CD, 0x09D7, 0x09E2, 0x09E3,
+    ]
+)
+FTS_TOKENIZER = f"unicode61 remove_diacritics 2 tokenchars '{BANGLA_MARKS}'"
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        f"USING fts5({', '.join(FTS_COLUMNS)}, tokenize = \"{FTS_TOKENIZER}\")"
+    )
+    CrisisPost = apps.get_model("crisis", "CrisisPost")
+    with schema_editor.connection.cursor() as cursor:
+        for post in CrisisPost.objects.only("id", *FTS_COLUMNS).iterator(chunk_size=1000):
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+                [post.pk, post.title, post.location or "", post.description, post.post_type],
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0003_crisis_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0004_crisispost_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crisispost',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='crisis_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crisispost',
+            index=models.Index(fields=['status', 'post_type', '-created_at', '-id'], name='crisis_status_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crisispost',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='crisis_owner_created_idx'),
+        ),
+    ]
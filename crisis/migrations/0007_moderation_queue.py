@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0006_crisispost_banner_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.IntegerField(default=0)),
+                ('reasons', models.JSONField(default=dict)),
+                ('sort_key', models.DateTimeField()),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('claimed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='crisis.crisispost')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='queue_entry', to='crisis.crisispost')),
+            ],
+            options={
+                'verbose_name_plural': 'Moderation queue',
+                'ordering': ['sort_key', 'id'],
+                'indexes': [models.Index(fields=['sort_key', 'id'], name='queue_sort_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+
+def backfill_crisis_stats(apps, schema_editor):
+    """A stats row for every post created before CrisisStats existed (same counts as crisis.stats.compute_stats)"""
+    CrisisPost = apps.get_model('crisis', 'CrisisPost')
+    CrisisStats = apps.get_model('crisis', 'CrisisStats')
+    DonationMoney = apps.get_model('donations', 'DonationMoney')
+    DonationGoods = apps.get_model('donations', 'DonationGoods')
+    VolunteerApplication = apps.get_model('volunteers', 'VolunteerApplication')
+    CrisisUpdate = apps.get_model('updates', 'CrisisUpdate')
+    Comment = apps.get_model('updates', 'Comment')
+
+    now = timezone.now()
+    rows = {
+        pk: CrisisStats(crisis_post_id=pk, updated_at=now)
+        for pk in CrisisPost.objects.filter(stats__isnull=True).values_list('pk', flat=True).iterator()
+    }
+    if not rows:
+        return
+    sources = (
+        (DonationMoney.objects, 'crisis_post_id', {'total_money': Sum('amount'), 'total_donors_money': Count('id')}),
+        (DonationGoods.objects, 'crisis_post_id', {'total_goods_donations': Count('id')}),
+        (VolunteerApplication.objects, 'crisis_post_id', {
+            'approved_volunteers': Count('id', filter=Q(status='approved')),
+            'pending_volunteers': Count('id', filter=Q(status='pending')),
+        }),
+        (CrisisUpdate.objects, 'crisis_post_id', {'total_updates': Count('id')}),
+        (Comment.objects, 'update__crisis_post_id', {'total_comments': Count('id')}),
+    )
+    for manager, key, aggregates in sources:
+        for row in manager.order_by().values(key).annotate(**aggregates).iterator():
+            stats = rows.get(row.pop(key))
+            if stats is not None:
+                for field, value in row.items():
+                    setattr(stats, field, value or 0)
+    CrisisStats.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0007_moderation_queue'),
+        ('donations', '0008_admin_changelist_indexes'),
+        ('updates', '0003_crisisupdate_update_image_variants'),
+        ('volunteers', '0004_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_crisis_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from core.hints import query_hints
 
 USER = settings.AUTH_USER_MODEL
 
@@ -22,22 +23,33 @@ class CrisisPost(models.Model):
     location = models.CharField(max_length=200, blank=True, null=True)  # NEW: Add location
     owner = models.ForeignKey(USER, on_delete=models.CASCADE, related_name="crisis_posts")
     banner_image = models.ImageField(upload_to="crisis_banners/", blank=True, null=True)
+    banner_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # core.image_pipeline
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    funding_goal = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True)  # Optional fundraising target (BDT)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']  # NEW: Default ordering
+        indexes = [
+            # Public feed: status='approved' [AND post_type=...] ORDER BY -created_at, -id
+            models.Index(fields=['status', '-created_at', '-id'], name='crisis_status_created_idx'),
+            models.Index(fields=['status', 'post_type', '-created_at', '-id'], name='crisis_status_type_idx'),
+            # my_posts
+            models.Index(fields=['owner', '-created_at', '-id'], name='crisis_owner_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.post_type})"
     
     # NEW: Properties to easily access owner info
     @property
+    @query_hints("owner__username")
     def owner_name(self):
         return self.owner.username
     
     @property
+    @query_hints("owner__email")
     def owner_email(self):
         return self.owner.email
 
@@ -63,5 +75,71 @@ class PostSection(models.Model):
     
     # NEW: Property to get creator name
     @property
+    @query_hints("created_by__username")
     def creator_name(self):
-        return self.created_by.username if self.created_by else "Unknown"
\ No newline at end of file
+        return self.created_by.username if self.created_by else "Unknown"
+
+
+class CrisisStats(models.Model):
+    """
+    Denormalized counters for a crisis post.
+    Kept in sync by signal handlers in the donations, volunteers and updates apps,
+    rebuild with `manage.py rebuild_crisis_stats`.
+    """
+    crisis_post = models.OneToOneField(CrisisPost, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    total_money = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_donors_money = models.PositiveIntegerField(default=0)
+    total_goods_donations = models.PositiveIntegerField(default=0)
+    approved_volunteers = models.PositiveIntegerField(default=0)
+    pending_volunteers = models.PositiveIntegerField(default=0)
+    total_updates = models.PositiveIntegerField(default=0)
+    total_comments = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Crisis Stats"
+        verbose_name_plural = "Crisis Stats"
+
+    def __str__(self):
+        return f"Stats for {self.crisis_post_id}"
+
+    @property
+    @query_hints("crisis_post__funding_goal")
+    def funding_goal(self):
+        return self.crisis_post.funding_goal
+
+    @property
+    @query_hints("total_money", "crisis_post__funding_goal")
+    def funding_progress(self):
+        """Percentage of the funding goal collected, or None if no goal is set"""
+        goal = self.crisis_post.funding_goal
+        if not goal:
+            return None
+        return round(float(self.total_money) / float(goal) * 100, 2)
+
+
+class ModerationQueueEntry(models.Model):
+    """
+    A pending crisis post waiting for a moderator. `sort_key` is the post's
+    created_at moved earlier by its priority points, so the queue is one
+    index scan and older posts still rise. Kept by crisis/moderation_queue.py,
+    rebuild with `manage.py rebuild_moderation_queue`.
+    """
+    post = models.OneToOneField(CrisisPost, on_delete=models.CASCADE, related_name="queue_entry")
+    priority = models.IntegerField(default=0)
+    reasons = models.JSONField(default=dict)  # points per signal, e.g. {"post_type": 30, "ngo": 20}
+    duplicate_of = models.ForeignKey(CrisisPost, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    sort_key = models.DateTimeField()
+    claimed_by = models.ForeignKey(USER, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["sort_key", "id"]
+        verbose_name_plural = "Moderation queue"
+        indexes = [
+            models.Index(fields=["sort_key", "id"], name="queue_sort_idx"),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} (priority {self.priority})"
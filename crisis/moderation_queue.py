@@ -0,0 +1,198 @@
+"""
+Priority queue of pending crisis posts for moderators.
+
+Each pending post has a ModerationQueueEntry scored from:
+
+* post type: national over district over individual;
+* owner trust: NGO accounts, and the owner's approved / rejected history;
+* duplicate likelihood: a near-identical title (and location) on another
+  live post, found through the full-text index, lowers the priority and is
+  linked as `duplicate_of`.
+
+Points are turned into time: `sort_key = created_at - points * MINUTES_PER_POINT`,
+so the queue is served from one index in ascending `sort_key` and a post
+that keeps waiting overtakes newer posts with a few more points. Entries
+are refreshed when a post is created or edited and dropped once it is
+moderated.
+
+Moderators claim batches with a lease: `claim()` hands out the first free
+entries with a conditional UPDATE, so concurrent moderators get disjoint
+batches; an expired lease makes the entry free again.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core import sync
+from core.cache import invalidate
+from core.moderation import moderate
+
+from .models import CrisisPost, ModerationQueueEntry
+from .search import similar_posts
+
+POST_TYPE_POINTS = {"national": 30, "district": 20, "individual": 10}
+NGO_POINTS = 20
+APPROVED_POST_POINTS, MAX_APPROVED_POINTS = 5, 20
+REJECTED_POST_POINTS, MIN_REJECTED_POINTS = -10, -30
+DUPLICATE_POINTS = -40
+DUPLICATE_SIMILARITY = 0.6  # Jaccard similarity of title words (plus location)
+MINUTES_PER_POINT = 10
+
+WORD = re.compile(r"[\w\u0980-\u09FF]+")
+
+
+def lease_duration():
+    return timedelta(seconds=getattr(settings, "MODERATION_LEASE_SECONDS", 15 * 60))
+
+
+# ------------------- Scoring -------------------
+def owner_trust(owner_ids):
+    """{owner_id: points} from the role and the owners' moderated posts, in one query"""
+    owners = (
+        get_user_model().objects.filter(id__in=owner_ids)
+        .annotate(
+            approved=Count("crisis_posts", filter=Q(crisis_posts__status="approved")),
+            rejected=Count("crisis_posts", filter=Q(crisis_posts__status="rejected")),
+        )
+        .values_list("id", "role", "approved", "rejected")
+    )
+    trust = {}
+    for owner_id, role, approved, rejected in owners:
+        trust[owner_id] = {
+            "ngo": NGO_POINTS if role == "ngo" else 0,
+            "approved_posts": min(approved * APPROVED_POST_POINTS, MAX_APPROVED_POINTS),
+            "rejected_posts": max(rejected * REJECTED_POST_POINTS, MIN_REJECTED_POINTS),
+        }
+    return trust
+
+
+def _words(title, location):
+    words = set(WORD.findall(title.lower()))
+    if location:
+        words.add("@" + location.strip().lower())
+    return words
+
+
+def find_duplicate(post):
+    """Id of the live post most likely to describe the same crisis, or None"""
+    words = _words(post.title, post.location)
+    best, best_similarity = None, DUPLICATE_SIMILARITY
+    for other_id, title, location in similar_posts(post):
+        other = _words(title, location)
+        similarity = len(words & other) / len(words | other)
+        if similarity >= best_similarity:
+            best, best_similarity = other_id, similarity
+    return best
+
+
+def build_entry(post, trust, duplicate_of):
+    reasons = {"post_type": POST_TYPE_POINTS.get(post.post_type, 0), **trust}
+    if duplicate_of:
+        reasons["duplicate"] = DUPLICATE_POINTS
+    reasons = {signal: points for signal, points in reasons.items() if points}
+    priority = sum(reasons.values())
+    return ModerationQueueEntry(
+        post=post,
+        priority=priority,
+        reasons=reasons,
+        duplicate_of_id=duplicate_of,
+        sort_key=post.created_at - timedelta(minutes=priority * MINUTES_PER_POINT),
+    )
+
+
+# ------------------- Maintenance -------------------
+def refresh_posts(posts, check_duplicates=True):
+    """
+    Rescore pending posts and drop the others. Claims survive a rescore;
+    without `check_duplicates` the stored duplicate links are kept.
+    """
+    pending = [post for post in posts if post.status == "pending"]
+    done = [post.pk for post in posts if post.status != "pending"]
+    if done:
+        ModerationQueueEntry.objects.filter(post_id__in=done).delete()
+    if not pending:
+        return 0
+
+    trust = owner_trust({post.owner_id for post in pending})
+    if check_duplicates:
+        duplicates = {post.pk: find_duplicate(post) for post in pending}
+    else:
+        duplicates = dict(
+            ModerationQueueEntry.objects.filter(post__in=pending).values_list("post_id", "duplicate_of_id")
+        )
+    ModerationQueueEntry.objects.bulk_create(
+        [build_entry(post, trust.get(post.owner_id, {}), duplicates.get(post.pk)) for post in pending],
+        update_conflicts=True,
+        unique_fields=["post"],
+        update_fields=["priority", "reasons", "duplicate_of", "sort_key", "updated_at"],
+    )
+    return len(pending)
+
+
+def moderate_posts(ids, target, user):
+    """
+    Approve / reject posts through core.moderation (one conditional UPDATE, no
+    post_save), then refresh what the signals would have: caches, the queue and
+    the sync log.
+    """
+    outcomes, changed = moderate(CrisisPost, ids, target, user, fields=("owner_id",))
+    if changed:
+        invalidate("feed", *[f"{prefix}:{row['id']}" for row in changed for prefix in ("post", "summary")])
+        posts_moderated([row["id"] for row in changed], {row["owner_id"] for row in changed})
+        sync.record_many(sync.CRISIS_POST, [(row["id"], row["id"], None) for row in changed])
+        sync.record_post_contents(row["id"] for row in changed)
+    return outcomes, changed
+
+
+def posts_moderated(post_ids, owner_ids):
+    """After a status change: drop the entries and rescore the owners' other pending posts"""
+    ModerationQueueEntry.objects.filter(post_id__in=post_ids).delete()
+    others = list(CrisisPost.objects.filter(owner_id__in=owner_ids, status="pending"))
+    refresh_posts(others, check_duplicates=False)
+
+
+# ------------------- Claims -------------------
+def claimable(user, now):
+    return Q(claimed_by__isnull=True) | Q(lease_expires_at__lt=now) | Q(claimed_by=user)
+
+
+def claim(user, limit):
+    """
+    Lease up to `limit` entries to `user`, highest priority first, including
+    (and extending) the ones they already hold. Returns the claimed queryset.
+    """
+    now = timezone.now()
+    lease = now + lease_duration()
+    claimed = 0
+    with transaction.atomic():
+        # A concurrent moderator may win some rows between the read and the UPDATE; read again for the rest
+        for _ in range(3):
+            ids = list(
+                ModerationQueueEntry.objects.select_for_update(skip_locked=True)
+                .filter(claimable(user, now))
+                .exclude(claimed_by=user, lease_expires_at=lease)
+                .order_by("sort_key", "id")
+                .values_list("id", flat=True)[:limit - claimed]
+            )
+            if not ids:
+                break
+            claimed += (
+                ModerationQueueEntry.objects.filter(claimable(user, now), id__in=ids)
+                .exclude(claimed_by=user, lease_expires_at=lease)
+                .update(claimed_by=user, lease_expires_at=lease)
+            )
+            if claimed >= limit:
+                break
+    return ModerationQueueEntry.objects.filter(claimed_by=user, lease_expires_at=lease)
+
+
+def release(user, post_ids):
+    """Give back claimed entries before their lease runs out"""
+    return ModerationQueueEntry.objects.filter(claimed_by=user, post_id__in=post_ids).update(
+        claimed_by=None, lease_expires_at=None
+    )
@@ -11,3 +11,12 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         # Write permissions only for owner
         return obj.owner == request.user
+
+
+class IsCrisisOwnerOrStaff(permissions.BasePermission):
+    """
+    Only the crisis owner or staff can read the full ledgers of a crisis post.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.is_staff or obj.owner_id == request.user.id
@@ -0,0 +1,181 @@
+"""
+SQLite FTS5 full-text index for crisis posts.
+
+`crisis_crisispost_fts` holds one row per post (rowid = post id), kept in
+sync by crisis.signals. FullTextSearchFilter turns `?search=` into an FTS5
+query with prefix matching, "quoted phrases" and district-name aliases,
+ranks by BM25 and annotates highlighted snippets. On other databases it
+falls back to DRF's SearchFilter.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, TextField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+FTS_TABLE = "crisis_crisispost_fts"
+FTS_COLUMNS = ("title", "location", "description", "post_type")
+
+# BM25 weights, in FTS_COLUMNS order
+FTS_WEIGHTS = (10.0, 5.0, 1.0, 2.0)
+
+# Bengali vowel signs, virama and other combining marks. unicode61 treats
+# them as separators by default, which splits words like "বন্যা".
+BANGLA_MARKS = "".join(
+    chr(code) for code in [
+        0x0981, 0x0982, 0x0983, 0x09BC,
+        *range(0x09BE, 0x09C5), 0x09C7, 0x09C8,
+        0x09CB, 0x09CC, 0x09CD, 0x09D7, 0x09E2, 0x09E3,
+    ]
+)
+FTS_TOKENIZER = f"unicode61 remove_diacritics 2 tokenchars '{BANGLA_MARKS}'"
+
+# Sentinels wrapped around matches by highlight()/snippet(), turned into <mark> after escaping
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+# Romanized spellings (old and new) and Bangla names that should find each other
+PLACE_ALIASES = [
+    {"dhaka", "dacca", "ঢাকা"},
+    {"chattogram", "chittagong", "চট্টগ্রাম"},
+    {"sylhet", "সিলেট"},
+    {"khulna", "খুলনা"},
+    {"rajshahi", "রাজশাহী"},
+    {"barishal", "barisal", "বরিশাল"},
+    {"rangpur", "রংপুর"},
+    {"mymensingh", "ময়মনসিংহ"},
+    {"cumilla", "comilla", "কুমিল্লা"},
+    {"jashore", "jessore", "যশোর"},
+    {"bogura", "bogra", "বগুড়া"},
+    {"sunamganj", "সুনামগঞ্জ"},
+    {"feni", "ফেনী"},
+]
+_ALIASES = {name: group for group in PLACE_ALIASES for name in group}
+
+_PHRASE = re.compile(r'"([^"]*)"')
+_TOKEN = re.compile(r"[\w\u0980-\u09FF]+")
+
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+def _quote(token):
+    return '"' + token.replace('"', '""') + '"'
+
+
+def _term(token):
+    """One search term: prefix match, OR-ed with its known aliases"""
+    options = [_quote(alias) + "*" for alias in sorted(_ALIASES.get(token, {token}))]
+    return options[0] if len(options) == 1 else "(" + " OR ".join(options) + ")"
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+    Quoted parts become phrase queries, every other word a prefix term;
+    all parts must match.
+    """
+    parts = []
+    for phrase in _PHRASE.findall(text):
+        words = _TOKEN.findall(phrase.lower())
+        if words:
+            parts.append(_quote(" ".join(words)))
+    for token in _TOKEN.findall(_PHRASE.sub(" ", text).lower()):
+        parts.append(_term(token))
+    return " ".join(parts)
+
+
+# ------------------- Index maintenance -------------------
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            [post.pk, post.title, post.location or "", post.description, post.post_type],
+        )
+
+
+def remove_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild_index(queryset):
+    """Reindex every post in `queryset` (used by the migration and for repairs)"""
+    if not is_available():
+        return 0
+    count = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        for post in queryset.only("id", *FTS_COLUMNS).iterator(chunk_size=1000):
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+                [post.pk, post.title, post.location or "", post.description, post.post_type],
+            )
+            count += 1
+    return count
+
+
+# ------------------- Query side -------------------
+def similar_posts(post, limit=10):
+    """
+    [(id, title, location)] of the non-rejected posts sharing the most title
+    words with `post`, best BM25 match first (used for duplicate detection).
+    """
+    tokens = sorted(set(_TOKEN.findall(post.title.lower())))
+    if not is_available() or not tokens:
+        return []
+    table = post._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {FTS_TABLE}.rowid, {FTS_TABLE}.title, {FTS_TABLE}.location "
+            f"FROM {FTS_TABLE} JOIN {table} p ON p.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid <> %s AND p.status <> 'rejected' "
+            f"ORDER BY bm25({FTS_TABLE}, {', '.join(str(weight) for weight in FTS_WEIGHTS)}) LIMIT %s",
+            ["title : (" + " OR ".join(_quote(token) for token in tokens) + ")", post.pk, limit],
+        )
+        return cursor.fetchall()
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    `?search=` backed by the FTS5 index. Results are ranked by BM25 (best first)
+    and annotated with `search_rank`, `search_title` and `search_snippet`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not is_available():
+            return super().filter_queryset(request, queryset, view)
+
+        text = request.query_params.get(self.search_param, "")
+        match = build_match_query(text)
+        if not match:
+            return queryset
+
+        table = queryset.model._meta.db_table
+        correlated = f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id"
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        title_col = FTS_COLUMNS.index("title")
+        description_col = FTS_COLUMNS.index("description")
+
+        queryset = queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(
+            search_rank=RawSQL(f"SELECT bm25({FTS_TABLE}, {weights}) {correlated}", [match], output_field=FloatField()),
+            search_title=RawSQL(
+                f"SELECT highlight({FTS_TABLE}, {title_col}, %s, %s) {correlated}",
+                [MATCH_START, MATCH_END, match], output_field=TextField(),
+            ),
+            search_snippet=RawSQL(
+                f"SELECT snippet({FTS_TABLE}, {description_col}, %s, %s, '…', 24) {correlated}",
+                [MATCH_START, MATCH_END, match], output_field=TextField(),
+            ),
+        )
+        # Rank order for the keyset paginator (explicit ?ordering= still wins)
+        view.pagination_ordering = ("search_rank",)
+        return queryset.order_by("search_rank", "id")
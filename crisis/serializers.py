@@ -1,5 +1,37 @@
+from django.utils.html import escape
 from rest_framework import serializers
-from .models import CrisisPost, PostSection
+from core.image_pipeline import ImageVariantsField
+from .models import CrisisPost, PostSection, CrisisStats, ModerationQueueEntry
+from .search import MATCH_START, MATCH_END
+
+
+class SearchHighlightField(serializers.ReadOnlyField):
+    """Full-text match with HTML escaped and hits wrapped in <mark>; omitted outside searches"""
+
+    def to_representation(self, value):
+        if value is None:
+            return None
+        return escape(value).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+class CrisisStatsSerializer(serializers.ModelSerializer):
+    """Denormalized counters shown on crisis cards"""
+    funding_goal = serializers.ReadOnlyField()
+    funding_progress = serializers.ReadOnlyField()
+
+    class Meta:
+        model = CrisisStats
+        fields = [
+            "total_money",
+            "total_donors_money",
+            "total_goods_donations",
+            "approved_volunteers",
+            "pending_volunteers",
+            "total_updates",
+            "total_comments",
+            "funding_goal",
+            "funding_progress",
+        ]
 
 class PostSectionSerializer(serializers.ModelSerializer):
     creator_name = serializers.ReadOnlyField()  # NEW: Show who created section
@@ -13,6 +45,8 @@ class CrisisPostSerializer(serializers.ModelSerializer):
     owner_name = serializers.ReadOnlyField()  # NEW: Use property
     owner_email = serializers.ReadOnlyField()  # NEW: Use property
     sections = PostSectionSerializer(many=True, read_only=True)
+    stats = CrisisStatsSerializer(read_only=True)
+    banner_image_variants = ImageVariantsField()
     
     class Meta:
         model = CrisisPost
@@ -26,18 +60,49 @@ class CrisisPostSerializer(serializers.ModelSerializer):
             "owner_name",  # NEW
             "owner_email",  # NEW
             "banner_image", 
+            "banner_image_variants",
             "status", 
+            "funding_goal",
             "created_at", 
             "updated_at", 
-            "sections"
+            "sections",
+            "stats"
         ]
         read_only_fields = ["owner", "status", "created_at", "updated_at"]  # NEW: Prevent users from changing status
 
 
 class CrisisPostListSerializer(serializers.ModelSerializer):
-    """Lightweight serializer for listing posts (without sections)"""
+    """
+    Lightweight serializer for listing posts (without sections or live
+    counters: those come with the post detail and its donation summary, so
+    donations never invalidate the feed)
+    """
     owner_name = serializers.ReadOnlyField()
+    banner_image_variants = ImageVariantsField()
+    search_title = SearchHighlightField()
+    search_snippet = SearchHighlightField()
     
     class Meta:
         model = CrisisPost
-        fields = ["id", "title", "post_type", "location", "owner_name", "status", "created_at", "banner_image"]
\ No newline at end of file
+        fields = [
+            "id", "title", "post_type", "location", "owner_name", "status", "created_at", "banner_image",
+            "banner_image_variants",
+            "search_title", "search_snippet"
+        ]
+
+class ModerationQueueEntrySerializer(serializers.ModelSerializer):
+    """A pending post as the moderation queue shows it"""
+    post = serializers.ReadOnlyField(source="post_id")
+    title = serializers.ReadOnlyField(source="post.title")
+    post_type = serializers.ReadOnlyField(source="post.post_type")
+    location = serializers.ReadOnlyField(source="post.location")
+    owner_name = serializers.ReadOnlyField(source="post.owner_name")
+    created_at = serializers.ReadOnlyField(source="post.created_at")
+    claimed_by = serializers.ReadOnlyField(source="claimed_by.username", default=None)
+
+    class Meta:
+        model = ModerationQueueEntry
+        fields = [
+            "post", "title", "post_type", "location", "owner_name", "created_at",
+            "priority", "reasons", "duplicate_of", "claimed_by", "lease_expires_at",
+        ]
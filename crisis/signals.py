@@ -0,0 +1,88 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from core import sync
+from core.cache import invalidate
+from core.image_pipeline import register_image_fields, variants_ready
+from . import moderation_queue
+from .models import CrisisPost, CrisisStats, PostSection
+from .search import index_post, remove_post
+
+register_image_fields(CrisisPost, "banner_image")
+
+
+@receiver(post_save, sender=CrisisPost)
+def create_crisis_stats(sender, instance, created, raw=False, **kwargs):
+    """Every new crisis post starts with an empty stats row"""
+    if created and not raw:
+        CrisisStats.objects.get_or_create(crisis_post=instance)
+
+
+@receiver(post_save, sender=CrisisPost)
+def index_crisis_post(sender, instance, **kwargs):
+    """Keep the full-text index in step with the post"""
+    index_post(instance)
+
+
+@receiver(post_delete, sender=CrisisPost)
+def unindex_crisis_post(sender, instance, **kwargs):
+    remove_post(instance.pk)
+
+
+@receiver(post_save, sender=CrisisPost)
+@receiver(post_delete, sender=CrisisPost)
+def invalidate_crisis_post(sender, instance, **kwargs):
+    """Creation, edits and approve/reject change the feed as well as the post itself"""
+    invalidate("feed", f"post:{instance.pk}", f"summary:{instance.pk}")
+
+
+@receiver(post_save, sender=PostSection)
+@receiver(post_delete, sender=PostSection)
+def invalidate_post_section(sender, instance, **kwargs):
+    invalidate(f"post:{instance.post_id}")
+
+
+@receiver(variants_ready, sender=CrisisPost)
+def banner_variants_ready(sender, pk, **kwargs):
+    invalidate("feed", f"post:{pk}")
+
+
+# ------------------- Delta sync -------------------
+@receiver(post_save, sender=CrisisPost)
+@receiver(post_delete, sender=CrisisPost)
+def sync_crisis_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record(sync.CRISIS_POST, instance.pk, instance.pk)
+
+
+@receiver(post_save, sender=PostSection)
+@receiver(post_delete, sender=PostSection)
+def sync_post_section(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record(sync.POST_SECTION, instance.pk, instance.post_id)
+
+
+@receiver(variants_ready, sender=CrisisPost)
+def sync_banner_variants(sender, pk, **kwargs):
+    sync.record(sync.CRISIS_POST, pk, pk)
+
+
+# ------------------- Status changes: moderation queue, delta sync -------------------
+@receiver(post_init, sender=CrisisPost)
+def remember_status(sender, instance, **kwargs):
+    """Loaded status, so post_save can tell a status change; never loads a deferred field"""
+    instance._loaded_status = instance.__dict__.get("status") if instance.pk else None
+
+
+@receiver(post_save, sender=CrisisPost)
+def crisis_post_status_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or "status" not in instance.__dict__:
+        return  # a deferred status was neither loaded nor saved
+    old_status = None if created else instance._loaded_status
+    if old_status == "pending" and instance.status != "pending":
+        moderation_queue.posts_moderated([instance.pk], [instance.owner_id])
+    elif instance.status == "pending":
+        moderation_queue.refresh_posts([instance])
+    if not created and old_status != instance.status:
+        # Shows or hides everything under the post (see core.sync.record_post_contents)
+        sync.record_post_contents([instance.pk])
+    instance._loaded_status = instance.status
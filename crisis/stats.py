@@ -0,0 +1,145 @@
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from core.cache import invalidate
+from .models import CrisisPost, CrisisStats
+
+COUNTER_FIELDS = (
+    "total_money",
+    "total_donors_money",
+    "total_goods_donations",
+    "approved_volunteers",
+    "pending_volunteers",
+    "total_updates",
+    "total_comments",
+)
+
+
+def adjust_stats(crisis_post_id, create_missing=True, **deltas):
+    """
+    Apply counter deltas for one crisis post with a single UPDATE.
+    If the post has no stats row yet it is built from the source tables.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    updated = CrisisStats.objects.filter(crisis_post_id=crisis_post_id).update(
+        updated_at=timezone.now(), **changes
+    )
+    if not updated and create_missing:
+        rebuild_stats([crisis_post_id])
+    elif updated:
+        invalidate_stats_responses([crisis_post_id])
+
+
+def replace_stats(old_post_id, old_counts, new_post_id, new_counts):
+    """
+    An edited row: take its old contribution off the old post and add the
+    new one, e.g. a donation whose amount changed or that moved to another crisis.
+    """
+    if old_post_id == new_post_id:
+        adjust_stats(new_post_id, **{
+            field: new_counts.get(field, 0) - old_counts.get(field, 0) for field in {*old_counts, *new_counts}
+        })
+        return
+    adjust_stats(old_post_id, create_missing=False, **{field: -value for field, value in old_counts.items()})
+    adjust_stats(new_post_id, **new_counts)
+
+
+def adjust_stats_for_update(update_id, **deltas):
+    """Same as adjust_stats, addressed through a CrisisUpdate id (used for comments)"""
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    CrisisStats.objects.filter(crisis_post__updates__id=update_id).update(updated_at=timezone.now(), **changes)
+    # No invalidation here: the comment signals, which know the post, invalidate its detail
+
+
+def compute_stats(crisis_post_ids):
+    """Aggregate the counters for the given posts straight from the source tables"""
+    from donations.models import DonationMoney, DonationGoods
+    from volunteers.models import VolunteerApplication
+    from updates.models import CrisisUpdate, Comment
+
+    rows = {
+        post_id: {field: 0 for field in COUNTER_FIELDS}
+        for post_id in crisis_post_ids
+    }
+
+    def merge(queryset, key="crisis_post_id"):
+        for row in queryset:
+            rows[row.pop(key)].update({k: v or 0 for k, v in row.items()})
+
+    merge(
+        DonationMoney.objects.filter(crisis_post_id__in=crisis_post_ids)
+        .values("crisis_post_id")
+        .annotate(total_money=Sum("amount"), total_donors_money=Count("id"))
+        .order_by()
+    )
+    merge(
+        DonationGoods.objects.filter(crisis_post_id__in=crisis_post_ids)
+        .values("crisis_post_id")
+        .annotate(total_goods_donations=Count("id"))
+        .order_by()
+    )
+    merge(
+        VolunteerApplication.objects.filter(crisis_post_id__in=crisis_post_ids)
+        .values("crisis_post_id")
+        .annotate(
+            approved_volunteers=Count("id", filter=Q(status="approved")),
+            pending_volunteers=Count("id", filter=Q(status="pending")),
+        )
+        .order_by()
+    )
+    merge(
+        CrisisUpdate.objects.filter(crisis_post_id__in=crisis_post_ids)
+        .values("crisis_post_id")
+        .annotate(total_updates=Count("id"))
+        .order_by()
+    )
+    merge(
+        Comment.objects.filter(update__crisis_post_id__in=crisis_post_ids)
+        .values("update__crisis_post_id")
+        .annotate(total_comments=Count("id"))
+        .order_by(),
+        key="update__crisis_post_id",
+    )
+    return rows
+
+
+def rebuild_stats(crisis_post_ids):
+    """Recompute and upsert the stats rows for the given posts"""
+    crisis_post_ids = list(
+        CrisisPost.objects.filter(id__in=crisis_post_ids).values_list("id", flat=True)
+    )
+    if not crisis_post_ids:
+        return 0
+    now = timezone.now()
+    objs = [
+        CrisisStats(crisis_post_id=post_id, updated_at=now, **counters)
+        for post_id, counters in compute_stats(crisis_post_ids).items()
+    ]
+    CrisisStats.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["crisis_post"],
+        update_fields=[*COUNTER_FIELDS, "updated_at"],
+    )
+    invalidate_stats_responses(crisis_post_ids)
+    return len(objs)
+
+
+def invalidate_stats_responses(crisis_post_ids):
+    """Cached responses showing the counters: the post detail and its donation summary (not the feed)"""
+    invalidate(*[f"{prefix}:{post_id}" for post_id in crisis_post_ids for prefix in ("post", "summary")])
+
+
+def get_stats(crisis_post):
+    """Return the stats row for a post, building it on first access"""
+    try:
+        return crisis_post.stats
+    except CrisisStats.DoesNotExist:
+        rebuild_stats([crisis_post.id])
+        stats = CrisisStats.objects.get(crisis_post=crisis_post)
+        stats.crisis_post = crisis_post
+        return stats
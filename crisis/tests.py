@@ -1,13 +1,42 @@
+import importlib
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from django.contrib.auth import get_user_model
-from crisis.models import CrisisPost, PostSection
+from core.cache import check_shared_cache
+from core.models import ModerationEvent
+from crisis.moderation_queue import MINUTES_PER_POINT
+from core.testing import ExplainPlanMixin, QueryBudgetMixin
+from crisis.models import CrisisPost, PostSection, CrisisStats, ModerationQueueEntry
+from donations.models import DonationMoney, DonationGoods
+from volunteers.models import VolunteerApplication
+from updates.models import CrisisUpdate, Comment
 
 User = get_user_model()
 
 
-class CrisisPostTests(APITestCase):
+class CrisisPostTests(QueryBudgetMixin, APITestCase):
+    # Session login costs two queries (session + user) on top of the endpoint itself
+    query_budgets = {
+        "crisispost-list": 3,
+        "crisispost-detail": 4,
+        "crisispost-my-posts": 4,
+        "POST crisispost-list": 11,  # + moderation queue entry: owner trust, duplicate lookup, upsert; sync entry
+        "PATCH crisispost-detail": 8,
+        "POST crisispost-approve": 10,  # + the post's contents logged again for sync: one UNION read, one INSERT
+    }
 
     def setUp(self):
         # Users
@@ -78,7 +107,7 @@ class CrisisPostTests(APITestCase):
         )
 
         response = self.client.get(self.list_url)
-        self.assertEqual(len(response.data), 1)  # Only approved post is visible
+        self.assertEqual(len(response.data["results"]), 1)  # Only approved post is visible
 
     # ------------------------------
     # Admin sees ALL posts
@@ -86,7 +115,7 @@ class CrisisPostTests(APITestCase):
     def test_admin_sees_all_posts(self):
         self.client.login(username="admin", password="pass123")
         response = self.client.get(self.list_url)
-        self.assertEqual(len(response.data), CrisisPost.objects.count())
+        self.assertEqual(len(response.data["results"]), CrisisPost.objects.count())
 
     # ------------------------------
     # Owner can update post
@@ -163,7 +192,7 @@ class CrisisPostTests(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), CrisisPost.objects.filter(owner=self.user).count())
+        self.assertEqual(len(response.data["results"]), CrisisPost.objects.filter(owner=self.user).count())
 
     # ------------------------------
     # PostSection creation + serializer test
@@ -183,3 +212,592 @@ class CrisisPostTests(APITestCase):
         self.assertEqual(len(response.data["sections"]), 1)
         self.assertEqual(response.data["sections"][0]["section_type"], "updates")
         self.assertEqual(response.data["sections"][0]["creator_name"], "user1")
+
+
+class CrisisPostPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user1", email="u1@test.com", password="pass123"
+        )
+        self.posts = [
+            CrisisPost.objects.create(
+                title=f"Post {i}",
+                description="...",
+                post_type="district",
+                owner=self.user,
+                status="approved"
+            )
+            for i in range(5)
+        ]
+        # Same timestamp for every row, so only the id tie-breaker orders them
+        CrisisPost.objects.update(created_at=self.posts[0].created_at)
+        self.list_url = reverse("crisispost-list")
+
+    def test_walks_feed_with_cursor(self):
+        seen = []
+        url = f"{self.list_url}?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            seen += [post["id"] for post in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(seen, sorted((post.id for post in self.posts), reverse=True))
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(f"{self.list_url}?page_size=2")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_page_size_is_capped(self):
+        with self.settings(API_MAX_PAGE_SIZE=3):
+            response = self.client.get(f"{self.list_url}?page_size=1000")
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(self.list_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        baseline = count_queries()
+        for i in range(5):
+            owner = User.objects.create_user(username=f"owner{i}", email=f"o{i}@test.com", password="x")
+            CrisisPost.objects.create(
+                title=f"Extra {i}", description="...", post_type="district", owner=owner, status="approved"
+            )
+        self.assertEqual(count_queries(), baseline)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.list_url}?cursor=garbage")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CrisisPostSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="user1", email="u1@test.com", password="pass123"
+        )
+        self.flood = CrisisPost.objects.create(
+            title="Flash flood in Sunamganj",
+            description="Haor embankments broke after heavy rain, families need boats.",
+            post_type="district",
+            location="Sunamganj",
+            owner=self.user,
+            status="approved"
+        )
+        self.landslide = CrisisPost.objects.create(
+            title="Landslide near hill tracts",
+            description="Flooding roads cut off villages near Chittagong.",
+            post_type="district",
+            location="Chittagong",
+            owner=self.user,
+            status="approved"
+        )
+        self.bangla = CrisisPost.objects.create(
+            title="সিলেটে বন্যা",
+            description="বন্যায় হাজারো পরিবার পানিবন্দি",
+            post_type="district",
+            location="সিলেট",
+            owner=self.user,
+            status="approved"
+        )
+        self.pending = CrisisPost.objects.create(
+            title="Flood relief pending review",
+            description="Flood",
+            post_type="individual",
+            owner=self.user,
+            status="pending"
+        )
+        self.list_url = reverse("crisispost-list")
+
+    def search(self, text):
+        response = self.client.get(self.list_url, {"search": text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def test_prefix_match_ranks_title_hits_first(self):
+        results = self.search("flood")
+        self.assertEqual([post["id"] for post in results], [self.flood.id, self.landslide.id])
+        self.assertEqual(results[0]["search_title"], "Flash <mark>flood</mark> in Sunamganj")
+
+    def test_phrase_query(self):
+        results = self.search('"heavy rain"')
+        self.assertEqual([post["id"] for post in results], [self.flood.id])
+
+    def test_bangla_words_and_district_aliases(self):
+        self.assertEqual([post["id"] for post in self.search("বন্যা")], [self.bangla.id])
+        self.assertEqual([post["id"] for post in self.search("sylhet")], [self.bangla.id])
+        self.assertEqual([post["id"] for post in self.search("chattogram")], [self.landslide.id])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.flood.title = "Cyclone shelter update"
+        self.flood.save()
+        self.assertEqual([post["id"] for post in self.search("cyclone")], [self.flood.id])
+
+        self.flood.delete()
+        self.assertEqual(self.search("cyclone"), [])
+
+    def test_staff_can_search_pending_posts(self):
+        self.assertNotIn(self.pending.id, [post["id"] for post in self.search("pending")])
+
+        admin = User.objects.create_superuser(username="admin", email="admin@test.com", password="pass123")
+        self.client.force_authenticate(admin)
+        self.assertEqual([post["id"] for post in self.search("pending")], [self.pending.id])
+
+    def test_search_results_paginate_in_rank_order(self):
+        first = self.client.get(self.list_url, {"search": "flood", "page_size": 1})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(first.data["results"][0]["id"], self.flood.id)
+        self.assertEqual(second.data["results"][0]["id"], self.landslide.id)
+
+
+class CrisisStatsTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@test.com", password="pass123"
+        )
+        self.volunteer = User.objects.create_user(
+            username="vol", email="vol@test.com", password="pass123"
+        )
+        self.post = CrisisPost.objects.create(
+            title="Cyclone Remal",
+            description="Coastal damage",
+            post_type="national",
+            owner=self.owner,
+            status="approved",
+            funding_goal=1000,
+        )
+
+    def stats(self):
+        return CrisisStats.objects.get(crisis_post=self.post)
+
+    def test_new_post_gets_empty_stats(self):
+        stats = self.stats()
+        self.assertEqual(stats.total_money, 0)
+        self.assertEqual(stats.total_updates, 0)
+
+    def test_counters_follow_writes(self):
+        money = DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("250.00"))
+        DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("50.50"))
+        DonationGoods.objects.create(crisis_post=self.post, item_description="10 blankets")
+        application = VolunteerApplication.objects.create(user=self.volunteer, crisis_post=self.post)
+        update = CrisisUpdate.objects.create(
+            crisis_post=self.post, created_by=self.owner, title="Day 1", description="..."
+        )
+        Comment.objects.create(update=update, user=self.volunteer, text="On my way")
+
+        stats = self.stats()
+        self.assertEqual(stats.total_money, Decimal("300.50"))
+        self.assertEqual(stats.total_donors_money, 2)
+        self.assertEqual(stats.total_goods_donations, 1)
+        self.assertEqual(stats.pending_volunteers, 1)
+        self.assertEqual(stats.total_updates, 1)
+        self.assertEqual(stats.total_comments, 1)
+        self.assertEqual(stats.funding_progress, 30.05)
+
+        application.status = "approved"
+        application.save()
+        money.delete()
+        update.delete()
+
+        stats = self.stats()
+        self.assertEqual(stats.approved_volunteers, 1)
+        self.assertEqual(stats.pending_volunteers, 0)
+        self.assertEqual(stats.total_money, Decimal("50.50"))
+        self.assertEqual(stats.total_donors_money, 1)
+        self.assertEqual(stats.total_updates, 0)
+        self.assertEqual(stats.total_comments, 0)
+
+    def test_edits_move_counters(self):
+        other = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.owner, status="approved"
+        )
+        money = DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("100.00"))
+        goods = DonationGoods.objects.create(crisis_post=self.post, item_description="10 blankets")
+        update = CrisisUpdate.objects.create(
+            crisis_post=self.post, created_by=self.owner, title="Day 1", description="..."
+        )
+        Comment.objects.create(update=update, user=self.volunteer, text="On my way")
+
+        money.amount = Decimal("40.00")
+        money.save()
+        self.assertEqual(self.stats().total_money, Decimal("40.00"))
+
+        money.crisis_post = goods.crisis_post = update.crisis_post = other
+        money.save()
+        goods.save()
+        update.save()
+
+        fields = ("total_money", "total_donors_money", "total_goods_donations", "total_updates", "total_comments")
+
+        def counters(post):
+            return CrisisStats.objects.filter(crisis_post=post).values_list(*fields).get()
+
+        self.assertEqual(counters(self.post), (0, 0, 0, 0, 0))
+        self.assertEqual(counters(other), (Decimal("40.00"), 1, 1, 1, 1))
+
+    def test_deferred_status_is_not_loaded(self):
+        VolunteerApplication.objects.create(user=self.volunteer, crisis_post=self.post, status="approved")
+        with self.assertNumQueries(2):
+            applications = list(VolunteerApplication.objects.only("id", "crisis_post_id", "user_id"))
+            posts = list(CrisisPost.objects.only("id", "title"))
+        self.assertEqual((len(applications), len(posts)), (1, 1))
+
+        with CaptureQueriesContext(connection) as ctx:
+            posts[0].title = "Renamed"
+            posts[0].save(update_fields=["title"])
+        self.assertFalse([query for query in ctx.captured_queries if "status" in query["sql"]])
+
+        applications[0].delete()  # the counter it held is still taken back
+        self.assertEqual(self.stats().approved_volunteers, 0)
+
+    def test_migration_backfills_missing_stats(self):
+        from django.apps import apps
+        backfill = importlib.import_module("crisis.migrations.0008_backfill_crisis_stats").backfill_crisis_stats
+        DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("100.00"))
+        VolunteerApplication.objects.create(user=self.volunteer, crisis_post=self.post)
+        CrisisStats.objects.all().delete()
+
+        backfill(apps, None)
+
+        stats = self.stats()
+        self.assertEqual(stats.total_money, Decimal("100.00"))
+        self.assertEqual((stats.total_donors_money, stats.pending_volunteers), (1, 1))
+
+    def test_rebuild_command_matches_source_tables(self):
+        DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("100.00"))
+        VolunteerApplication.objects.create(user=self.volunteer, crisis_post=self.post, status="approved")
+        CrisisStats.objects.all().delete()
+
+        call_command("rebuild_crisis_stats", chunk_size=1, stdout=StringIO())
+
+        stats = self.stats()
+        self.assertEqual(stats.total_money, Decimal("100.00"))
+        self.assertEqual(stats.approved_volunteers, 1)
+
+    def test_detail_includes_stats_and_the_list_does_not(self):
+        DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("75.00"))
+
+        response = self.client.get(reverse("crisispost-detail", kwargs={"pk": self.post.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["stats"]["total_money"], "75.00")
+        self.assertNotIn("stats", self.client.get(reverse("crisispost-list")).data["results"][0])
+
+
+class ResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@test.com", password="pass123"
+        )
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@test.com", password="pass123"
+        )
+        self.post = CrisisPost.objects.create(
+            title="Flood in Feni", description="Rising water", post_type="national",
+            owner=self.owner, status="approved",
+        )
+        self.pending = CrisisPost.objects.create(
+            title="Landslide", description="Hill collapse", post_type="national",
+            owner=self.owner, status="pending",
+        )
+        self.feed_url = reverse("crisispost-list")
+        self.summary_url = reverse("crisis_donation_summary", kwargs={"crisis_id": self.post.id})
+
+    def titles(self, response):
+        return [item["title"] for item in response.json()["results"]]
+
+    def test_second_read_is_served_from_cache(self):
+        self.assertEqual(self.client.get(self.feed_url)["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.feed_url)
+        self.assertEqual(response["X-Cache"], "HIT")
+        # Only the ATOMIC_REQUESTS transaction is left
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("SELECT")])
+        self.assertEqual(self.titles(response), ["Flood in Feni"])
+
+    def test_visibility_classes_do_not_share_entries(self):
+        self.client.get(self.feed_url)
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.feed_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn("Landslide", self.titles(response))
+
+    def test_approve_invalidates_feed(self):
+        self.client.get(self.feed_url)
+        self.client.force_authenticate(self.admin)
+        self.client.post(reverse("crisispost-approve", kwargs={"pk": self.pending.id}))
+        self.client.force_authenticate(None)
+
+        response = self.client.get(self.feed_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn("Landslide", self.titles(response))
+
+    def test_donation_invalidates_only_its_summary(self):
+        other = CrisisPost.objects.create(
+            title="Cyclone", description="Coast", post_type="national", owner=self.owner, status="approved",
+        )
+        other_summary_url = reverse("crisis_donation_summary", kwargs={"crisis_id": other.id})
+        for url in (self.feed_url, self.summary_url, other_summary_url):
+            self.client.get(url)
+
+        DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("75.00"))
+
+        response = self.client.get(self.summary_url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["total_money"], 75.0)
+        self.assertEqual(self.client.get(other_summary_url)["X-Cache"], "HIT")
+        self.assertEqual(self.client.get(self.feed_url)["X-Cache"], "HIT")
+
+    def test_counter_changes_keep_the_feed_etag(self):
+        update = CrisisUpdate.objects.create(
+            crisis_post=self.post, created_by=self.owner, title="Day 1", description="..."
+        )
+        for change in (
+            lambda: DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("5.00")),
+            lambda: VolunteerApplication.objects.create(crisis_post=self.post, user=self.admin),
+            lambda: Comment.objects.create(update=update, user=self.owner, text="Boats needed"),
+        ):
+            etag = self.client.get(self.feed_url)["ETag"]
+            change()
+            response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(WEB_CONCURRENCY=2)
+    def test_process_local_cache_refused_with_several_workers(self):
+        with self.assertRaises(ImproperlyConfigured):
+            check_shared_cache()
+        with tempfile.TemporaryDirectory() as directory:
+            caches_setting = {"default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory,
+            }}
+            with override_settings(CACHES=caches_setting):
+                check_shared_cache()
+
+    def test_comment_invalidates_update_timeline(self):
+        update = CrisisUpdate.objects.create(
+            crisis_post=self.post, created_by=self.owner, title="Day 1", description="..."
+        )
+        url = reverse("crisis_updates_list", kwargs={"crisis_id": self.post.id})
+        self.client.get(url)
+        Comment.objects.create(update=update, user=self.owner, text="Boats needed")
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["total_comments"], 1)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            caches_setting = {"default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory,
+            }}
+            with override_settings(CACHES=caches_setting):
+                self.client.get(self.summary_url)
+                self.assertEqual(self.client.get(self.summary_url)["X-Cache"], "HIT")
+                DonationMoney.objects.create(crisis_post=self.post, amount=Decimal("10.00"))
+                self.assertEqual(self.client.get(self.summary_url)["X-Cache"], "MISS")
+
+    def test_matching_etag_gets_304_without_queries(self):
+        etag = self.client.get(self.summary_url)["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.summary_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("SELECT")])
+
+    def test_etag_changes_with_the_data(self):
+        detail_url = reverse("crisispost-detail", kwargs={"pk": self.post.id})
+        etag = self.client.get(detail_url)["ETag"]
+        PostSection.objects.create(post=self.post, section_type="needs", content="Dry food")
+
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_comment_edit_changes_update_detail_etag(self):
+        update = CrisisUpdate.objects.create(
+            crisis_post=self.post, created_by=self.owner, title="Day 1", description="..."
+        )
+        comment = Comment.objects.create(update=update, user=self.owner, text="Boats needed")
+        url = reverse("crisis_update_detail", kwargs={"pk": update.id})
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        comment.text = "Boats and life jackets needed"
+        comment.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class BulkModerationTests(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        # locking read, conditional UPDATE, events, queue cleanup + owners' posts,
+        # sync entries: the posts, then their contents (one UNION read, one INSERT)
+        "POST crisispost-bulk-approve": 8,
+        "POST bulk_approve_volunteers": 5,  # + one stats UPDATE per crisis
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="admin", email="admin@test.com", password="pass123")
+        self.owner = User.objects.create_user(username="owner", email="owner@test.com", password="pass123")
+        self.stranger = User.objects.create_user(username="stranger", email="s@test.com", password="pass123")
+        self.pending = [
+            CrisisPost.objects.create(title=f"Cyclone {i}", description="...", post_type="district", owner=self.owner)
+            for i in range(3)
+        ]
+        self.approved = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.owner, status="approved"
+        )
+        others = CrisisPost.objects.create(
+            title="Fire", description="...", post_type="district", owner=self.stranger, status="approved"
+        )
+        volunteers = [
+            User.objects.create_user(username=f"v{i}", email=f"v{i}@test.com", password="pass123") for i in range(3)
+        ]
+        self.applications = [
+            VolunteerApplication.objects.create(user=user, crisis_post=self.approved) for user in volunteers[:2]
+        ]
+        self.foreign = VolunteerApplication.objects.create(user=volunteers[2], crisis_post=others)
+
+    def test_bulk_approve_posts(self):
+        ids = [post.id for post in self.pending] + [self.approved.id, 99999]
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(
+            self.client.post(reverse("crisispost-bulk-approve"), {"ids": ids}, format="json").status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+        feed = APIClient()
+        self.assertEqual(len(feed.get(reverse("crisispost-list")).data["results"]), 2)
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse("crisispost-bulk-approve"), {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["outcome"] for row in response.data["results"]], ["approved"] * 3 + ["unchanged", "not_found"])
+        self.assertEqual(response.data["counts"], {"approved": 3, "unchanged": 1, "not_found": 1})
+        self.assertEqual(CrisisPost.objects.filter(status="approved").count(), 5)
+        self.assertEqual(ModerationEvent.objects.filter(to_status="approved", moderator=self.admin).count(), 3)
+        self.assertEqual(len(feed.get(reverse("crisispost-list")).data["results"]), 5)  # cached feed was invalidated
+
+        self.assertEqual(
+            self.client.post(reverse("crisispost-bulk-approve"), {"ids": []}, format="json").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_bulk_volunteer_moderation_checks_ownership_and_counts(self):
+        self.client.force_authenticate(self.owner)
+        ids = [application.id for application in self.applications] + [self.foreign.id]
+        response = self.client.post(reverse("bulk_approve_volunteers"), {"ids": ids}, format="json")
+        self.assertEqual([row["outcome"] for row in response.data["results"]], ["approved", "approved", "forbidden"])
+        self.assertEqual(VolunteerApplication.objects.get(pk=self.foreign.pk).status, "pending")
+        stats = CrisisStats.objects.get(crisis_post=self.approved)
+        self.assertEqual((stats.approved_volunteers, stats.pending_volunteers), (2, 0))
+
+        # A second moderator repeating the transition changes nothing
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse("bulk_approve_volunteers"), {"ids": ids[:2]}, format="json")
+        self.assertEqual(response.data["counts"], {"unchanged": 2})
+        self.assertEqual(ModerationEvent.objects.count(), 2)
+
+        response = self.client.post(reverse("reject_volunteer", kwargs={"pk": ids[0]}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats.refresh_from_db()
+        self.assertEqual((stats.approved_volunteers, ModerationEvent.objects.count()), (1, 3))
+
+    def test_concurrent_transition_rolls_back(self):
+        ids = [post.id for post in self.pending]
+        real_now = timezone.now
+
+        def moderated_meanwhile():
+            # Runs between the read and the UPDATE
+            CrisisPost.objects.filter(pk=ids[0]).update(status="approved")
+            return real_now()
+
+        self.client.force_authenticate(self.admin)
+        with patch("core.moderation.timezone.now", side_effect=moderated_meanwhile):
+            response = self.client.post(reverse("crisispost-bulk-approve"), {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(CrisisPost.objects.filter(pk__in=ids[1:], status="pending").count(), 2)
+        self.assertFalse(ModerationEvent.objects.exists())
+
+
+class ModerationQueueTests(ExplainPlanMixin, QueryBudgetMixin, APITestCase):
+    query_budgets = {"moderation_queue": 1}
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", email="admin@test.com", password="pass123")
+        self.other_admin = User.objects.create_superuser(username="admin2", email="admin2@test.com", password="pass123")
+        self.ngo = User.objects.create_user(username="ngo", email="ngo@test.com", password="pass123", role="ngo")
+        self.user = User.objects.create_user(username="user", email="user@test.com", password="pass123")
+        CrisisPost.objects.create(
+            title="Old spam", description="...", post_type="individual", owner=self.user, status="rejected"
+        )
+        CrisisPost.objects.create(
+            title="Flash flood in Sylhet town", description="...", post_type="district", location="Sylhet",
+            owner=self.ngo, status="approved",
+        )
+        self.individual = self.create("Medical help for my father", "individual", self.user)
+        self.national = self.create("Cyclone warning for the coast", "national", self.user)
+        self.ngo_post = self.create("Fire at Korail slum", "district", self.ngo)
+        self.duplicate = self.create("Flash flood in Sylhet", "district", self.user, location="Sylhet")
+
+    def create(self, title, post_type, owner, **fields):
+        return CrisisPost.objects.create(title=title, description="...", post_type=post_type, owner=owner, **fields)
+
+    def queue(self, **params):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse("moderation_queue"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["post"] for row in response.data["results"]]
+
+    def test_queue_is_ordered_by_priority(self):
+        self.assertEqual(self.queue(), [self.ngo_post.id, self.national.id, self.individual.id, self.duplicate.id])
+        self.assertIndexedPlan(reverse("moderation_queue"), "crisis_moderationqueueentry")
+        entry = ModerationQueueEntry.objects.get(post=self.duplicate)
+        self.assertEqual(entry.duplicate_of.title, "Flash flood in Sylhet town")
+        self.assertEqual(entry.reasons, {"post_type": 20, "rejected_posts": -10, "duplicate": -40})
+
+        # Waiting long enough outweighs the points
+        CrisisPost.objects.filter(pk=self.duplicate.pk).update(
+            created_at=timezone.now() - timedelta(minutes=80 * MINUTES_PER_POINT)
+        )
+        call_command("rebuild_moderation_queue", stdout=StringIO())
+        self.assertEqual(self.queue()[0], self.duplicate.id)
+
+    def test_moderating_leaves_the_queue_and_rescores_the_owner(self):
+        self.client.force_authenticate(self.admin)
+        self.client.post(reverse("crisispost-approve", kwargs={"pk": self.national.id}))
+        self.assertNotIn(self.national.id, self.queue())
+        self.assertEqual(ModerationQueueEntry.objects.get(post=self.individual).reasons["approved_posts"], 5)
+
+        self.ngo_post.status = "rejected"
+        self.ngo_post.save()
+        self.assertEqual(self.queue(), [self.individual.id, self.duplicate.id])
+
+    def test_claims_are_disjoint_leases(self):
+        self.client.force_authenticate(self.admin)
+        first = self.client.post(reverse("moderation_queue_claim"), {"limit": 2}, format="json").data
+        self.client.force_authenticate(self.other_admin)
+        second = self.client.post(reverse("moderation_queue_claim"), {"limit": 3}, format="json").data
+
+        first_ids = [row["post"] for row in first["results"]]
+        second_ids = [row["post"] for row in second["results"]]
+        self.assertEqual(first_ids, [self.ngo_post.id, self.national.id])
+        self.assertEqual(second_ids, [self.individual.id, self.duplicate.id])
+        self.assertEqual(self.queue(claimed="free"), [])
+
+        # Released and expired claims go back to the queue
+        self.client.force_authenticate(self.admin)
+        self.client.post(reverse("moderation_queue_release"), {"ids": first_ids[:1]}, format="json")
+        ModerationQueueEntry.objects.filter(post_id__in=second_ids).update(lease_expires_at=timezone.now())
+        self.assertEqual(self.queue(claimed="free"), [self.ngo_post.id, self.individual.id, self.duplicate.id])
+        self.assertEqual(self.queue(claimed="mine"), [self.national.id])
@@ -1,10 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CrisisPostViewSet
+from .views import (
+    CrisisPostViewSet,
+    ModerationQueueView,
+    ClaimModerationBatchView,
+    ReleaseModerationBatchView,
+)
 
 router = DefaultRouter()
 router.register(r"posts", CrisisPostViewSet, basename="crisispost")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("moderation-queue/", ModerationQueueView.as_view(), name="moderation_queue"),
+    path("moderation-queue/claim/", ClaimModerationBatchView.as_view(), name="moderation_queue_claim"),
+    path("moderation-queue/release/", ReleaseModerationBatchView.as_view(), name="moderation_queue_release"),
 ]
\ No newline at end of file
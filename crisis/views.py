@@ -1,15 +1,27 @@
-from rest_framework import viewsets, permissions, filters, status
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import generics, viewsets, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from .models import CrisisPost
-from .serializers import CrisisPostSerializer, CrisisPostListSerializer
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from . import moderation_queue
+from .models import CrisisPost, ModerationQueueEntry
+from .serializers import CrisisPostSerializer, CrisisPostListSerializer, ModerationQueueEntrySerializer
 from .permissions import IsOwnerOrReadOnly
+from .search import FullTextSearchFilter
+from core.cache import CachedResponseMixin
+from core.mixins import OptimizedQuerysetMixin
+from core.moderation import NOT_FOUND, BulkModerationSerializer, bulk_moderation_response
+from core.optimization import optimize_queryset
 
-class CrisisPostViewSet(viewsets.ModelViewSet):
+class CrisisPostViewSet(CachedResponseMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = CrisisPost.objects.all()
     serializer_class = CrisisPostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ["title", "description", "post_type", "location"]
     ordering_fields = ["created_at", "updated_at"]
     
@@ -32,14 +44,46 @@ class CrisisPostViewSet(viewsets.ModelViewSet):
             if status_filter:
                 queryset = queryset.filter(status=status_filter)
         
+        # Fetch several posts by ID: ?ids=3,7,12
+        if self.action == 'list' and self.requested_ids() is not None:
+            queryset = queryset.filter(id__in=self.requested_ids())
+        
         return queryset.order_by('-created_at')
     
+    def requested_ids(self):
+        """IDs from ?ids= (at most API_MAX_PAGE_SIZE), or None without the parameter"""
+        raw = self.request.query_params.get('ids')
+        if raw is None:
+            return None
+        ids = [part.strip() for part in raw.split(',') if part.strip()]
+        if not ids or not all(part.isdigit() for part in ids):
+            raise ValidationError({'ids': 'Expected comma-separated post IDs.'})
+        limit = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+        if len(ids) > limit:
+            raise ValidationError({'ids': f'At most {limit} IDs per request.'})
+        return sorted({int(part) for part in ids})
+    
+    def paginate_queryset(self, queryset):
+        # ?ids= is bounded by API_MAX_PAGE_SIZE: return every match as a plain list
+        if self.action == 'list' and self.requested_ids() is not None:
+            return None
+        return super().paginate_queryset(queryset)
+    
     def get_serializer_class(self):
         """Use lightweight serializer for list view"""
         if self.action == 'list':
             return CrisisPostListSerializer
         return CrisisPostSerializer
     
+    def get_cache_namespaces(self):
+        """Cache the public feed and post detail, nothing user-specific"""
+        if self.action == 'list':
+            ids = self.requested_ids()
+            return ['feed'] if ids is None else ['feed', *[f"post:{pk}" for pk in ids]]
+        if self.action == 'retrieve':
+            return [f"post:{self.kwargs['pk']}"]
+        return None
+    
     def perform_create(self, serializer):
         """Save post with current user as owner"""
         serializer.save(owner=self.request.user)
@@ -48,23 +92,90 @@ class CrisisPostViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
         """Admin approves a crisis post"""
-        post = self.get_object()
-        post.status = 'approved'
-        post.save()
+        self._moderate_one(pk, 'approved')
         return Response({'status': 'Post approved'}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def reject(self, request, pk=None):
         """Admin rejects a crisis post"""
-        post = self.get_object()
-        post.status = 'rejected'
-        post.save()
+        self._moderate_one(pk, 'rejected')
         return Response({'status': 'Post rejected'}, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'], url_path='bulk-approve', permission_classes=[permissions.IsAdminUser])
+    def bulk_approve(self, request):
+        """Admin approves many posts: {"ids": [...]}, per-ID outcomes"""
+        return self._bulk_moderate(request, 'approved')
+    
+    @action(detail=False, methods=['post'], url_path='bulk-reject', permission_classes=[permissions.IsAdminUser])
+    def bulk_reject(self, request):
+        """Admin rejects many posts: {"ids": [...]}, per-ID outcomes"""
+        return self._bulk_moderate(request, 'rejected')
+    
+    def _bulk_moderate(self, request, target):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return bulk_moderation_response(self._moderate(serializer.validated_data['ids'], target), target)
+    
+    def _moderate_one(self, pk, target):
+        if not str(pk).isdigit() or self._moderate([int(pk)], target)[int(pk)] == NOT_FOUND:
+            raise NotFound()
+    
+    def _moderate(self, ids, target):
+        outcomes, _ = moderation_queue.moderate_posts(ids, target, self.request.user)
+        return outcomes
+    
     # USER ACTIONS
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_posts(self, request):
         """Get current user's posts"""
         posts = CrisisPost.objects.filter(owner=request.user).order_by('-created_at')
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        posts = optimize_queryset(posts, self.get_serializer())
+        page = self.paginate_queryset(posts)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+# Moderation queue (staff): pending posts by priority; ?claimed=mine|free
+class ModerationQueueView(OptimizedQuerysetMixin, generics.ListAPIView):
+    serializer_class = ModerationQueueEntrySerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_ordering = ('sort_key',)
+    
+    def get_queryset(self):
+        queryset = ModerationQueueEntry.objects.all()
+        claimed = self.request.query_params.get("claimed")
+        if claimed == "mine":
+            queryset = queryset.filter(claimed_by=self.request.user, lease_expires_at__gte=timezone.now())
+        elif claimed == "free":
+            queryset = queryset.filter(Q(claimed_by__isnull=True) | Q(lease_expires_at__lt=timezone.now()))
+        return queryset
+
+
+# Lease the next batch of the queue: {"limit": n}; concurrent moderators get disjoint batches
+class ClaimModerationBatchView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    
+    def post(self, request):
+        try:
+            limit = int(request.data.get("limit", api_settings.PAGE_SIZE))
+        except (TypeError, ValueError):
+            raise ValidationError({"limit": ["Must be an integer."]})
+        if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+            raise ValidationError({"limit": [f"Must be between 1 and {settings.API_MAX_PAGE_SIZE}."]})
+        
+        entries = optimize_queryset(moderation_queue.claim(request.user, limit), ModerationQueueEntrySerializer())
+        entries = list(entries.order_by("sort_key", "id"))
+        return Response({
+            "lease_expires_at": entries[0].lease_expires_at if entries else None,
+            "results": ModerationQueueEntrySerializer(entries, many=True).data,
+        })
+
+
+# Hand claimed posts back before the lease runs out: {"ids": [post ids]}
+class ReleaseModerationBatchView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    
+    def post(self, request):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = moderation_queue.release(request.user, serializer.validated_data["ids"])
+        return Response({"released": released})
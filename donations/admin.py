@@ -1,14 +1,19 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Sum
-from .models import DonationMoney, DonationGoods
+from core.admin_tools import AutocompleteFilter, LargeTableAdminMixin
+from crisis.models import CrisisStats
+from .models import DonationMoney, DonationGoods, DonorStats, InventoryTotal, ProviderStatement, SupporterTotal
 
 @admin.register(DonationMoney)
-class DonationMoneyAdmin(admin.ModelAdmin):
-    list_display = ("id", "display_donor", "amount_display", "crisis_post", "payment_method", "donated_at")
-    list_filter = ("payment_method", "is_anonymous", "donated_at", "crisis_post")
+class DonationMoneyAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "display_donor", "amount_display", "crisis_post", "payment_method", "reconciliation_status", "donated_at")
+    list_filter = ("payment_method", "reconciliation_status", "is_anonymous", ("crisis_post", AutocompleteFilter))
+    list_select_related = ("donor", "crisis_post")
+    date_hierarchy = "donated_at"
+    change_list_template = "admin/donations/donationmoney/change_list.html"
     search_fields = ("donor__username", "donor_name", "donor_email", "transaction_id", "crisis_post__title")
-    readonly_fields = ("donated_at",)
+    readonly_fields = ("donated_at", "reconciliation_status", "settled_amount", "reconciled_at")
     ordering = ("-donated_at",)
     
     def display_donor(self, obj):
@@ -22,18 +27,20 @@ class DonationMoneyAdmin(admin.ModelAdmin):
     amount_display.short_description = "Amount (BDT)"
     amount_display.admin_order_field = "amount"
     
-    # Show total donations in changelist
+    # Show total donations in changelist, from the per-crisis counters (one row per crisis, not per donation)
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
-        total = DonationMoney.objects.aggregate(total=Sum('amount'))['total'] or 0
+        total = CrisisStats.objects.aggregate(total=Sum('total_money'))['total'] or 0
         extra_context['total_donations'] = f"৳ {total:,.2f}"
         return super().changelist_view(request, extra_context=extra_context)
 
 
 @admin.register(DonationGoods)
-class DonationGoodsAdmin(admin.ModelAdmin):
+class DonationGoodsAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "display_donor", "item_description_short", "crisis_post", "quantity", "donated_at")
-    list_filter = ("is_anonymous", "donated_at", "crisis_post")
+    list_filter = ("is_anonymous", ("crisis_post", AutocompleteFilter))
+    list_select_related = ("donor", "crisis_post")
+    date_hierarchy = "donated_at"
     search_fields = ("donor__username", "donor_name", "item_description", "crisis_post__title")
     readonly_fields = ("donated_at",)
     ordering = ("-donated_at",)
@@ -46,4 +53,42 @@ class DonationGoodsAdmin(admin.ModelAdmin):
     
     def item_description_short(self, obj):
         return obj.item_description[:50] + "..." if len(obj.item_description) > 50 else obj.item_description
-    item_description_short.short_description = "Items"
\ No newline at end of file
+    item_description_short.short_description = "Items"
+
+
+@admin.register(InventoryTotal)
+class InventoryTotalAdmin(admin.ModelAdmin):
+    list_display = ("crisis_post", "item", "unit", "received", "needed", "donations", "updated_at")
+    list_select_related = ("crisis_post",)
+    list_filter = ("unit",)
+    search_fields = ("item", "crisis_post__title")
+    readonly_fields = ("crisis_post", "item", "unit", "received", "needed", "donations", "updated_at")
+
+
+@admin.register(ProviderStatement)
+class ProviderStatementAdmin(admin.ModelAdmin):
+    list_display = (
+        "name", "rows_processed", "verified", "mismatched", "unmatched", "invalid", "duplicates",
+        "settled_from", "settled_until", "updated_at",
+    )
+    search_fields = ("name",)
+    readonly_fields = (
+        "payment_methods", "rows_processed", "verified", "mismatched", "unmatched", "invalid", "duplicates",
+        "settled_from", "settled_until", "created_at", "updated_at",
+    )
+
+
+@admin.register(DonorStats)
+class DonorStatsAdmin(admin.ModelAdmin):
+    list_display = ("user", "total_money", "money_donations", "goods_donations", "crises_supported", "last_donated_at")
+    list_select_related = ("user",)
+    search_fields = ("user__username",)
+    readonly_fields = ("user", "total_money", "money_donations", "goods_donations", "crises_supported", "last_donated_at", "updated_at")
+
+
+@admin.register(SupporterTotal)
+class SupporterTotalAdmin(admin.ModelAdmin):
+    list_display = ("display_name", "donor_key", "crisis_post", "amount", "donations", "updated_at")
+    list_select_related = ("crisis_post",)
+    search_fields = ("display_name", "donor_key", "crisis_post__title")
+    readonly_fields = ("crisis_post", "donor_key", "display_name", "amount", "donations", "updated_at")
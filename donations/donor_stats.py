@@ -0,0 +1,110 @@
+"""
+Per-user donation counters (DonorStats) behind `my-donations`.
+
+A new donation is one UPDATE of the donor's row; `crises_supported` only
+goes up when the donor has no other money or goods donation to that crisis,
+which the same UPDATE checks with two EXISTS subqueries on the
+(donor, donated_at) indexes. Deletes and edits (rare, admin-side) recompute
+the affected donors from the source tables, which also corrects
+`last_donated_at`. Every user gets a zeroed row when they sign up (and
+migration 0006 backfilled existing users), so reads and writes never have
+to create one.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, Exists, F, IntegerField, Max, OuterRef, Sum, Value, When
+from django.utils import timezone
+
+from .models import DonationGoods, DonationMoney, DonorStats
+
+COUNTER_FIELDS = ("total_money", "money_donations", "goods_donations", "crises_supported", "last_donated_at")
+
+
+def record_donation(donation):
+    """Count a new DonationMoney / DonationGoods for its donor"""
+    if donation.donor_id is None:
+        return
+    is_money = isinstance(donation, DonationMoney)
+    count_field = "money_donations" if is_money else "goods_donations"
+
+    # Any other donation by the same donor to the same crisis
+    others = {
+        model: model.objects.filter(donor_id=OuterRef("user_id"), crisis_post_id=donation.crisis_post_id)
+        for model in (DonationMoney, DonationGoods)
+    }
+    others[type(donation)] = others[type(donation)].exclude(pk=donation.pk)
+
+    changes = {
+        count_field: F(count_field) + 1,
+        "crises_supported": F("crises_supported") + Case(
+            When(Exists(others[DonationMoney]) | Exists(others[DonationGoods]), then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ),
+        "last_donated_at": donation.donated_at,
+    }
+    if is_money:
+        changes["total_money"] = F("total_money") + donation.amount
+
+    updated = DonorStats.objects.filter(user_id=donation.donor_id).update(updated_at=timezone.now(), **changes)
+    if not updated:
+        rebuild_donor_stats([donation.donor_id])  # row deleted by hand; the donation is already saved
+
+
+def compute_donor_stats(user_ids):
+    """Aggregate the counters for the given users straight from the donation tables"""
+    rows = {
+        user_id: {"total_money": Decimal(0), "money_donations": 0, "goods_donations": 0, "last_donated_at": None}
+        for user_id in user_ids
+    }
+    crises = defaultdict(set)
+
+    for model, count_field in ((DonationMoney, "money_donations"), (DonationGoods, "goods_donations")):
+        aggregates = {count_field: Count("id"), "last": Max("donated_at")}
+        if model is DonationMoney:
+            aggregates["total_money"] = Sum("amount")
+        queryset = model.objects.filter(donor_id__in=user_ids).order_by().values("donor_id").annotate(**aggregates)
+        for row in queryset:
+            stats = rows[row.pop("donor_id")]
+            last = row.pop("last")
+            if stats["last_donated_at"] is None or (last and last > stats["last_donated_at"]):
+                stats["last_donated_at"] = last
+            stats.update({key: value or 0 for key, value in row.items()})
+
+        pairs = model.objects.filter(donor_id__in=user_ids).order_by().values_list("donor_id", "crisis_post_id").distinct()
+        for user_id, crisis_post_id in pairs:
+            crises[user_id].add(crisis_post_id)
+
+    for user_id, stats in rows.items():
+        stats["crises_supported"] = len(crises[user_id])
+    return rows
+
+
+def rebuild_donor_stats(user_ids):
+    """Recompute and upsert the stats rows for the given users"""
+    user_ids = list(get_user_model().objects.filter(id__in=user_ids).values_list("id", flat=True))
+    if not user_ids:
+        return 0
+    now = timezone.now()
+    objs = [
+        DonorStats(user_id=user_id, updated_at=now, **counters)
+        for user_id, counters in compute_donor_stats(user_ids).items()
+    ]
+    DonorStats.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=[*COUNTER_FIELDS, "updated_at"],
+    )
+    return len(objs)
+
+
+def get_donor_stats(user):
+    """Return the stats row for a user, rebuilding it if it went missing"""
+    try:
+        return DonorStats.objects.get(user=user)
+    except DonorStats.DoesNotExist:
+        rebuild_donor_stats([user.id])
+        return DonorStats.objects.get(user=user)
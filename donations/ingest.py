@@ -0,0 +1,153 @@
+"""
+Bulk import of money donations from payment-provider settlement files.
+
+Rows are read lazily from CSV, NDJSON or a JSON array, validated with
+DonationImportRowSerializer (no per-row queries: crisis posts are checked
+against a preloaded set of approved IDs) and written with bulk_create,
+chunk by chunk, each chunk in its own transaction. Rows whose
+(payment_method, transaction_id) already exists are counted as duplicates,
+so re-importing a file is harmless. Invalid rows are reported and skipped.
+
+bulk_create bypasses the post_save signals, so each chunk applies its
+CrisisStats deltas and leaderboard totals (and with them the response cache
+invalidation) itself.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db import IntegrityError, transaction
+
+from core import sync
+from crisis.models import CrisisPost
+from crisis.stats import adjust_stats
+
+from . import leaderboard
+from .models import DonationMoney
+from .serializers import DonationImportRowSerializer
+
+FORMATS = {"csv": "csv", "json": "json", "ndjson": "ndjson", "jsonl": "ndjson"}  # file extension -> format
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)  # [{"row": n, "errors": {...}}], first MAX_REPORTED_ERRORS
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def as_dict(self):
+        return {"created": self.created, "duplicates": self.duplicates, "failed": self.failed, "errors": self.errors}
+
+
+def guess_format(filename):
+    return FORMATS.get(filename.rsplit(".", 1)[-1].lower()) if "." in filename else None
+
+
+def read_rows(stream, fmt):
+    """
+    Yield row dicts from a binary stream; only a JSON array is loaded whole.
+    An NDJSON line that does not parse is yielded as its ValueError.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(text)
+        elif fmt == "ndjson":
+            for line in text:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as exc:
+                        yield exc
+        elif fmt == "json":
+            yield from json.load(text)
+        else:
+            raise ValueError(f"Unsupported format {fmt!r}; use csv, json or ndjson.")
+    finally:
+        text.detach()  # leave closing the stream to the caller
+
+
+def import_donations(rows, chunk_size=500):
+    approved_ids = set(CrisisPost.objects.filter(status="approved").values_list("id", flat=True))
+    report = ImportReport()
+    chunk = []
+    for row_number, row in enumerate(rows, start=1):
+        chunk.append((row_number, row))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, approved_ids, report)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, approved_ids, report)
+    return report
+
+
+def _import_chunk(chunk, approved_ids, report):
+    context = {"approved_ids": approved_ids}
+    donations = {}  # (payment_method, transaction_id) -> DonationMoney
+    for row_number, row in chunk:
+        if not isinstance(row, dict):
+            message = f"Invalid JSON: {row}" if isinstance(row, ValueError) else "Expected an object."
+            report.add_error(row_number, {"non_field_errors": [message]})
+            continue
+        # Blank CSV cells mean "not given"
+        serializer = DonationImportRowSerializer(
+            data={key: value for key, value in row.items() if value not in ("", None)}, context=context
+        )
+        if not serializer.is_valid():
+            report.add_error(row_number, serializer.errors)
+            continue
+        data = serializer.validated_data
+        key = (data["payment_method"], data["transaction_id"])
+        if key in donations:
+            report.duplicates += 1
+            continue
+        donations[key] = DonationMoney(**data)
+
+    existing = set(
+        DonationMoney.objects.filter(
+            payment_method__in={method for method, _ in donations},
+            transaction_id__in={tx for _, tx in donations},
+            transaction_id__gt="",  # the partial index condition, so money_unique_transaction is used
+        )
+        .order_by()
+        .values_list("payment_method", "transaction_id")
+    )
+    for key in existing & donations.keys():
+        del donations[key]
+        report.duplicates += 1
+
+    try:
+        with transaction.atomic():
+            created = DonationMoney.objects.bulk_create(donations.values())
+            _apply_stats(created)
+    except IntegrityError:
+        # Another import or a live donation claimed one of these transaction IDs meanwhile
+        created = []
+        for donation in donations.values():
+            try:
+                with transaction.atomic():
+                    donation.save()
+                    created.append(donation)  # post_save keeps the stats for this path
+            except IntegrityError:
+                report.duplicates += 1
+    report.created += len(created)
+
+
+def _apply_stats(donations):
+    totals = defaultdict(lambda: [0, 0])
+    for donation in donations:
+        totals[donation.crisis_post_id][0] += donation.amount
+        totals[donation.crisis_post_id][1] += 1
+    for crisis_post_id, (amount, count) in totals.items():
+        adjust_stats(crisis_post_id, total_money=amount, total_donors_money=count)
+    leaderboard.apply_donations(donations)
+    sync.record_many(sync.DONATION_SUMMARY, [(crisis_post_id, crisis_post_id, None) for crisis_post_id in totals])
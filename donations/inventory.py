@@ -0,0 +1,245 @@
+"""
+Structured goods inventory.
+
+`parse_items()` turns free text such as "10 blankets, 5kg rice, 20 bottles
+water" into (item, unit, quantity) line items. Units are normalized (g -> kg,
+ml -> l, dozen -> pcs); containers such as bottles or bags stay their own unit,
+and an entry with only a unit ("10 boxes") counts the unit itself. The unit is
+the word next to the quantity whichever side the quantity is on, so "20
+bottles water" and "water bottles 20" are the same line item; an "x"
+multiplier ("10x blankets", "blankets x10") is dropped.
+
+Goods donations are parsed into GoodsLineItem rows when saved
+(donations.signals), and their quantities are added to / subtracted from the
+crisis' InventoryTotal rows with one UPDATE per crisis post, the same way
+CrisisStats is kept. The "resources" PostSections are parsed with the same parser into
+InventoryTotal.needed, so the inventory endpoint is one indexed read.
+"""
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from core.cache import invalidate
+from crisis.models import PostSection
+
+from .models import GoodsLineItem, InventoryTotal
+
+# alias -> (unit, factor to that unit)
+UNITS = {}
+for unit, factor, aliases in [
+    ("kg", 1, "kg kgs kilo kilos kilogram kilograms"),
+    ("kg", Decimal("0.001"), "g gm gms gram grams"),
+    ("kg", 1000, "ton tons tonne tonnes"),
+    ("l", 1, "l ltr ltrs litre litres liter liters"),
+    ("l", Decimal("0.001"), "ml"),
+    ("pcs", 1, "pc pcs piece pieces nos unit units item items"),
+    ("pcs", 12, "dozen dozens"),
+    ("packet", 1, "packet packets pack packs pkt pkts"),
+    ("bag", 1, "bag bags"),
+    ("box", 1, "box boxes"),
+    ("bottle", 1, "bottle bottles"),
+    ("carton", 1, "carton cartons"),
+    ("sack", 1, "sack sacks"),
+    ("set", 1, "set sets"),
+    ("pair", 1, "pair pairs"),
+    ("can", 1, "can cans tin tins"),
+]:
+    for alias in aliases.split():
+        UNITS[alias] = (unit, Decimal(factor))
+
+# Commas, semicolons, newlines and "and" / "&" / "+" separate entries; "1,000" does not
+SEPARATORS = re.compile(r",(?!(?<=\d,)\d{3}(?!\d))|[;\n]+|\s+(?:and|&|\+)\s+", re.IGNORECASE)
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)](?=\s+\D)|(?:needs?|needed|required|wanted)\s*:)\s*", re.IGNORECASE)
+QUANTITY = r"(?P<quantity>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+LEADING = re.compile(rf"^{QUANTITY}(?:\s*[x×](?=\s))?\s*(?P<rest>.*)$", re.IGNORECASE)  # "5kg rice", "10x blankets"
+TRAILING = re.compile(  # "rice 5kg", "rice: 5 kg", "blankets x 10", "blankets 10x"
+    rf"^(?P<rest>.*?)(?:\s*[:=×-]\s*|\s+x\s*|\s+){QUANTITY}\s*(?:[x×]|(?P<unit>[a-z]*))\.?$", re.IGNORECASE
+)
+# Inside an entry that starts with a quantity, another quantity starts the next one ("3 pairs shoes 2kg sugar")
+NEXT_QUANTITY = re.compile(r"\s+(?=\d[\d,.]*\s*[^\W\d_])")
+NOT_PLURAL = {"clothes", "gas", "series"}
+
+
+def normalize_item(text):
+    words = re.sub(r"[^a-z0-9 ]+", " ", text.lower()).split()
+    if words and words[0] == "of":
+        words = words[1:]
+    if not words:
+        return ""
+    last = words[-1]
+    if last not in NOT_PLURAL and len(last) > 3:
+        if last.endswith("ies"):
+            last = last[:-3] + "y"
+        elif last.endswith(("ches", "shes", "xes", "sses", "oes")) and not last.endswith("shoes"):
+            last = last[:-2]
+        elif last.endswith("s") and not last.endswith("ss"):
+            last = last[:-1]
+    return " ".join(words[:-1] + [last])[:100]
+
+
+def take_unit(words, index):
+    """(unit, factor, item words), taking the unit from words[index], the word next to the quantity"""
+    alias = words[index].lower().rstrip(".") if words else ""
+    if alias not in UNITS:
+        return "pcs", Decimal(1), words
+    unit, factor = UNITS[alias]
+    words = words[:]
+    del words[index]
+    return unit, factor, words or [unit]  # "10 boxes": the unit is the item
+
+
+def parse_part(part):
+    """(item, unit, quantity) for one list entry, or None if there is no item"""
+    part = LIST_MARKER.sub("", part).strip(" .")
+    unit, factor, quantity, words = "pcs", Decimal(1), None, part.split()
+
+    match = LEADING.match(part)
+    if match:
+        quantity = match["quantity"]
+        unit, factor, words = take_unit(match["rest"].split(), 0)
+    else:
+        match = TRAILING.match(part)
+        if match:
+            quantity = match["quantity"]
+            # "rice 5 kg": the word after the quantity; "water bottles 20": the one before it
+            after = [match["unit"]] if match["unit"] else []
+            unit, factor, words = take_unit(match["rest"].split() + after, -1)
+
+    item = normalize_item(" ".join(words))
+    if not item:
+        return None
+    return item, unit, None if quantity is None else Decimal(quantity.replace(",", "")) * factor
+
+
+def split_entries(text):
+    for part in SEPARATORS.split(text or ""):
+        part = LIST_MARKER.sub("", part).strip(" .")
+        if LEADING.match(part):
+            yield from NEXT_QUANTITY.split(part)
+        else:
+            yield part
+
+
+def parse_items(text, fallback_quantity=None):
+    """
+    Line items of a free-text list. `fallback_quantity` (DonationGoods.quantity)
+    fills in a single item written without an amount.
+    """
+    items = [item for item in map(parse_part, split_entries(text)) if item]
+    if len(items) == 1 and items[0][2] is None and fallback_quantity:
+        try:
+            items = [(items[0][0], items[0][1], Decimal(str(fallback_quantity).strip()))]
+        except InvalidOperation:
+            pass
+    return items
+
+
+# ------------------- Rollups -------------------
+def sync_donation(donation, created=False):
+    """Re-parse a goods donation and move its quantities in the rollups"""
+    if not created:
+        remove_donation(donation)
+    line_items = GoodsLineItem.objects.bulk_create([
+        GoodsLineItem(donation=donation, crisis_post_id=donation.crisis_post_id, item=item, unit=unit, quantity=quantity)
+        for item, unit, quantity in parse_items(donation.item_description, donation.quantity)
+    ])
+    apply_line_items(line_items, sign=1)
+
+
+def remove_donation(donation):
+    line_items = list(GoodsLineItem.objects.filter(donation=donation))
+    if line_items:
+        GoodsLineItem.objects.filter(donation=donation).delete()
+        apply_line_items(line_items, sign=-1)
+
+
+def apply_line_items(line_items, sign):
+    """
+    Add (sign=1) or subtract (sign=-1) line items: per crisis post, one INSERT
+    for missing rows and one UPDATE with a CASE per item, however many items.
+    Subtracting deletes the rows left without donations or a need.
+    """
+    deltas = defaultdict(lambda: defaultdict(lambda: [Decimal(0), 0]))  # crisis -> (item, unit) -> [qty, n]
+    for line in line_items:
+        delta = deltas[line.crisis_post_id][line.item, line.unit]
+        delta[0] += line.quantity or 0
+        delta[1] += 1
+
+    now = timezone.now()
+    for crisis_post_id, changes in deltas.items():
+        if sign > 0:
+            InventoryTotal.objects.bulk_create(
+                [InventoryTotal(crisis_post_id=crisis_post_id, item=item, unit=unit) for item, unit in changes],
+                ignore_conflicts=True,
+            )
+
+        def per_item(index, output_field):
+            return Case(
+                *[
+                    When(item=item, unit=unit, then=Value(sign * delta[index]))
+                    for (item, unit), delta in changes.items()
+                ],
+                default=Value(0),
+                output_field=output_field,
+            )
+
+        rows = InventoryTotal.objects.filter(crisis_post_id=crisis_post_id, item__in={item for item, _ in changes})
+        rows.update(
+            received=F("received") + per_item(0, DecimalField(max_digits=14, decimal_places=3)),
+            donations=F("donations") + per_item(1, IntegerField()),
+            updated_at=now,
+        )
+        if sign < 0:
+            rows.filter(donations__lte=0, needed__isnull=True).delete()
+        invalidate(f"inventory:{crisis_post_id}")
+
+
+def refresh_needs(crisis_post_id):
+    """Re-read the needs from the post's "resources" sections"""
+    needs = defaultdict(Decimal)
+    sections = PostSection.objects.filter(post_id=crisis_post_id, section_type="resources").values_list("content", flat=True)
+    for content in sections:
+        for item, unit, quantity in parse_items(content):
+            needs[item, unit] += quantity or 0
+
+    InventoryTotal.objects.filter(crisis_post_id=crisis_post_id, needed__isnull=False).update(needed=None)
+    InventoryTotal.objects.bulk_create(
+        [
+            InventoryTotal(crisis_post_id=crisis_post_id, item=item, unit=unit, needed=quantity)
+            for (item, unit), quantity in needs.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["crisis_post", "item", "unit"],
+        update_fields=["needed", "updated_at"],
+    )
+    InventoryTotal.objects.filter(crisis_post_id=crisis_post_id, donations=0, needed__isnull=True).delete()
+    invalidate(f"inventory:{crisis_post_id}")
+
+
+def rebuild_inventory(crisis_post_ids):
+    """Recompute the received totals from GoodsLineItem and the needs from the sections"""
+    crisis_post_ids = list(crisis_post_ids)
+    InventoryTotal.objects.filter(crisis_post_id__in=crisis_post_ids).update(received=0, donations=0)
+    totals = (
+        GoodsLineItem.objects.filter(crisis_post_id__in=crisis_post_ids)
+        .order_by()
+        .values("crisis_post_id", "item", "unit")
+        .annotate(received=Sum("quantity"), donations=Count("id"))
+    )
+    InventoryTotal.objects.bulk_create(
+        [
+            InventoryTotal(
+                crisis_post_id=row["crisis_post_id"], item=row["item"], unit=row["unit"],
+                received=row["received"] or 0, donations=row["donations"],
+            )
+            for row in totals
+        ],
+        update_conflicts=True,
+        unique_fields=["crisis_post", "item", "unit"],
+        update_fields=["received", "donations", "updated_at"],
+    )
+    for crisis_post_id in crisis_post_ids:
+        refresh_needs(crisis_post_id)
@@ -0,0 +1,149 @@
+"""
+Top supporters per crisis post and platform-wide.
+
+Every money donation adds to its supporter's SupporterTotal row, for its
+crisis post and for the global board (crisis_post = null), so the all-time
+top-K is an index range scan on (crisis_post, -amount). The 24h / 7d
+boards sum hourly SupporterBucket rows inside the window: the GROUP BY only
+sees the window's buckets, however long the history. Buckets older than
+the longest window are dropped by `manage.py purge_leaderboard_buckets`.
+
+Supporters are registered users, else guests grouped by email, else by
+phone. Anonymous donations are ranked as "Anonymous" under a separate key,
+so they never add to the supporter's named total.
+"""
+import re
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, DecimalField, F, IntegerField, Max, Q, Sum, Value, When
+from django.utils import timezone
+
+from core.cache import invalidate
+
+from .models import SupporterBucket, SupporterTotal
+
+WINDOWS = {"24h": timedelta(hours=24), "7d": timedelta(days=7)}
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+NON_DIGITS = re.compile(r"\D")
+UPDATE_BATCH_SIZE = 200  # keys per UPDATE, keeps the CASE and the parameter list small
+
+
+def supporter_key(donation):
+    if donation.donor_id:
+        key = f"user:{donation.donor_id}"
+    elif donation.donor_email:
+        key = f"email:{donation.donor_email.strip().lower()}"
+    elif donation.donor_phone and NON_DIGITS.sub("", donation.donor_phone):
+        key = "phone:" + NON_DIGITS.sub("", donation.donor_phone)
+    else:
+        key = f"donation:{donation.pk}"  # nothing to group a guest by
+    return f"anon:{key}" if donation.is_anonymous else key
+
+
+def supporter_name(donation):
+    if donation.is_anonymous:
+        return "Anonymous"
+    if donation.donor_id:
+        return donation.donor.username
+    return donation.donor_name or "Guest"
+
+
+def bucket_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def leaderboard_namespace(crisis_post_id):
+    return f"leaderboard:{crisis_post_id or 'all'}"
+
+
+# ------------------- Writes -------------------
+def apply_donations(donations, sign=1):
+    """Add (sign=1) or take back (sign=-1) money donations on both boards and their buckets"""
+    totals = defaultdict(lambda: [0, 0, None])  # (crisis_post_id, donor_key) -> [amount, count, name]
+    buckets = defaultdict(lambda: [0, 0, None])  # (crisis_post_id, donor_key, bucket) -> ...
+    horizon = timezone.now() - max(WINDOWS.values())
+    for donation in donations:
+        key = supporter_key(donation)
+        name = supporter_name(donation) if sign > 0 else None
+        targets = [totals[scope, key] for scope in (donation.crisis_post_id, None)]
+        if donation.donated_at > horizon:
+            hour = bucket_start(donation.donated_at)
+            targets += [buckets[scope, key, hour] for scope in (donation.crisis_post_id, None)]
+        for delta in targets:
+            delta[0] += sign * donation.amount
+            delta[1] += sign
+            delta[2] = name
+
+    _apply(SupporterTotal, ("crisis_post_id", "donor_key"), totals, insert=sign > 0)
+    _apply(SupporterBucket, ("crisis_post_id", "donor_key", "bucket"), buckets, insert=sign > 0)
+    if sign < 0:
+        keys = {key for _, key in totals}
+        SupporterTotal.objects.filter(donor_key__in=keys, donations__lte=0).delete()
+        SupporterBucket.objects.filter(donor_key__in=keys, donations__lte=0).delete()
+    invalidate(*{leaderboard_namespace(scope) for scope, _ in totals})
+
+
+def _apply(model, fields, deltas, insert):
+    """Same shape as donations.inventory.apply_line_items: INSERT missing rows, then one CASE UPDATE per batch"""
+    if not deltas:
+        return
+    if insert:
+        model.objects.bulk_create(
+            [model(display_name=name, **dict(zip(fields, key))) for key, (_, _, name) in deltas.items()],
+            ignore_conflicts=True,
+        )
+    items = list(deltas.items())
+    for start in range(0, len(items), UPDATE_BATCH_SIZE):
+        batch = items[start:start + UPDATE_BATCH_SIZE]
+        conditions = [(Q(**dict(zip(fields, key))), delta) for key, delta in batch]
+
+        def per_key(index, output_field, default):
+            return Case(
+                *[When(condition, then=Value(delta[index])) for condition, delta in conditions],
+                default=default,
+                output_field=output_field,
+            )
+
+        changes = {
+            "amount": F("amount") + per_key(0, DecimalField(max_digits=14, decimal_places=2), Value(0)),
+            "donations": F("donations") + per_key(1, IntegerField(), Value(0)),
+        }
+        if insert:
+            changes["display_name"] = per_key(2, model._meta.get_field("display_name"), F("display_name"))
+        model.objects.filter(reduce(or_, (condition for condition, _ in conditions))).update(**changes)
+
+
+def purge_buckets():
+    """Delete buckets no window reaches any more"""
+    deleted, _ = SupporterBucket.objects.filter(bucket__lt=timezone.now() - max(WINDOWS.values())).delete()
+    return deleted
+
+
+# ------------------- Reads -------------------
+def top_supporters(crisis_post_id=None, window=None, limit=DEFAULT_LIMIT):
+    """
+    [{"rank", "name", "amount", "donations"}] for one crisis post (None: all
+    crises), all-time or over a WINDOWS key counted to the hour.
+    """
+    if window is None:
+        rows = (
+            SupporterTotal.objects.filter(crisis_post_id=crisis_post_id, amount__gt=0)
+            .order_by("-amount", "id")
+            .values("display_name", "amount", "donations")[:limit]
+        )
+    else:
+        rows = (
+            SupporterBucket.objects.filter(crisis_post_id=crisis_post_id, bucket__gt=timezone.now() - WINDOWS[window])
+            .values("donor_key")
+            .annotate(amount=Sum("amount"), donations=Sum("donations"), display_name=Max("display_name"))
+            .filter(amount__gt=0)
+            .order_by("-amount", "donor_key")[:limit]
+        )
+    return [
+        {"rank": rank, "name": row["display_name"], "amount": float(row["amount"]), "donations": row["donations"]}
+        for rank, row in enumerate(rows, start=1)
+    ]
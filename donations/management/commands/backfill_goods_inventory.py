@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from crisis.models import CrisisPost
+from donations.inventory import parse_items, rebuild_inventory
+from donations.models import DonationGoods, GoodsLineItem
+
+
+class Command(BaseCommand):
+    help = 'Parse every goods donation into line items and rebuild the per-crisis inventory rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Donations parsed (and crisis posts rebuilt) per transaction (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+
+        parsed = self.reparse(chunk_size)
+        self.stdout.write(f'  parsed {parsed} goods donation(s)')
+
+        last_id = rebuilt = 0
+        while True:
+            ids = list(
+                CrisisPost.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                rebuild_inventory(ids)
+            rebuilt += len(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt goods inventory for {rebuilt} crisis post(s).'))
+
+    def reparse(self, chunk_size):
+        last_id = total = 0
+        while True:
+            donations = list(
+                DonationGoods.objects.filter(id__gt=last_id).order_by('id')
+                .only('crisis_post_id', 'item_description', 'quantity')[:chunk_size]
+            )
+            if not donations:
+                return total
+            with transaction.atomic():
+                GoodsLineItem.objects.filter(donation__in=donations).delete()
+                GoodsLineItem.objects.bulk_create([
+                    GoodsLineItem(
+                        donation=donation, crisis_post_id=donation.crisis_post_id,
+                        item=item, unit=unit, quantity=quantity,
+                    )
+                    for donation in donations
+                    for item, unit, quantity in parse_items(donation.item_description, donation.quantity)
+                ])
+            total += len(donations)
+            last_id = donations[-1].id
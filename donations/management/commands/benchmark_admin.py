@@ -0,0 +1,119 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from crisis.models import CrisisPost
+from donations.models import DonationMoney
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time the DonationMoney admin changelist as the table grows (runs in a transaction that is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+            help='Donation rows to measure at, ascending (default: 10000 100000 1000000)'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Requests per page; the best one is reported (default: 3)'
+        )
+        parser.add_argument(
+            '--crises', type=int, default=50,
+            help='Crisis posts the donations are spread over (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(sorted(options['sizes']), max(1, options['repeat']), max(1, options['crises']))
+                raise Rollback()
+        except Rollback:
+            pass
+        self.stdout.write(self.style.SUCCESS('✅ Admin changelist benchmark finished (benchmark data rolled back).'))
+
+    def run(self, sizes, repeat, crises):
+        User = get_user_model()
+        admin_user = User.objects.create_superuser('benchmark-admin', 'benchmark@example.com', None)
+        posts = [
+            CrisisPost.objects.create(
+                title=f'Benchmark crisis {index}', description='-', post_type='district',
+                owner=admin_user, status='approved',
+            ).pk
+            for index in range(crises)
+        ]
+        host = next((host for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost')
+        client = Client(HTTP_HOST=host)
+        client.force_login(admin_user)
+        url = reverse('admin:donations_donationmoney_changelist')
+        newest = timezone.now()
+
+        rows = 0
+        for size in sizes:
+            self.insert(rows, size, posts, newest)
+            rows = max(rows, size)
+            month = timezone.localtime(newest)
+            deep_page = min(100, rows // 100)
+            pages = {
+                'first page': {},
+                f'page {deep_page}': {'p': deep_page},
+                'one crisis': {'crisis_post__id__exact': posts[0]},
+                'year': {'donated_at__year': month.year},
+                'month': {'donated_at__year': month.year, 'donated_at__month': month.month},
+                'search': {'q': 'TX0000000042'},
+            }
+            self.stdout.write(f'  {rows:>8} donations:')
+            for label, params in pages.items():
+                elapsed, queries = self.best(client, url, params, repeat)
+                self.stdout.write(f'    {label:<12} {elapsed * 1000:8.1f} ms  {queries:>3} queries')
+
+    @staticmethod
+    def insert(start, stop, posts, newest):
+        """One donation a minute going back from now, round-robin over the crisis posts"""
+        field = DonationMoney._meta.get_field('donated_at')
+        field.auto_now_add = False  # keep the back-dated timestamps
+        try:
+            for chunk_start in range(start, stop, 10000):
+                DonationMoney.objects.bulk_create([
+                    DonationMoney(
+                        crisis_post_id=posts[index % len(posts)],
+                        donor_name=f'Donor {index}',
+                        amount=Decimal(100 + index % 5000),
+                        payment_method='bkash',
+                        transaction_id=f'TX{index:010d}',
+                        donated_at=newest - timedelta(minutes=index),
+                    )
+                    for index in range(chunk_start, min(chunk_start + 10000, stop))
+                ])
+        finally:
+            field.auto_now_add = True
+
+    @staticmethod
+    def best(client, url, params, repeat):
+        timings, queries = [], []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        for _ in range(repeat):
+            queries.clear()
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                response = client.get(url, params)
+                timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'GET {url} {params} returned {response.status_code}')
+        return min(timings), len(queries)
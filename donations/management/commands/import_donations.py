@@ -0,0 +1,44 @@
+import csv
+import sys
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.ingest import FORMATS, guess_format, import_donations, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import money donations from a payment-provider settlement file (CSV, JSON or NDJSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Settlement file, or - for stdin')
+        parser.add_argument(
+            '--format', choices=sorted(set(FORMATS.values())),
+            help='File format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.DONATION_IMPORT_CHUNK_SIZE,
+            help='Rows validated and inserted per transaction (default: DONATION_IMPORT_CHUNK_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        if fmt is None:
+            raise CommandError('Cannot tell the file format from its name; pass --format.')
+
+        try:
+            with (open(path, 'rb') if path != '-' else nullcontext(sys.stdin.buffer)) as stream:
+                report = import_donations(read_rows(stream, fmt), chunk_size=max(1, options['chunk_size']))
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+
+        for error in report.errors:
+            self.stderr.write(f"  row {error['row']}: {error['errors']}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'  ... and {report.failed - len(report.errors)} more invalid row(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Imported {report.created} donation(s); skipped {report.duplicates} duplicate(s) '
+            f'and {report.failed} invalid row(s).'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from donations.leaderboard import purge_buckets
+
+
+class Command(BaseCommand):
+    help = 'Delete hourly leaderboard buckets older than the longest leaderboard window'
+
+    def handle(self, *args, **options):
+        deleted = purge_buckets()
+        self.stdout.write(self.style.SUCCESS(f'✅ Purged {deleted} expired leaderboard bucket(s).'))
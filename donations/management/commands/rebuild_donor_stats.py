@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from donations.donor_stats import rebuild_donor_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user DonorStats counters from the money and goods donation tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of users recomputed per transaction (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        User = get_user_model()
+        last_id = 0
+        total = 0
+
+        while True:
+            ids = list(
+                User.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                total += rebuild_donor_stats(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'  rebuilt {total} user(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt donation stats for {total} user(s).'))
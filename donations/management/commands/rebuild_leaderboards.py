@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from donations.leaderboard import apply_donations
+from donations.models import DonationMoney, SupporterBucket, SupporterTotal
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the top-supporter leaderboards (SupporterTotal / SupporterBucket) from the money donations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of donations applied per transaction (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        # Donations made while this runs are added by the post_save signal; stop before them
+        max_id = DonationMoney.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        SupporterTotal.objects.all().delete()
+        SupporterBucket.objects.all().delete()
+        last_id = 0
+        total = 0
+
+        while True:
+            chunk = list(
+                DonationMoney.objects.filter(id__gt=last_id, id__lte=max_id)
+                .select_related('donor')
+                .only('crisis_post_id', 'amount', 'donated_at', 'is_anonymous', 'donor_name',
+                      'donor_email', 'donor_phone', 'donor__username')
+                .order_by('id')[:chunk_size]
+            )
+            if not chunk:
+                break
+            with transaction.atomic():
+                apply_donations(chunk)
+            last_id = chunk[-1].id
+            total += len(chunk)
+            self.stdout.write(f'  applied {total} donation(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt leaderboards from {total} donation(s).'))
@@ -0,0 +1,65 @@
+import csv
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.ingest import FORMATS, guess_format, read_rows
+from donations.models import DonationMoney
+from donations.reconciliation import reconcile_statement
+
+
+class Command(BaseCommand):
+    help = 'Match money donations against a payment-provider statement; re-runs only process new rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Statement file, or - for stdin')
+        parser.add_argument(
+            '--name',
+            help='Statement identity used to resume re-runs (default: the file path)'
+        )
+        parser.add_argument(
+            '--format', choices=sorted(set(FORMATS.values())),
+            help='File format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--payment-method', choices=[method for method, _ in DonationMoney.PAYMENT_METHOD_CHOICES],
+            help='Payment method for rows without a payment_method column'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Statement rows joined per query and transaction (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        name = options['name'] or path
+        if path == '-' and not options['name']:
+            raise CommandError('Pass --name when reading a statement from stdin.')
+        fmt = options['format'] or guess_format(path)
+        if fmt is None:
+            raise CommandError('Cannot tell the file format from its name; pass --format.')
+
+        try:
+            with (open(path, 'rb') if path != '-' else nullcontext(sys.stdin.buffer)) as stream:
+                report = reconcile_statement(
+                    name, read_rows(stream, fmt),
+                    payment_method=options['payment_method'],
+                    chunk_size=max(1, options['chunk_size']),
+                )
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+
+        self.stdout.write(
+            f'  {report.rows} new row(s), {report.skipped} already processed: '
+            f'{report.verified} verified, {report.mismatched} mismatched, '
+            f'{report.unmatched} without a donation, {report.invalid} invalid, '
+            f'{report.duplicates} duplicate(s)'
+        )
+        if report.settled_from is None:
+            self.stdout.write(self.style.WARNING(
+                '  The statement has no settled_at dates, so no donation was marked missing.'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Reconciled statement "{name}"; {report.missing} donation(s) now marked missing.'
+        ))
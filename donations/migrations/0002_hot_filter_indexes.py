@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0005_hot_filter_indexes'),
+        ('donations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationgoods',
+            index=models.Index(fields=['crisis_post', '-donated_at', '-id'], name='goods_crisis_donated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationgoods',
+            index=models.Index(fields=['donor', '-donated_at', '-id'], name='goods_donor_donated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationmoney',
+            index=models.Index(fields=['crisis_post', '-donated_at', '-id'], name='money_crisis_donated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationmoney',
+            index=models.Index(fields=['donor', '-donated_at', '-id'], name='money_donor_donated_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def tag_duplicate_transactions(apps, schema_editor):
+    """Keep the first donation per (payment_method, transaction_id); suffix the rest so they stay traceable"""
+    DonationMoney = apps.get_model('donations', 'DonationMoney')
+    previous = None
+    rows = (
+        DonationMoney.objects.filter(transaction_id__gt='')
+        .order_by('payment_method', 'transaction_id', 'id')
+        .values_list('id', 'payment_method', 'transaction_id')
+    )
+    for pk, method, transaction_id in rows.iterator():
+        if (method, transaction_id) == previous:
+            DonationMoney.objects.filter(pk=pk).update(transaction_id=f'{transaction_id[:80]}#dup-{pk}')
+        previous = (method, transaction_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0006_crisispost_banner_image_variants'),
+        ('donations', '0002_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(tag_duplicate_transactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='donationmoney',
+            constraint=models.UniqueConstraint(condition=models.Q(('transaction_id__gt', '')), fields=('payment_method', 'transaction_id'), name='money_unique_transaction', violation_error_message='This transaction ID has already been used.'),
+        ),
+    ]
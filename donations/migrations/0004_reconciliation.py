@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0006_crisispost_banner_image_variants'),
+        ('donations', '0003_unique_transaction_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('payment_methods', models.JSONField(default=list)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('verified', models.PositiveIntegerField(default=0)),
+                ('mismatched', models.PositiveIntegerField(default=0)),
+                ('unmatched', models.PositiveIntegerField(default=0)),
+                ('invalid', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='donationmoney',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='donationmoney',
+            name='reconciliation_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('verified', 'Verified'), ('mismatched', 'Mismatched'), ('missing', 'Missing')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='donationmoney',
+            name='settled_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='donationmoney',
+            index=models.Index(fields=['crisis_post', 'reconciliation_status'], name='money_crisis_recon_idx'),
+        ),
+    ]
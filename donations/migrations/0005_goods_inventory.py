@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0006_crisispost_banner_image_variants'),
+        ('donations', '0004_reconciliation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoodsLineItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item', models.CharField(max_length=100)),
+                ('unit', models.CharField(max_length=20)),
+                ('quantity', models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True)),
+                ('crisis_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='crisis.crisispost')),
+                ('donation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='donations.donationgoods')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item', models.CharField(max_length=100)),
+                ('unit', models.CharField(max_length=20)),
+                ('received', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('donations', models.PositiveIntegerField(default=0)),
+                ('needed', models.DecimalField(blank=True, decimal_places=3, max_digits=14, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('crisis_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='crisis.crisispost')),
+            ],
+            options={
+                'ordering': ['item', 'unit'],
+                'constraints': [models.UniqueConstraint(fields=('crisis_post', 'item', 'unit'), name='inventory_unique_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill_donor_stats(apps, schema_editor):
+    """One stats row per existing user; new users get theirs when they sign up"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    DonorStats = apps.get_model('donations', 'DonorStats')
+    DonationMoney = apps.get_model('donations', 'DonationMoney')
+    DonationGoods = apps.get_model('donations', 'DonationGoods')
+
+    rows = {pk: DonorStats(user_id=pk) for pk in User.objects.values_list('pk', flat=True).iterator()}
+    crises = {}
+    for model, count_field in ((DonationMoney, 'money_donations'), (DonationGoods, 'goods_donations')):
+        aggregates = {'count': Count('id'), 'last': Max('donated_at')}
+        if model is DonationMoney:
+            aggregates['total'] = Sum('amount')
+        for row in model.objects.filter(donor__isnull=False).order_by().values('donor_id').annotate(**aggregates):
+            stats = rows[row['donor_id']]
+            setattr(stats, count_field, row['count'])
+            if model is DonationMoney:
+                stats.total_money = row['total'] or 0
+            if stats.last_donated_at is None or row['last'] > stats.last_donated_at:
+                stats.last_donated_at = row['last']
+        pairs = model.objects.filter(donor__isnull=False).order_by().values_list('donor_id', 'crisis_post_id').distinct()
+        for donor_id, crisis_post_id in pairs.iterator():
+            crises.setdefault(donor_id, set()).add(crisis_post_id)
+
+    for donor_id, crisis_post_ids in crises.items():
+        rows[donor_id].crises_supported = len(crisis_post_ids)
+    DonorStats.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_outgoingemail'),
+        ('donations', '0005_goods_inventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='donation_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_money', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('money_donations', models.PositiveIntegerField(default=0)),
+                ('goods_donations', models.PositiveIntegerField(default=0)),
+                ('crises_supported', models.PositiveIntegerField(default=0)),
+                ('last_donated_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Donor Stats',
+                'verbose_name_plural': 'Donor Stats',
+            },
+        ),
+        migrations.RunPython(backfill_donor_stats, migrations.RunPython.noop),
+    ]
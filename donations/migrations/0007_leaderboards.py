@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0006_crisispost_banner_image_variants'),
+        ('donations', '0006_donor_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupporterBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('donor_key', models.CharField(max_length=280)),
+                ('display_name', models.CharField(max_length=150)),
+                ('bucket', models.DateTimeField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('donations', models.PositiveIntegerField(default=0)),
+                ('crisis_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='crisis.crisispost')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['crisis_post', 'bucket'], name='supporter_bucket_window_idx'), models.Index(fields=['bucket'], name='supporter_bucket_purge_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('crisis_post__isnull', False)), fields=('crisis_post', 'donor_key', 'bucket'), name='supporter_bucket_unique_crisis'), models.UniqueConstraint(condition=models.Q(('crisis_post__isnull', True)), fields=('donor_key', 'bucket'), name='supporter_bucket_unique_global')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SupporterTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('donor_key', models.CharField(max_length=280)),
+                ('display_name', models.CharField(max_length=150)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('donations', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('crisis_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='crisis.crisispost')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['crisis_post', '-amount', 'id'], name='supporter_total_rank_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('crisis_post__isnull', False)), fields=('crisis_post', 'donor_key'), name='supporter_total_unique_crisis'), models.UniqueConstraint(condition=models.Q(('crisis_post__isnull', True)), fields=('donor_key',), name='supporter_total_unique_global')],
+            },
+        ),
+    ]
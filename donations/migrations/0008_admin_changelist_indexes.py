@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0007_moderation_queue'),
+        ('donations', '0007_leaderboards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationgoods',
+            index=models.Index(fields=['-donated_at', '-id'], name='goods_donated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationmoney',
+            index=models.Index(fields=['-donated_at', '-id'], name='money_donated_idx'),
+        ),
+    ]
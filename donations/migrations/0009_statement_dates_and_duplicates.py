@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0008_backfill_crisis_stats'),
+        ('donations', '0008_admin_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='providerstatement',
+            name='duplicates',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='providerstatement',
+            name='settled_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='providerstatement',
+            name='settled_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='donationmoney',
+            index=models.Index(fields=['reconciliation_status', 'payment_method', 'donated_at'], name='money_recon_method_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from crisis.models import CrisisPost
+from core.hints import query_hints
 
 USER = settings.AUTH_USER_MODEL
 
@@ -13,6 +14,12 @@ class DonationMoney(models.Model):
         ("card", "Credit/Debit Card"),
         ("other", "Other"),
     )
+    RECONCILIATION_STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("verified", "Verified"),  # settled for the same amount
+        ("mismatched", "Mismatched"),  # settled for a different amount
+        ("missing", "Missing"),  # not on any provider statement after the grace period
+    )
     
     crisis_post = models.ForeignKey(CrisisPost, on_delete=models.CASCADE, related_name="money_donations")
     donor = models.ForeignKey(USER, on_delete=models.SET_NULL, null=True, blank=True, related_name="money_donations")
@@ -28,14 +35,37 @@ class DonationMoney(models.Model):
     is_anonymous = models.BooleanField(default=False)  # Hide donor name publicly
     donated_at = models.DateTimeField(auto_now_add=True)
     
+    # Set by donations.reconciliation against provider statements
+    reconciliation_status = models.CharField(max_length=10, choices=RECONCILIATION_STATUS_CHOICES, default="pending")
+    settled_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         ordering = ['-donated_at']
+        indexes = [
+            models.Index(fields=['crisis_post', '-donated_at', '-id'], name='money_crisis_donated_idx'),
+            models.Index(fields=['donor', '-donated_at', '-id'], name='money_donor_donated_idx'),
+            models.Index(fields=['crisis_post', 'reconciliation_status'], name='money_crisis_recon_idx'),
+            models.Index(fields=['-donated_at', '-id'], name='money_donated_idx'),  # admin changelist order / date drilldown
+            # donations.reconciliation.mark_missing: pending donations of a provider within a statement's dates
+            models.Index(fields=['reconciliation_status', 'payment_method', 'donated_at'], name='money_recon_method_idx'),
+        ]
+        constraints = [
+            # A bKash/Nagad/... transaction backs one donation; also serves CreateMoneyDonationView's retry lookup
+            models.UniqueConstraint(
+                fields=['payment_method', 'transaction_id'],
+                condition=models.Q(transaction_id__gt=''),
+                name='money_unique_transaction',
+                violation_error_message="This transaction ID has already been used.",
+            ),
+        ]
     
     def __str__(self):
         name = self.display_name
         return f"{name} donated {self.amount} BDT to {self.crisis_post.title}"
     
     @property
+    @query_hints("is_anonymous", "donor__username", "donor_name")
     def display_name(self):
         """Return donor name or 'Anonymous' if hidden"""
         if self.is_anonymous:
@@ -63,16 +93,168 @@ class DonationGoods(models.Model):
     class Meta:
         ordering = ['-donated_at']
         verbose_name_plural = "Donation Goods"
+        indexes = [
+            models.Index(fields=['crisis_post', '-donated_at', '-id'], name='goods_crisis_donated_idx'),
+            models.Index(fields=['donor', '-donated_at', '-id'], name='goods_donor_donated_idx'),
+            models.Index(fields=['-donated_at', '-id'], name='goods_donated_idx'),  # admin changelist order / date drilldown
+        ]
     
     def __str__(self):
         name = self.display_name
         return f"{name} donated goods to {self.crisis_post.title}"
     
     @property
+    @query_hints("is_anonymous", "donor__username", "donor_name")
     def display_name(self):
         """Return donor name or 'Anonymous' if hidden"""
         if self.is_anonymous:
             return "Anonymous"
         if self.donor:
             return self.donor.username
-        return self.donor_name or "Anonymous"
\ No newline at end of file
+        return self.donor_name or "Anonymous"
+
+
+class GoodsLineItem(models.Model):
+    """One item parsed from DonationGoods.item_description (see donations/inventory.py)"""
+    donation = models.ForeignKey(DonationGoods, on_delete=models.CASCADE, related_name="line_items")
+    crisis_post = models.ForeignKey(CrisisPost, on_delete=models.CASCADE, related_name="+")  # copied for rollups
+    item = models.CharField(max_length=100)
+    unit = models.CharField(max_length=20)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True)  # None: no amount given
+    
+    def __str__(self):
+        return f"{self.quantity or '?'} {self.unit} {self.item}"
+
+
+class InventoryTotal(models.Model):
+    """
+    Per-crisis goods received (sum of GoodsLineItem) next to the needs listed in
+    the post's "resources" sections. Maintained incrementally by donations.inventory,
+    rebuild with `manage.py backfill_goods_inventory`.
+    """
+    crisis_post = models.ForeignKey(CrisisPost, on_delete=models.CASCADE, related_name="inventory")
+    item = models.CharField(max_length=100)
+    unit = models.CharField(max_length=20)
+    received = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    donations = models.PositiveIntegerField(default=0)
+    needed = models.DecimalField(max_digits=14, decimal_places=3, null=True, blank=True)  # None: not listed
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ["item", "unit"]
+        constraints = [
+            # Also the index the inventory endpoint reads in order
+            models.UniqueConstraint(fields=["crisis_post", "item", "unit"], name="inventory_unique_item"),
+        ]
+    
+    def __str__(self):
+        return f"{self.crisis_post_id}: {self.received}/{self.needed or '-'} {self.unit} {self.item}"
+
+
+class ProviderStatement(models.Model):
+    """
+    A payment-provider statement reconciled by `manage.py reconcile_donations`.
+    Re-runs with the same name resume after `rows_processed`.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    payment_methods = models.JSONField(default=list)
+    rows_processed = models.PositiveIntegerField(default=0)
+    verified = models.PositiveIntegerField(default=0)
+    mismatched = models.PositiveIntegerField(default=0)
+    unmatched = models.PositiveIntegerField(default=0)  # settled transactions with no donation
+    invalid = models.PositiveIntegerField(default=0)
+    duplicates = models.PositiveIntegerField(default=0)  # repeated transaction lines; the first one counts
+    # Settlement dates the statement covers; donations are only marked missing within them
+    settled_from = models.DateTimeField(null=True, blank=True)
+    settled_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.rows_processed} rows)"
+
+
+class DonorStats(models.Model):
+    """
+    Lifetime donation counters for one user, shown by `my-donations`.
+    Kept in sync by donations.donor_stats, rebuild with `manage.py rebuild_donor_stats`.
+    """
+    user = models.OneToOneField(USER, on_delete=models.CASCADE, primary_key=True, related_name="donation_stats")
+    total_money = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    money_donations = models.PositiveIntegerField(default=0)
+    goods_donations = models.PositiveIntegerField(default=0)
+    crises_supported = models.PositiveIntegerField(default=0)  # distinct crisis posts, money or goods
+    last_donated_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Donor Stats"
+        verbose_name_plural = "Donor Stats"
+    
+    def __str__(self):
+        return f"Donation stats for {self.user_id}"
+    
+    @property
+    def total_donations(self):
+        return self.money_donations + self.goods_donations
+
+
+class SupporterTotal(models.Model):
+    """
+    Money given by one supporter to one crisis post, or platform-wide when
+    `crisis_post` is null. The (crisis_post, -amount) index is the top-K
+    leaderboard; rows are kept by donations.leaderboard on every donation.
+    """
+    crisis_post = models.ForeignKey(CrisisPost, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    donor_key = models.CharField(max_length=280)  # user:<id>, email:<address>, phone:<digits>; "anon:" prefix when hidden
+    display_name = models.CharField(max_length=150)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    donations = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=["crisis_post", "-amount", "id"], name="supporter_total_rank_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["crisis_post", "donor_key"], condition=models.Q(crisis_post__isnull=False),
+                name="supporter_total_unique_crisis",
+            ),
+            models.UniqueConstraint(
+                fields=["donor_key"], condition=models.Q(crisis_post__isnull=True),
+                name="supporter_total_unique_global",
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.display_name}: {self.amount} BDT ({self.crisis_post_id or 'all crises'})"
+
+
+class SupporterBucket(models.Model):
+    """Per-hour partial sums of SupporterTotal, for the 24h / 7d leaderboards"""
+    crisis_post = models.ForeignKey(CrisisPost, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    donor_key = models.CharField(max_length=280)
+    display_name = models.CharField(max_length=150)
+    bucket = models.DateTimeField()  # start of the hour
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    donations = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=["crisis_post", "bucket"], name="supporter_bucket_window_idx"),
+            models.Index(fields=["bucket"], name="supporter_bucket_purge_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["crisis_post", "donor_key", "bucket"], condition=models.Q(crisis_post__isnull=False),
+                name="supporter_bucket_unique_crisis",
+            ),
+            models.UniqueConstraint(
+                fields=["donor_key", "bucket"], condition=models.Q(crisis_post__isnull=True),
+                name="supporter_bucket_unique_global",
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.display_name}: {self.amount} BDT at {self.bucket:%Y-%m-%d %H:00}"
@@ -0,0 +1,194 @@
+"""
+Reconcile money donations against payment-provider statements.
+
+Statement rows (payment_method, transaction_id, amount, settled_at) are streamed
+(donations.ingest.read_rows) and joined in fixed-size blocks: each block
+becomes a hash table keyed by (payment_method, transaction_id) and is probed
+with one query on the money_unique_transaction index, so memory is bounded
+by the block size whatever the statement length.
+
+Matched donations become `verified` (same amount) or `mismatched`
+(`settled_amount` records what the provider paid). Each block commits
+together with the statement's `rows_processed`, so re-running the same
+statement only processes rows appended since (or after a crash). A
+transaction listed twice in a run keeps its first line and is counted
+under `duplicates`.
+
+Finally, donations for the statement's payment methods that are still
+`pending` are marked `missing` if they were made within the statement's
+settlement dates (`settled_at`, a date or datetime) and at least
+RECONCILIATION_GRACE_HOURS before its last one. A statement without dates
+marks nothing missing, and a later statement can still verify them.
+"""
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import DonationMoney, ProviderStatement
+
+STATUSES = [choice for choice, _ in DonationMoney.RECONCILIATION_STATUS_CHOICES]
+
+
+@dataclass
+class ReconciliationReport:
+    skipped: int = 0  # already processed by an earlier run
+    rows: int = 0
+    verified: int = 0
+    mismatched: int = 0
+    unmatched: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    missing: int = 0
+    settled_from: datetime = None
+    settled_until: datetime = None
+
+
+def reconcile_statement(name, rows, payment_method=None, chunk_size=5000):
+    """
+    `rows` are statement dicts; `payment_method` fills rows without one
+    (single-provider files usually have no such column).
+    """
+    statement, _ = ProviderStatement.objects.get_or_create(name=name)
+    report = ReconciliationReport(
+        skipped=statement.rows_processed, settled_from=statement.settled_from, settled_until=statement.settled_until
+    )
+    rows = islice(rows, statement.rows_processed, None)
+    methods = set(statement.payment_methods)
+    # Stamped on every donation this run settles, so a later block can tell a repeated transaction
+    run_at = timezone.now()
+
+    while True:
+        block = list(islice(rows, chunk_size))
+        if not block:
+            break
+        with transaction.atomic():
+            counts = _reconcile_block(block, payment_method, run_at)
+            methods.update(counts.pop("methods"))
+            for start, end in counts.pop("dates"):
+                report.settled_from = min(filter(None, (report.settled_from, start)))
+                report.settled_until = max(filter(None, (report.settled_until, end)))
+            ProviderStatement.objects.filter(pk=statement.pk).update(
+                rows_processed=F("rows_processed") + len(block),
+                payment_methods=sorted(methods),
+                settled_from=report.settled_from,
+                settled_until=report.settled_until,
+                updated_at=timezone.now(),
+                **{field: F(field) + value for field, value in counts.items()},
+            )
+        report.rows += len(block)
+        for field, value in counts.items():
+            setattr(report, field, getattr(report, field) + value)
+
+    report.missing = mark_missing(methods, report.settled_from, report.settled_until)
+    return report
+
+
+def _settlement_range(value):
+    """(start, end) of a settled_at cell: the instant, or the whole day for a bare date"""
+    value = str(value).strip()
+    day = parse_date(value)
+    if day is not None:
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        return start, start + timedelta(days=1)
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, moment
+
+
+def _reconcile_block(block, default_method, run_at):
+    settled = {}  # (payment_method, transaction_id) -> amount
+    dates = set()
+    invalid = duplicates = 0
+    for row in block:
+        try:
+            method = (row.get("payment_method") or default_method or "").strip().lower()
+            transaction_id = str(row.get("transaction_id") or "").strip()
+            amount = Decimal(str(row.get("amount")).strip())
+            settled_at = row.get("settled_at")
+            date_range = _settlement_range(settled_at) if settled_at not in (None, "") else None
+        except (AttributeError, InvalidOperation, ValueError):
+            invalid += 1
+            continue
+        if not method or not transaction_id or not amount.is_finite():
+            invalid += 1
+            continue
+        if (method, transaction_id) in settled:
+            duplicates += 1
+            continue
+        settled[method, transaction_id] = amount
+        if date_range:
+            dates.add(date_range)
+
+    donations = list(
+        DonationMoney.objects.filter(
+            payment_method__in={method for method, _ in settled},
+            transaction_id__in={transaction_id for _, transaction_id in settled},
+            transaction_id__gt="",  # the partial index condition, so money_unique_transaction is used
+        )
+        .order_by()
+        .only("payment_method", "transaction_id", "amount", "reconciled_at")
+    )
+    matched = []
+    for donation in donations:
+        amount = settled.get((donation.payment_method, donation.transaction_id))
+        if amount is None:
+            continue  # the IN lists also match other method/transaction pairs
+        if donation.reconciled_at == run_at:
+            duplicates += 1  # settled by an earlier block of this run
+            del settled[donation.payment_method, donation.transaction_id]
+            continue
+        donation.settled_amount = amount
+        donation.reconciliation_status = "verified" if amount == donation.amount else "mismatched"
+        donation.reconciled_at = run_at
+        matched.append(donation)
+    DonationMoney.objects.bulk_update(matched, ["reconciliation_status", "settled_amount", "reconciled_at"])
+    verified = sum(donation.reconciliation_status == "verified" for donation in matched)
+
+    return {
+        "methods": {method for method, _ in settled},
+        "dates": dates,
+        "verified": verified,
+        "mismatched": len(matched) - verified,
+        "unmatched": len(settled) - len(matched),
+        "invalid": invalid,
+        "duplicates": duplicates,
+    }
+
+
+def mark_missing(payment_methods, settled_from, settled_until):
+    """
+    Pending donations for these providers, made within the statement's
+    settlement dates and early enough to have settled by their end, never did.
+    """
+    if not payment_methods or settled_from is None:
+        return 0
+    grace = timedelta(hours=settings.RECONCILIATION_GRACE_HOURS)
+    cutoff = min(settled_until, timezone.now()) - grace
+    return DonationMoney.objects.filter(
+        reconciliation_status="pending", payment_method__in=payment_methods,
+        donated_at__gte=settled_from, donated_at__lt=cutoff,
+    ).update(reconciliation_status="missing", reconciled_at=timezone.now())
+
+
+def crisis_reconciliation(crisis_post_id):
+    """{status: {"count", "amount"}} for one crisis post's money donations"""
+    summary = {status: {"count": 0, "amount": Decimal("0")} for status in STATUSES}
+    rows = (
+        DonationMoney.objects.filter(crisis_post_id=crisis_post_id)
+        .order_by()
+        .values("reconciliation_status")
+        .annotate(count=Count("id"), amount=Sum("amount"))
+    )
+    for row in rows:
+        summary[row["reconciliation_status"]] = {"count": row["count"], "amount": row["amount"] or Decimal("0")}
+    return summary
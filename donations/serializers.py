@@ -36,6 +36,9 @@ class DonationMoneyCreateSerializer(serializers.ModelSerializer):
             "message",
             "is_anonymous"
         ]
+        # money_unique_transaction is checked by CreateMoneyDonationView's transaction lookup
+        # (and the constraint itself), so skip DRF's extra uniqueness query
+        validators = []
     
     def validate_amount(self, value):
         if value <= 0:
@@ -108,4 +111,33 @@ class DonationSummarySerializer(serializers.Serializer):
     total_donors_money = serializers.IntegerField()
     total_goods_donations = serializers.IntegerField()
     money_donations = DonationMoneySerializer(many=True)
-    goods_donations = DonationGoodsSerializer(many=True)
\ No newline at end of file
+    goods_donations = DonationGoodsSerializer(many=True)
+
+class DonationImportRowSerializer(serializers.Serializer):
+    """
+    One settlement-file row for donations.ingest. Validates without queries:
+    `approved_ids` in the context is the preloaded set of approved crisis posts.
+    """
+    crisis_post = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    payment_method = serializers.ChoiceField(choices=DonationMoney.PAYMENT_METHOD_CHOICES)
+    transaction_id = serializers.CharField(max_length=100)
+    donor_name = serializers.CharField(max_length=100, required=False)
+    donor_email = serializers.EmailField(required=False)
+    donor_phone = serializers.CharField(max_length=20, required=False)
+    message = serializers.CharField(required=False)
+    is_anonymous = serializers.BooleanField(required=False, default=False)
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than 0.")
+        return value
+
+    def validate_crisis_post(self, value):
+        if value not in self.context["approved_ids"]:
+            raise serializers.ValidationError("You can only donate to approved crisis posts.")
+        return value
+
+    def validate(self, attrs):
+        attrs["crisis_post_id"] = attrs.pop("crisis_post")
+        return attrs
@@ -0,0 +1,145 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.conf import settings
+from django.dispatch import receiver
+from core import sync
+from core.cache import invalidate
+from crisis.models import PostSection
+from crisis.stats import adjust_stats, replace_stats
+from . import donor_stats, inventory, leaderboard
+from .models import DonationMoney, DonationGoods, DonorStats
+
+
+def _money_counts(donation):
+    return {"total_money": donation.amount, "total_donors_money": 1}
+
+
+@receiver(post_save, sender=DonationMoney)
+def money_donation_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_previous", None)
+    if created:
+        adjust_stats(instance.crisis_post_id, **_money_counts(instance))
+    elif previous is not None:
+        # An edited amount or crisis (admin): move the old contribution to the new values
+        replace_stats(
+            previous.crisis_post_id, _money_counts(previous), instance.crisis_post_id, _money_counts(instance)
+        )
+
+
+@receiver(post_delete, sender=DonationMoney)
+def money_donation_deleted(sender, instance, **kwargs):
+    adjust_stats(
+        instance.crisis_post_id, create_missing=False,
+        total_money=-instance.amount, total_donors_money=-1
+    )
+
+
+@receiver(post_save, sender=DonationGoods)
+def goods_donation_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_previous", None)
+    if created:
+        adjust_stats(instance.crisis_post_id, total_goods_donations=1)
+    elif previous is not None:
+        replace_stats(
+            previous.crisis_post_id, {"total_goods_donations": 1}, instance.crisis_post_id, {"total_goods_donations": 1}
+        )
+
+
+@receiver(post_delete, sender=DonationGoods)
+def goods_donation_deleted(sender, instance, **kwargs):
+    adjust_stats(instance.crisis_post_id, create_missing=False, total_goods_donations=-1)
+
+
+@receiver(post_save, sender=DonationMoney)
+@receiver(post_save, sender=DonationGoods)
+def donation_edited(sender, instance, created, raw=False, **kwargs):
+    """The summary lists the donations: refresh it after an edit, on the old post too if it moved"""
+    if not created and not raw:
+        previous = getattr(instance, "_previous", None)
+        moved_from = previous.crisis_post_id if previous else None
+        invalidate(f"summary:{instance.crisis_post_id}", f"summary:{moved_from}" if moved_from else None)
+
+
+@receiver(post_save, sender=DonationMoney)
+@receiver(post_save, sender=DonationGoods)
+@receiver(post_delete, sender=DonationMoney)
+@receiver(post_delete, sender=DonationGoods)
+def sync_donation_summary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record(sync.DONATION_SUMMARY, instance.crisis_post_id, instance.crisis_post_id)
+
+
+# ------------------- Goods inventory -------------------
+@receiver(post_save, sender=DonationGoods)
+def goods_donation_inventory(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        inventory.sync_donation(instance, created=created)
+
+
+@receiver(pre_delete, sender=DonationGoods)
+def goods_donation_inventory_removed(sender, instance, **kwargs):
+    inventory.remove_donation(instance)
+
+
+@receiver(post_save, sender=PostSection)
+@receiver(post_delete, sender=PostSection)
+def resources_section_changed(sender, instance, raw=False, **kwargs):
+    """Needs are read from the "resources" sections; a section can also stop being one"""
+    if not raw:
+        inventory.refresh_needs(instance.post_id)
+
+
+# ------------------- Donor stats -------------------
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    """Start every user with a zeroed row so record_donation is always a single UPDATE"""
+    if created and not raw:
+        DonorStats.objects.create(user=instance)
+
+
+@receiver(pre_save, sender=DonationMoney)
+@receiver(pre_save, sender=DonationGoods)
+def donation_before_edit(sender, instance, raw=False, **kwargs):
+    """An edit may move the donation to another donor or change its amount; remember the old row"""
+    if not raw and not instance._state.adding:
+        instance._previous = sender.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=DonationMoney)
+@receiver(post_save, sender=DonationGoods)
+def donation_donor_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        donor_stats.record_donation(instance)
+    else:
+        previous = getattr(instance, "_previous", None)
+        user_ids = {instance.donor_id, previous and previous.donor_id} - {None}
+        donor_stats.rebuild_donor_stats(user_ids)
+
+
+@receiver(post_delete, sender=DonationMoney)
+@receiver(post_delete, sender=DonationGoods)
+def donation_donor_stats_removed(sender, instance, **kwargs):
+    if instance.donor_id is not None:
+        donor_stats.rebuild_donor_stats([instance.donor_id])
+
+
+# ------------------- Leaderboards -------------------
+@receiver(post_save, sender=DonationMoney)
+def money_donation_leaderboard(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, "_previous", None)
+    if previous is not None:
+        leaderboard.apply_donations([previous], sign=-1)
+    if created or previous is not None:
+        leaderboard.apply_donations([instance])
+
+
+@receiver(post_delete, sender=DonationMoney)
+def money_donation_leaderboard_removed(sender, instance, **kwargs):
+    leaderboard.apply_donations([instance], sign=-1)
@@ -3,13 +3,40 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
-from crisis.models import CrisisPost
-from donations.models import DonationMoney, DonationGoods
+from core.models import IdempotencyKey
+from core.querylog import QueryRecorder
+from core.testing import ExplainPlanMixin, QueryBudgetMixin, QueryBudgetExceeded
+from crisis.models import CrisisPost, PostSection
+from donations.inventory import parse_items
+from donations.models import DonationMoney, DonationGoods, DonorStats, GoodsLineItem, InventoryTotal, ProviderStatement, SupporterBucket
+from updates.models import Comment, CrisisUpdate
+from volunteers.models import VolunteerApplication
 from decimal import Decimal
+from datetime import datetime, timedelta
+from io import StringIO
+import os
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+import csv
+import json
+from django.core.cache import cache
+from django.utils import timezone
+from unittest.mock import patch
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
-class DonationsAPITestCase(APITestCase):
+class DonationsAPITestCase(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        "crisis_donation_summary": 3,
+        "crisis_money_donations": 1,
+        "my_donations": 3,
+        "POST create_money_donation": 9,  # + DonorStats UPDATE, leaderboard totals and buckets (INSERT missing, UPDATE), sync entry
+        "POST create_goods_donation": 7,  # + line items and the inventory rollup (INSERT missing, UPDATE), sync entry
+    }
     def setUp(self):
         # Create users
         self.user = User.objects.create_user(username="donor", email="donor@example.com", password="password123")
@@ -115,7 +142,41 @@ class DonationsAPITestCase(APITestCase):
         url = reverse("crisis_money_donations", kwargs={"crisis_id": self.crisis.id})
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 2)
+        self.assertGreaterEqual(len(response.data["results"]), 2)
+
+    def test_money_donation_list_query_count_is_constant(self):
+        url = reverse("crisis_money_donations", kwargs={"crisis_id": self.crisis.id})
+        DonationMoney.objects.create(crisis_post=self.crisis, donor=self.user, amount=10, payment_method="bkash")
+        with CaptureQueriesContext(connection) as one_row:
+            self.client.get(url)
+
+        for i in range(5):
+            donor = User.objects.create_user(username=f"d{i}", email=f"d{i}@example.com", password="x")
+            DonationMoney.objects.create(crisis_post=self.crisis, donor=donor, amount=10, payment_method="nagad")
+        with CaptureQueriesContext(connection) as many_rows:
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data["results"]), 6)
+        self.assertEqual(len(many_rows.captured_queries), len(one_row.captured_queries))
+
+    def test_query_budget_reports_n_plus_one(self):
+        for i in range(3):
+            donor = User.objects.create_user(username=f"n{i}", email=f"n{i}@example.com", password="x")
+            DonationMoney.objects.create(crisis_post=self.crisis, donor=donor, amount=10, payment_method="bkash")
+
+        with QueryRecorder() as recorder:
+            [donation.display_name for donation in DonationMoney.objects.all()]
+        report = recorder.report("display_name loop")
+
+        (shape, times, sites), = report.duplicates(threshold=3)
+        self.assertIn('FROM "accounts_customuser"', shape)
+        self.assertEqual(times, 3)
+        self.assertIn("donations/models.py", sites[0][0])
+
+        url = reverse("crisis_money_donations", kwargs={"crisis_id": self.crisis.id})
+        with patch.object(DonationsAPITestCase, "query_budgets", {"crisis_money_donations": 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url)
 
     def test_crisis_donation_summary(self):
         DonationMoney.objects.create(crisis_post=self.crisis, donor=self.user, amount=100.00, payment_method="bkash")
@@ -128,6 +189,19 @@ class DonationsAPITestCase(APITestCase):
         self.assertIn("total_money", response.data)
         self.assertEqual(float(response.data["total_money"]), 300.0)
         self.assertEqual(response.data["total_goods_donations"], 1)
+        self.assertEqual([row["amount"] for row in response.data["money_donations"]], ["200.00", "100.00"])
+        self.assertTrue(response.data["money_donations_url"].endswith(
+            reverse("crisis_money_donations", kwargs={"crisis_id": self.crisis.id})
+        ))
+
+    @override_settings(SUMMARY_RECENT_DONATIONS=2)
+    def test_summary_embeds_only_the_newest_donations(self):
+        for amount in range(1, 6):
+            DonationMoney.objects.create(crisis_post=self.crisis, amount=Decimal(amount), payment_method="bkash")
+        url = reverse("crisis_donation_summary", kwargs={"crisis_id": self.crisis.id})
+        response = self.client.get(url)
+        self.assertEqual(response.data["total_donors_money"], 5)
+        self.assertEqual([row["amount"] for row in response.data["money_donations"]], ["5.00", "4.00"])
 
     def test_my_donations_requires_authentication(self):
         url = reverse("my_donations")
@@ -137,3 +211,639 @@ class DonationsAPITestCase(APITestCase):
         self.auth_client.force_authenticate(user=self.user)
         response = self.auth_client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class DonationExportTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", email="owner@example.com", password="password123")
+        self.crisis = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.owner, status="approved"
+        )
+        DonationMoney.objects.create(
+            crisis_post=self.crisis, donor=self.owner, amount=Decimal("10.50"), transaction_id="TX1"
+        )
+        DonationMoney.objects.create(
+            crisis_post=self.crisis, donor_name="Karim", amount=Decimal("20.00"), is_anonymous=True
+        )
+        self.url = reverse("crisis_money_export", kwargs={"crisis_id": self.crisis.id})
+
+    def lines(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_ndjson_streams_masked_rows(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        rows = [json.loads(line) for line in self.lines(response)]
+
+        self.assertEqual([row["amount"] for row in rows], ["10.50", "20.00"])
+        self.assertEqual([row["donor"] for row in rows], ["owner", "Anonymous"])
+        self.assertNotIn("Karim", json.dumps(rows))
+
+    def test_csv_and_date_range(self):
+        DonationMoney.objects.filter(transaction_id="TX1").update(
+            donated_at=timezone.make_aware(datetime(2024, 1, 15, 12))
+        )
+        self.client.force_authenticate(self.owner)
+
+        lines = self.lines(self.client.get(self.url, {"format": "csv", "since": "2024-01-01", "until": "2024-01-15"}))
+        self.assertEqual(lines[0], (
+            "id,donated_at,donor,amount,payment_method,transaction_id,message,is_anonymous,"
+            "reconciliation_status,settled_amount"
+        ))
+        self.assertEqual(len(lines), 2)
+        self.assertIn(",owner,10.50,bkash,TX1,,False", lines[1])
+
+        self.assertEqual(len(self.lines(self.client.get(self.url, {"format": "csv", "until": "2024-01-14"}))), 1)
+        response = self.client.get(self.url, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_csv_does_not_let_donor_text_run_as_formulas(self):
+        DonationMoney.objects.create(
+            crisis_post=self.crisis, donor_name="=HYPERLINK(\"http://x\")", amount=Decimal("5.00"),
+            message="@SUM(A1)", transaction_id="-TX9",
+        )
+        self.client.force_authenticate(self.owner)
+        rows = list(csv.reader(self.lines(self.client.get(self.url, {"format": "csv"}))))
+        header, row = rows[0], rows[-1]
+        self.assertEqual(row[header.index("donor")], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(row[header.index("message")], "'@SUM(A1)")
+        self.assertEqual(row[header.index("transaction_id")], "'-TX9")
+        self.assertEqual(row[header.index("amount")], "5.00")
+
+    def test_only_owner_and_staff_can_export(self):
+        stranger = User.objects.create_user(username="x", email="x@example.com", password="password123")
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+        stranger.is_staff = True
+        stranger.save()
+        self.client.force_authenticate(stranger)
+        VolunteerApplication.objects.create(crisis_post=self.crisis, user=self.owner, message="Can drive")
+        update = CrisisUpdate.objects.create(crisis_post=self.crisis, created_by=self.owner, title="Day 1", description="...")
+        Comment.objects.create(update=update, user=stranger, text="ok")
+        self.assertEqual(len(self.lines(self.client.get(reverse("crisis_goods_export", args=[self.crisis.id])))), 0)
+        volunteers = self.lines(self.client.get(reverse("crisis_volunteers_export", args=[self.crisis.id])))
+        self.assertEqual(json.loads(volunteers[0])["volunteer"], "owner")
+        updates = self.lines(self.client.get(reverse("crisis_updates_export", args=[self.crisis.id]), {"format": "csv"}))
+        self.assertTrue(updates[1].endswith(",Day 1,...,owner,1"))
+
+
+class DonationIdempotencyTests(APITestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user(username="owner", email="owner@example.com", password="password123")
+        self.crisis = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=owner, status="approved"
+        )
+        self.url = reverse("create_money_donation")
+        self.payload = {"crisis_post": self.crisis.id, "amount": "250.00", "payment_method": "bkash"}
+
+    def test_idempotency_key_replays_original_response(self):
+        first = self.client.post(self.url, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        with CaptureQueriesContext(connection) as ctx:
+            retry = self.client.post(self.url, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(DonationMoney.objects.count(), 1)
+        self.assertEqual(len([q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]), 1)
+
+        changed = self.client.post(
+            self.url, {**self.payload, "amount": "300.00"}, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(changed.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_failed_requests_are_not_stored(self):
+        bad = {**self.payload, "amount": "-1"}
+        self.assertEqual(self.client.post(self.url, bad, format="json", HTTP_IDEMPOTENCY_KEY="k").status_code, 400)
+        self.assertEqual(self.client.post(self.url, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="k").status_code, 201)
+
+    def test_retried_transaction_id_returns_existing_donation(self):
+        payload = {**self.payload, "transaction_id": "8N7A6B5C", "donor_email": "guest@example.com"}
+        first = self.client.post(self.url, payload, format="json")
+        retry = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data["data"]["id"], first.data["data"]["id"])
+        self.assertEqual(DonationMoney.objects.count(), 1)
+
+        reused = self.client.post(self.url, {**payload, "amount": "999.00"}, format="json")
+        self.assertEqual(reused.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("transaction_id", reused.data)
+
+        # Same ID on another payment network is a different transaction
+        other = self.client.post(self.url, {**payload, "payment_method": "nagad"}, format="json")
+        self.assertEqual(other.status_code, status.HTTP_201_CREATED)
+
+    def test_transaction_id_replays_only_for_the_original_donor(self):
+        donor = User.objects.create_user(username="donor", email="donor@example.com", password="password123")
+        payload = {**self.payload, "transaction_id": "9Q8R7S6T"}
+        self.client.force_authenticate(donor)
+        first = self.client.post(self.url, payload, format="json")
+        self.assertEqual(self.client.post(self.url, payload, format="json").data["data"]["id"], first.data["data"]["id"])
+
+        self.client.force_authenticate(None)
+        stranger = self.client.post(self.url, {**payload, "donor_email": "donor@example.com"}, format="json")
+        self.assertEqual(stranger.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(stranger.data["transaction_id"], ["This transaction ID has already been used."])
+
+        # A guest donation is replayed only to the same donor email
+        guest = {**payload, "transaction_id": "GUEST1", "donor_email": "guest@example.com"}
+        self.assertEqual(self.client.post(self.url, guest, format="json").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(self.url, guest, format="json").status_code, status.HTTP_201_CREATED)
+        for other in ({**guest, "donor_email": "other@example.com"}, {k: v for k, v in guest.items() if k != "donor_email"}):
+            self.assertEqual(self.client.post(self.url, other, format="json").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(DonationMoney.objects.count(), 2)
+
+    def test_concurrent_insert_falls_back_to_replay(self):
+        existing = DonationMoney.objects.create(
+            crisis_post=self.crisis, amount=Decimal("250.00"), transaction_id="RACE1", donor_email="guest@example.com"
+        )
+        payload = {**self.payload, "transaction_id": "RACE1", "donor_email": "guest@example.com"}
+        # The first lookup misses (the other request has not committed yet); the insert then hits the constraint
+        with patch("donations.views.CreateMoneyDonationView.find_by_transaction", side_effect=[None, existing]):
+            response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["data"]["id"], existing.id)
+        self.assertEqual(DonationMoney.objects.count(), 1)
+
+    def test_expired_keys_are_purged(self):
+        self.client.post(self.url, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="old")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class DonationImportTests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="password123")
+        self.crisis = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.admin, status="approved"
+        )
+        self.pending = CrisisPost.objects.create(
+            title="Fire", description="...", post_type="district", owner=self.admin, status="pending"
+        )
+        DonationMoney.objects.create(crisis_post=self.crisis, amount=Decimal("5.00"), transaction_id="OLD1")
+        self.url = reverse("import_money_donations")
+
+    def upload(self, name, content):
+        self.client.force_authenticate(self.admin)
+        return self.client.post(self.url, {"file": SimpleUploadedFile(name, content.encode())}, format="multipart")
+
+    def test_csv_import_reports_rows_and_updates_stats(self):
+        c, p = self.crisis.id, self.pending.id
+        content = (
+            "crisis_post,amount,payment_method,transaction_id,donor_name,is_anonymous\n"
+            f"{c},100.00,bkash,TX1,Rahim,\n"
+            f"{c},50.50,nagad,TX2,,true\n"
+            f"{c},50.50,nagad,TX2,,true\n"  # repeated in the file
+            f"{c},5.00,bkash,OLD1,,\n"  # already imported
+            f"{p},10.00,bkash,TX3,,\n"
+            f"{c},-1,bkash,TX4,,\n"
+        )
+        response = self.upload("settlement.csv", content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["created"], response.data["duplicates"], response.data["failed"]), (2, 2, 2))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [5, 6])
+        self.assertIn("crisis_post", response.data["errors"][0]["errors"])
+        self.assertEqual(DonationMoney.objects.get(transaction_id="TX2").donor_name, None)
+
+        self.crisis.stats.refresh_from_db()
+        self.assertEqual(self.crisis.stats.total_money, Decimal("155.50"))
+        self.assertEqual(self.crisis.stats.total_donors_money, 3)
+
+        again = self.upload("settlement.csv", content)
+        self.assertEqual((again.data["created"], again.data["duplicates"]), (0, 4))
+
+    def test_batches_run_a_fixed_number_of_queries(self):
+        rows = "".join(
+            json.dumps({"crisis_post": self.crisis.id, "amount": "1.00", "payment_method": "bkash",
+                        "transaction_id": f"N{index}"}) + "\n"
+            for index in range(200)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.upload("batch.ndjson", rows + "{broken\n")
+        self.assertEqual((response.data["created"], response.data["failed"]), (200, 1))
+        self.assertLess(len(ctx.captured_queries), 20)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(username="u", email="u@example.com", password="x"))
+        response = self.client.post(self.url, {"file": SimpleUploadedFile("a.csv", b"")}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_management_command(self):
+        rows = [{"crisis_post": self.crisis.id, "amount": "20.00", "payment_method": "rocket", "transaction_id": "R1"}]
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as handle:
+            json.dump(rows, handle)
+        self.addCleanup(os.remove, handle.name)
+
+        out = StringIO()
+        call_command("import_donations", handle.name, chunk_size=1, stdout=out)
+        self.assertIn("Imported 1 donation(s)", out.getvalue())
+        self.assertTrue(DonationMoney.objects.filter(transaction_id="R1", payment_method="rocket").exists())
+
+
+class ReconciliationTests(APITestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", email="owner@example.com", password="password123")
+        self.crisis = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.owner, status="approved"
+        )
+        for method, transaction_id, amount in [
+            ("bkash", "TX1", "100.00"), ("bkash", "TX2", "50.00"), ("bkash", "TX4", "10.00"), ("nagad", "TX3", "20.00"),
+        ]:
+            DonationMoney.objects.create(
+                crisis_post=self.crisis, amount=Decimal(amount), payment_method=method, transaction_id=transaction_id
+            )
+        DonationMoney.objects.update(donated_at=timezone.now() - timedelta(days=3))
+        self.opened = timezone.localdate() - timedelta(days=3)
+        self.today = timezone.localdate()
+
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        handle.write(
+            f"transaction_id,amount,settled_at\nTX1,100.00,{self.opened}\nTX2,45.00,{self.today}\n"
+            f"TX9,5.00,{self.today}\nTX5,n/a,{self.today}\n"
+        )
+        handle.close()
+        self.path = handle.name
+        self.addCleanup(os.remove, self.path)
+
+    def reconcile(self):
+        out = StringIO()
+        call_command("reconcile_donations", self.path, name="bkash-2024-07", payment_method="bkash", chunk_size=2, stdout=out)
+        return out.getvalue()
+
+    def status(self, transaction_id):
+        return DonationMoney.objects.get(transaction_id=transaction_id).reconciliation_status
+
+    def test_marks_verified_mismatched_and_missing(self):
+        output = self.reconcile()
+
+        self.assertIn("1 verified, 1 mismatched, 1 without a donation, 1 invalid", output)
+        self.assertEqual(self.status("TX1"), "verified")
+        self.assertEqual(self.status("TX2"), "mismatched")
+        self.assertEqual(DonationMoney.objects.get(transaction_id="TX2").settled_amount, Decimal("45.00"))
+        self.assertEqual(self.status("TX4"), "missing")
+        self.assertEqual(self.status("TX3"), "pending")  # no nagad statement yet
+
+    def test_rerun_only_processes_new_rows(self):
+        self.reconcile()
+        with open(self.path, "a") as handle:
+            handle.write(f"TX4,10.00,{self.today}\n")
+
+        with CaptureQueriesContext(connection) as ctx:
+            output = self.reconcile()
+        self.assertIn("1 new row(s), 4 already processed: 1 verified", output)
+        self.assertEqual(self.status("TX4"), "verified")
+        self.assertLess(len(ctx.captured_queries), 15)
+
+    def test_only_donations_within_the_statement_dates_go_missing(self):
+        DonationMoney.objects.filter(transaction_id="TX4").update(donated_at=timezone.now() - timedelta(days=30))
+        self.reconcile()
+        self.assertEqual(self.status("TX4"), "pending")  # before the statement's first settlement
+
+        statement = ProviderStatement.objects.get(name="bkash-2024-07")
+        self.assertEqual(timezone.localdate(statement.settled_from), self.opened)
+        self.assertEqual(timezone.localdate(statement.settled_until), self.today + timedelta(days=1))
+
+    def test_undated_statement_marks_nothing_missing(self):
+        with open(self.path, "w") as handle:
+            handle.write("transaction_id,amount\nTX1,100.00\n")
+        output = self.reconcile()
+        self.assertIn("no settled_at dates", output)
+        self.assertEqual(self.status("TX1"), "verified")
+        self.assertEqual(self.status("TX4"), "pending")
+
+    def test_duplicate_lines_are_reported(self):
+        with open(self.path, "a") as handle:
+            # TX6 twice in one block, TX2 and TX1 again in a later block; the first line wins
+            handle.write(
+                f"TX6,1.00,{self.today}\nTX6,2.00,{self.today}\nTX2,50.00,{self.today}\nTX1,1.00,{self.today}\n"
+            )
+        output = self.reconcile()
+
+        self.assertIn("2 without a donation, 1 invalid, 3 duplicate(s)", output)
+        self.assertEqual(self.status("TX1"), "verified")
+        self.assertEqual(self.status("TX2"), "mismatched")
+        self.assertEqual(ProviderStatement.objects.get(name="bkash-2024-07").duplicates, 3)
+
+    def test_crisis_status_endpoint(self):
+        self.reconcile()
+        url = reverse("crisis_reconciliation", kwargs={"crisis_id": self.crisis.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.owner)
+        statuses = self.client.get(url).data["statuses"]
+        self.assertEqual(statuses["verified"], {"count": 1, "amount": "100.00"})
+        self.assertEqual(statuses["missing"]["count"], 1)
+        self.assertEqual(statuses["pending"]["count"], 1)
+
+
+class GoodsInventoryTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", email="owner@example.com", password="password123")
+        self.crisis = CrisisPost.objects.create(
+            title="Flood", description="...", post_type="district", owner=self.owner, status="approved"
+        )
+        PostSection.objects.create(post=self.crisis, section_type="resources", content="Need: 100 blankets, 50kg rice")
+        self.first = DonationGoods.objects.create(crisis_post=self.crisis, item_description="10 blankets, 5kg rice")
+        DonationGoods.objects.create(crisis_post=self.crisis, item_description="20 bottles of water and 2 Blankets")
+        self.url = reverse("crisis_inventory", kwargs={"crisis_id": self.crisis.id})
+
+    def inventory(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {(row["item"], row["unit"]): row for row in response.data["items"]}
+
+    def test_parser(self):
+        self.assertEqual(parse_items("10 blankets, 500g salt; rice 2 kg & 2 dozen eggs"), [
+            ("blanket", "pcs", Decimal("10")),
+            ("salt", "kg", Decimal("0.5")),
+            ("rice", "kg", Decimal("2")),
+            ("egg", "pcs", Decimal("24")),
+        ])
+        self.assertEqual(parse_items("Winter clothes", fallback_quantity="15"), [("winter clothes", "pcs", Decimal("15"))])
+        self.assertEqual(parse_items("10 boxes"), [("box", "box", Decimal("10"))])
+        self.assertEqual(parse_items("3 pairs shoes 2kg sugar"), [
+            ("shoe", "pair", Decimal("3")),
+            ("sugar", "kg", Decimal("2")),
+        ])
+        self.assertEqual(parse_items("rice 2 kg, 1,000 tablets"), [
+            ("rice", "kg", Decimal("2")),
+            ("tablet", "pcs", Decimal("1000")),
+        ])
+
+    def test_parser_reads_both_orders_the_same(self):
+        for text in ("20 bottles water", "water bottles 20", "water: 20 bottles"):
+            self.assertEqual(parse_items(text), [("water", "bottle", Decimal("20"))], text)
+        for text in ("10x blankets", "10 x blankets", "blankets x10", "blankets 10x", "10 blankets"):
+            self.assertEqual(parse_items(text), [("blanket", "pcs", Decimal("10"))], text)
+        self.assertEqual(parse_items("boxes 10"), parse_items("10 boxes"))
+        self.assertEqual(parse_items("10 xl shirts"), [("xl shirt", "pcs", Decimal("10"))])
+
+    def test_rollup_against_needs(self):
+        with CaptureQueriesContext(connection) as ctx:
+            items = self.inventory()
+        self.assertEqual(len([q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]), 1)
+
+        self.assertEqual(items["blanket", "pcs"], {
+            "item": "blanket", "unit": "pcs", "received": "12", "donations": 2,
+            "needed": "100", "remaining": "88", "progress": 12.0,
+        })
+        self.assertEqual((items["rice", "kg"]["received"], items["rice", "kg"]["remaining"]), ("5", "45"))
+        self.assertIsNone(items["water", "bottle"]["needed"])
+
+    def test_edits_deletes_and_section_changes_are_incremental(self):
+        self.first.item_description = "30 blankets"
+        self.first.save()
+        items = self.inventory()
+        self.assertEqual(items["blanket", "pcs"]["received"], "32")
+        self.assertEqual(items["rice", "kg"]["received"], "0")
+
+        self.first.delete()
+        PostSection.objects.filter(post=self.crisis).update(content="200 blankets")
+        PostSection.objects.get(post=self.crisis).save()
+        items = self.inventory()
+        self.assertEqual((items["blanket", "pcs"]["received"], items["blanket", "pcs"]["needed"]), ("2", "200"))
+        self.assertNotIn(("rice", "kg"), items)
+
+    def test_rows_without_donations_or_needs_are_deleted(self):
+        DonationGoods.objects.exclude(pk=self.first.pk).delete()
+        self.assertFalse(InventoryTotal.objects.filter(item="water").exists())
+        self.assertEqual(InventoryTotal.objects.get(item="blanket").donations, 1)
+
+        self.first.item_description = "3 tarps"
+        self.first.save()
+        self.assertFalse(InventoryTotal.objects.filter(received=0, needed__isnull=True).exists())
+        self.assertEqual(InventoryTotal.objects.get(item="rice").received, 0)  # still needed
+
+    def test_backfill_command(self):
+        expected = self.inventory()
+        GoodsLineItem.objects.all().delete()
+        InventoryTotal.objects.all().delete()
+
+        call_command("backfill_goods_inventory", chunk_size=1, stdout=StringIO())
+        cache.clear()
+        self.assertEqual(self.inventory(), expected)
+
+
+class DonorStatsTests(QueryBudgetMixin, APITestCase):
+    # stats, the page, and on the first page the newest donations of the other type
+    query_budgets = {"my_donations": 3}
+
+    def setUp(self):
+        self.donor = User.objects.create_user(username="donor", email="donor@example.com", password="password123")
+        owner = User.objects.create_user(username="owner", email="owner@example.com", password="password123")
+        self.flood, self.fire = [
+            CrisisPost.objects.create(title=title, description="...", post_type="district", owner=owner, status="approved")
+            for title in ("Flood", "Fire")
+        ]
+        for amount in (100, 250):
+            DonationMoney.objects.create(crisis_post=self.flood, donor=self.donor, amount=Decimal(amount))
+        self.goods = DonationGoods.objects.create(crisis_post=self.fire, donor=self.donor, item_description="10 blankets")
+        DonationGoods.objects.create(crisis_post=self.flood, donor=self.donor, item_description="5kg rice")
+        self.client.force_authenticate(user=self.donor)
+
+    def stats(self):
+        return DonorStats.objects.values(
+            "total_money", "money_donations", "goods_donations", "crises_supported", "last_donated_at"
+        ).get(user=self.donor)
+
+    def test_counters_are_kept_on_write(self):
+        self.assertEqual(self.stats(), {
+            "total_money": Decimal("350"), "money_donations": 2, "goods_donations": 2,
+            "crises_supported": 2, "last_donated_at": DonationGoods.objects.latest("donated_at").donated_at,
+        })
+
+        self.goods.delete()
+        self.assertEqual((self.stats()["goods_donations"], self.stats()["crises_supported"]), (1, 1))
+
+        other = User.objects.create_user(username="other", email="other@example.com", password="password123")
+        donation = DonationMoney.objects.get(amount=250)
+        donation.donor = other
+        donation.save()
+        self.assertEqual(self.stats()["total_money"], Decimal("100"))
+        self.assertEqual(DonorStats.objects.get(user=other).total_money, Decimal("250"))
+
+    def test_my_donations_pages_history(self):
+        response = self.client.get(reverse("my_donations"), {"page_size": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["stats"]["crises_supported"], 2)
+        self.assertEqual(response.data["total_money_donated"], 350.0)
+        self.assertEqual(response.data["total_donations_count"], 4)
+        self.assertEqual([row["amount"] for row in response.data["results"]], ["250.00"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([row["amount"] for row in response.data["results"]], ["100.00"])
+        self.assertIsNone(response.data["next"])
+        self.assertNotIn("money_donations", response.data)
+
+        response = self.client.get(reverse("my_donations"), {"type": "goods"})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(self.client.get(reverse("my_donations"), {"type": "x"}).status_code, 400)
+
+    def test_my_donations_keeps_the_original_lists(self):
+        response = self.client.get(reverse("my_donations"))
+        self.assertEqual([row["amount"] for row in response.data["money_donations"]], ["250.00", "100.00"])
+        self.assertEqual(response.data["money_donations"], response.data["results"])
+        self.assertEqual(
+            [row["item_description"] for row in response.data["goods_donations"]], ["5kg rice", "10 blankets"]
+        )
+
+        response = self.client.get(reverse("my_donations"), {"type": "goods", "page_size": 1})
+        self.assertEqual(len(response.data["money_donations"]), 1)
+        self.assertEqual(response.data["goods_donations"], response.data["results"])
+
+    def test_rebuild_command(self):
+        expected = self.stats()
+        DonorStats.objects.all().delete()
+        call_command("rebuild_donor_stats", chunk_size=1, stdout=StringIO())
+        self.assertEqual(self.stats(), expected)
+
+
+class LeaderboardTests(ExplainPlanMixin, APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob = [
+            User.objects.create_user(username=name, email=f"{name}@example.com", password="password123")
+            for name in ("alice", "bob")
+        ]
+        self.flood, self.fire = [
+            CrisisPost.objects.create(title=title, description="...", post_type="district", owner=self.alice, status="approved")
+            for title in ("Flood", "Fire")
+        ]
+        for crisis, donor, amount in [(self.flood, self.alice, 100), (self.fire, self.alice, 50), (self.flood, self.bob, 120)]:
+            DonationMoney.objects.create(crisis_post=crisis, donor=donor, amount=Decimal(amount))
+        for email, amount in [("Guest@example.com", 30), ("guest@example.com ", 40)]:
+            DonationMoney.objects.create(crisis_post=self.flood, donor_name="Guest G", donor_email=email, amount=Decimal(amount))
+        DonationMoney.objects.create(crisis_post=self.fire, donor=self.bob, is_anonymous=True, amount=Decimal(500))
+
+    def board(self, crisis=None, **params):
+        url = reverse("crisis_leaderboard", kwargs={"crisis_id": crisis.id}) if crisis else reverse("leaderboard")
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row["name"], row["amount"], row["donations"]) for row in response.data["supporters"]]
+
+    def test_rankings_group_guests_and_hide_anonymous_donations(self):
+        self.assertEqual(self.board(self.flood), [("bob", 120.0, 1), ("alice", 100.0, 1), ("Guest G", 70.0, 2)])
+        self.assertEqual(self.board(limit=2), [("Anonymous", 500.0, 1), ("alice", 150.0, 2)])
+        self.assertEqual(self.board()[2], ("bob", 120.0, 1))  # the anonymous 500 is not added to bob
+        self.assertIndexedPlan(reverse("leaderboard"), "donations_supportertotal", {"limit": 5})
+
+    def test_windows_use_hourly_buckets(self):
+        DonationMoney.objects.filter(donor=self.alice).update(donated_at=timezone.now() - timedelta(days=3))
+        call_command("rebuild_leaderboards", chunk_size=2, stdout=StringIO())
+        cache.clear()
+
+        self.assertEqual(self.board(self.flood, window="24h"), [("bob", 120.0, 1), ("Guest G", 70.0, 2)])
+        self.assertEqual(self.board(self.flood, window="7d")[1], ("alice", 100.0, 1))
+        self.assertEqual(self.board(self.flood)[1], ("alice", 100.0, 1))
+        self.assertEqual(self.client.get(reverse("leaderboard"), {"window": "1y"}).status_code, 400)
+
+        SupporterBucket.objects.update(bucket=timezone.now() - timedelta(days=8))
+        call_command("purge_leaderboard_buckets", stdout=StringIO())
+        self.assertFalse(SupporterBucket.objects.exists())
+
+    def test_windowed_boards_move_on_when_the_clock_passes_the_window(self):
+        DonationMoney.objects.filter(donor=self.bob).update(donated_at=timezone.now() - timedelta(hours=23))
+        call_command("rebuild_leaderboards", stdout=StringIO())
+        cache.clear()
+        url = reverse("crisis_leaderboard", kwargs={"crisis_id": self.flood.id})
+
+        first = self.client.get(url, {"window": "24h"})
+        self.assertEqual(first.data["supporters"][0]["name"], "bob")
+        self.assertEqual(self.client.get(url, {"window": "24h"})["X-Cache"], "HIT")
+
+        later = timezone.now() + timedelta(hours=1)
+        with patch("django.utils.timezone.now", return_value=later):
+            response = self.client.get(url, {"window": "24h"}, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertNotIn("bob", [row["name"] for row in response.data["supporters"]])
+            # The all-time board only changes with donations
+            self.assertEqual(self.client.get(url).data["supporters"][0]["name"], "bob")
+
+    def test_deletes_and_edits_are_taken_back(self):
+        DonationMoney.objects.get(donor=self.bob, is_anonymous=False).delete()
+        donation = DonationMoney.objects.get(donor=self.alice, crisis_post=self.flood)
+        donation.amount = Decimal(10)
+        donation.save()
+        self.assertEqual(self.board(self.flood), [("Guest G", 70.0, 2), ("alice", 10.0, 1)])
+        self.assertEqual(self.board(self.flood, window="24h"), [("Guest G", 70.0, 2), ("alice", 10.0, 1)])
+
+
+@override_settings(ADMIN_COUNT_LIMIT=10000)
+class DonationAdminTests(ExplainPlanMixin, APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="password123")
+        self.client.force_login(self.admin)
+        self.flood, self.fire, self.quiet = [
+            CrisisPost.objects.create(title=title, description="...", post_type="district", owner=self.admin, status="approved")
+            for title in ("Flood", "Fire", "Quiet crisis")
+        ]
+        for crisis, amount in [(self.flood, 100), (self.flood, 50), (self.fire, 70)]:
+            DonationMoney.objects.create(crisis_post=crisis, donor=self.admin, amount=Decimal(amount))
+        self.url = reverse("admin:donations_donationmoney_changelist")
+
+    def changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_cost_does_not_grow_with_rows(self):
+        response, queries = self.changelist()
+        self.assertNotContains(response, "Quiet crisis")  # no sidebar link per crisis post
+        self.assertContains(response, "৳ 220.00")  # total from CrisisStats
+        for index in range(20):
+            donor = User.objects.create_user(username=f"donor{index}", email=f"donor{index}@example.com", password="x")
+            crisis = CrisisPost.objects.create(title=f"Crisis {index}", description="...", post_type="district", owner=donor)
+            DonationMoney.objects.create(crisis_post=crisis, donor=donor, amount=Decimal(10))
+        response, more_rows_queries = self.changelist()
+        self.assertEqual(more_rows_queries, queries)
+        self.assertIndexedQuerySet(response.context["cl"].queryset)
+
+    def test_autocomplete_filter_and_date_drilldown(self):
+        last_year = timezone.now().year - 1
+        DonationMoney.objects.filter(crisis_post=self.fire).update(donated_at=timezone.now().replace(year=last_year, month=3))
+
+        response, _ = self.changelist(crisis_post__id__exact=self.fire.id)
+        self.assertEqual([row.amount for row in response.context["cl"].result_list], [Decimal(70)])
+        self.assertContains(response, "admin-autocomplete")
+        self.assertContains(response, f'<option value="{self.fire.id}" selected>Fire (district)</option>', html=True)
+
+        response, _ = self.changelist()
+        self.assertContains(response, f"donated_at__year={last_year}")
+        self.assertContains(response, f"donated_at__year={last_year + 1}")
+        response, _ = self.changelist(donated_at__year=last_year)
+        self.assertContains(response, "donated_at__month=3")
+        self.assertNotContains(response, "donated_at__month=4")
+
+    def test_count_stops_at_limit(self):
+        with self.settings(ADMIN_COUNT_LIMIT=2):
+            response, _ = self.changelist()
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertContains(response, "Counting stopped at 2 matches")
+
+    def test_large_table_changelists_render(self):
+        for url in ("donations_donationgoods", "volunteers_volunteerapplication", "crisis_postsection", "updates_crisisupdate", "updates_comment"):
+            response = self.client.get(reverse(f"admin:{url}_changelist"), {"q": "x"})
+            self.assertEqual(response.status_code, 200, url)
+
+    def test_benchmark_command_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_admin", sizes=[30], repeat=1, crises=2, stdout=out)
+        self.assertIn("30 donations", out.getvalue())
+        self.assertEqual(DonationMoney.objects.count(), 3)
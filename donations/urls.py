@@ -2,9 +2,15 @@ from django.urls import path
 from .views import (
     CreateMoneyDonationView,
     CreateGoodsDonationView,
+    ImportMoneyDonationsView,
     CrisisMoneyDonationsView,
     CrisisGoodsDonationsView,
     CrisisDonationSummaryView,
+    CrisisInventoryView,
+    CrisisMoneyDonationsExportView,
+    CrisisGoodsDonationsExportView,
+    CrisisReconciliationView,
+    LeaderboardView,
     MyDonationsView
 )
 
@@ -12,11 +18,20 @@ urlpatterns = [
     # Create donations
     path("money/create/", CreateMoneyDonationView.as_view(), name="create_money_donation"),
     path("goods/create/", CreateGoodsDonationView.as_view(), name="create_goods_donation"),
+    path("money/import/", ImportMoneyDonationsView.as_view(), name="import_money_donations"),
     
     # View donations for a crisis
     path("crisis/<int:crisis_id>/money/", CrisisMoneyDonationsView.as_view(), name="crisis_money_donations"),
     path("crisis/<int:crisis_id>/goods/", CrisisGoodsDonationsView.as_view(), name="crisis_goods_donations"),
     path("crisis/<int:crisis_id>/summary/", CrisisDonationSummaryView.as_view(), name="crisis_donation_summary"),
+    path("crisis/<int:crisis_id>/inventory/", CrisisInventoryView.as_view(), name="crisis_inventory"),
+    path("crisis/<int:crisis_id>/leaderboard/", LeaderboardView.as_view(), name="crisis_leaderboard"),
+    path("leaderboard/", LeaderboardView.as_view(), name="leaderboard"),
+    
+    # Streaming exports (crisis owner / staff)
+    path("crisis/<int:crisis_id>/money/export/", CrisisMoneyDonationsExportView.as_view(), name="crisis_money_export"),
+    path("crisis/<int:crisis_id>/goods/export/", CrisisGoodsDonationsExportView.as_view(), name="crisis_goods_export"),
+    path("crisis/<int:crisis_id>/reconciliation/", CrisisReconciliationView.as_view(), name="crisis_reconciliation"),
     
     # My donations
     path("my-donations/", MyDonationsView.as_view(), name="my_donations"),
@@ -1,37 +1,108 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.shortcuts import get_object_or_404
-from django.db.models import Sum, Count
-from .models import DonationMoney, DonationGoods
+
+from core.cache import CachedResponseMixin
+from core.idempotency import REPLAY_HEADER, IdempotentCreateMixin
+from core.mixins import OptimizedQuerysetMixin
+from core.optimization import optimize_queryset
+from crisis.exports import CrisisExportView
 from crisis.models import CrisisPost
+from crisis.permissions import IsCrisisOwnerOrStaff
+from crisis.stats import get_stats
+from .donor_stats import get_donor_stats
+from .ingest import guess_format, import_donations, read_rows
+from .leaderboard import DEFAULT_LIMIT, MAX_LIMIT, WINDOWS, bucket_start, leaderboard_namespace, top_supporters
+from .models import DonationMoney, DonationGoods, InventoryTotal
+from .reconciliation import crisis_reconciliation
 from .serializers import (
     DonationMoneySerializer,
     DonationMoneyCreateSerializer,
     DonationGoodsSerializer,
     DonationGoodsCreateSerializer,
-    DonationSummarySerializer
 )
 
-
 # Create Money Donation (Authenticated or Anonymous)
-class CreateMoneyDonationView(generics.CreateAPIView):
+class CreateMoneyDonationView(IdempotentCreateMixin, generics.CreateAPIView):
     serializer_class = DonationMoneyCreateSerializer
     permission_classes = [permissions.AllowAny]  # Allow anonymous donations
     
     def create(self, request, *args, **kwargs):
+        # Client retries usually resend the same transaction ID: answer them from the unique index
+        existing = self.find_by_transaction(request.data)
+        if existing is not None:
+            return self.replay(existing, request.data)
+        
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        try:
+            with transaction.atomic():
+                self.perform_create(serializer)
+        except IntegrityError:
+            # A concurrent request inserted the same transaction ID first
+            existing = self.find_by_transaction(request.data)
+            if existing is None:
+                raise
+            return self.replay(existing, request.data)
         
+        return self.created_response(serializer.instance)
+    
+    def created_response(self, donation, headers=None):
         return Response({
             "success": "Thank you for your donation!",
-            "data": DonationMoneySerializer(serializer.instance, context={"request": request}).data
-        }, status=status.HTTP_201_CREATED)
+            "data": DonationMoneySerializer(donation, context={"request": self.request}).data
+        }, status=status.HTTP_201_CREATED, headers=headers)
+    
+    @staticmethod
+    def find_by_transaction(data):
+        transaction_id = data.get("transaction_id")
+        if not transaction_id or not isinstance(transaction_id, str):
+            return None
+        try:
+            # transaction_id__gt="" repeats the partial index condition so money_unique_transaction is used
+            return DonationMoney.objects.select_related("crisis_post", "donor").get(
+                payment_method=data.get("payment_method") or "bkash",
+                transaction_id=transaction_id,
+                transaction_id__gt="",
+            )
+        except DonationMoney.DoesNotExist:
+            return None
+    
+    def is_original_donor(self, donation, data):
+        # Transaction IDs are printed on receipts: only the donor who sent one gets its donation back
+        if donation.donor_id is not None:
+            return self.request.user.is_authenticated and self.request.user.pk == donation.donor_id
+        email = data.get("donor_email")
+        return bool(donation.donor_email) and isinstance(email, str) and (
+            email.strip().lower() == donation.donor_email.lower()
+        )
+    
+    def replay(self, donation, data):
+        try:
+            same = (
+                self.is_original_donor(donation, data)
+                and str(donation.crisis_post_id) == str(data.get("crisis_post"))
+                and donation.amount == Decimal(str(data.get("amount")))
+            )
+        except InvalidOperation:
+            same = False
+        if not same:
+            raise ValidationError({"transaction_id": ["This transaction ID has already been used."]})
+        return self.created_response(donation, headers={REPLAY_HEADER: "true"})
 
 
 # Create Goods Donation
-class CreateGoodsDonationView(generics.CreateAPIView):
+class CreateGoodsDonationView(IdempotentCreateMixin, generics.CreateAPIView):
     serializer_class = DonationGoodsCreateSerializer
     permission_classes = [permissions.AllowAny]
     
@@ -46,10 +117,39 @@ class CreateGoodsDonationView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+# Bulk import of payment-provider settlement files (staff only)
+class ImportMoneyDonationsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+    
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Each chunk commits in its own transaction instead of one spanning the whole file
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+    
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": ["Upload a CSV, JSON or NDJSON settlement file."]})
+        fmt = guess_format(upload.name)
+        if fmt is None:
+            raise ValidationError({"file": ["Unsupported file type; use .csv, .json, .ndjson or .jsonl."]})
+        
+        try:
+            report = import_donations(read_rows(upload, fmt), chunk_size=settings.DONATION_IMPORT_CHUNK_SIZE)
+        except (ValueError, csv.Error) as exc:
+            raise ValidationError({"file": [f"Could not read file: {exc}"]})
+        return Response(report.as_dict())
+
+
 # List Money Donations for a Crisis
-class CrisisMoneyDonationsView(generics.ListAPIView):
+class CrisisMoneyDonationsView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = DonationMoneySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_ordering = ('-donated_at',)
+    
+    def get_cache_namespaces(self):
+        return [f"summary:{self.kwargs['crisis_id']}"]
     
     def get_queryset(self):
         crisis_id = self.kwargs.get('crisis_id')
@@ -57,56 +157,232 @@ class CrisisMoneyDonationsView(generics.ListAPIView):
 
 
 # List Goods Donations for a Crisis
-class CrisisGoodsDonationsView(generics.ListAPIView):
+class CrisisGoodsDonationsView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = DonationGoodsSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_ordering = ('-donated_at',)
+    
+    def get_cache_namespaces(self):
+        return [f"summary:{self.kwargs['crisis_id']}"]
     
     def get_queryset(self):
         crisis_id = self.kwargs.get('crisis_id')
         return DonationGoods.objects.filter(crisis_post_id=crisis_id)
 
 
-# Get Donation Summary for a Crisis
-class CrisisDonationSummaryView(APIView):
+# Get Donation Summary for a Crisis: the totals plus the newest few donations of each kind;
+# the full lists are paged by crisis_money_donations / crisis_goods_donations
+class CrisisDonationSummaryView(CachedResponseMixin, APIView):
     permission_classes = [permissions.AllowAny]
     
+    def get_cache_namespaces(self):
+        return [f"summary:{self.kwargs['crisis_id']}"]
+    
     def get(self, request, crisis_id):
-        crisis_post = get_object_or_404(CrisisPost, id=crisis_id)
-        
-        # Calculate totals
-        money_donations = DonationMoney.objects.filter(crisis_post=crisis_post)
-        goods_donations = DonationGoods.objects.filter(crisis_post=crisis_post)
+        crisis_post = get_object_or_404(CrisisPost.objects.select_related('stats'), id=crisis_id)
         
-        total_money = money_donations.aggregate(total=Sum('amount'))['total'] or 0
-        total_donors_money = money_donations.count()
-        total_goods_donations = goods_donations.count()
+        # Totals come from the denormalized stats row instead of aggregating donations
+        stats = get_stats(crisis_post)
+        recent = settings.SUMMARY_RECENT_DONATIONS
+        money_donations = optimize_queryset(
+            DonationMoney.objects.filter(crisis_post=crisis_post).order_by('-donated_at', '-id'), DonationMoneySerializer()
+        )[:recent]
+        goods_donations = optimize_queryset(
+            DonationGoods.objects.filter(crisis_post=crisis_post).order_by('-donated_at', '-id'), DonationGoodsSerializer()
+        )[:recent]
         
         data = {
             "crisis_id": crisis_id,
             "crisis_title": crisis_post.title,
-            "total_money": float(total_money),
-            "total_donors_money": total_donors_money,
-            "total_goods_donations": total_goods_donations,
+            "total_money": float(stats.total_money),
+            "total_donors_money": stats.total_donors_money,
+            "total_goods_donations": stats.total_goods_donations,
+            "funding_goal": float(crisis_post.funding_goal) if crisis_post.funding_goal is not None else None,
+            "funding_progress": stats.funding_progress,
             "money_donations": DonationMoneySerializer(money_donations, many=True).data,
             "goods_donations": DonationGoodsSerializer(goods_donations, many=True).data,
+            "money_donations_url": request.build_absolute_uri(
+                reverse("crisis_money_donations", kwargs={"crisis_id": crisis_id})
+            ),
+            "goods_donations_url": request.build_absolute_uri(
+                reverse("crisis_goods_donations", kwargs={"crisis_id": crisis_id})
+            ),
         }
         
         return Response(data)
 
 
-# My Donations (for logged-in users)
-class MyDonationsView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+# Goods received vs. needed for a crisis (rollups kept by donations.inventory)
+class CrisisInventoryView(CachedResponseMixin, APIView):
+    permission_classes = [permissions.AllowAny]
+    
+    def get_cache_namespaces(self):
+        return [f"inventory:{self.kwargs['crisis_id']}"]
+    
+    def get(self, request, crisis_id):
+        items = []
+        for total in InventoryTotal.objects.filter(crisis_post_id=crisis_id).order_by("item", "unit"):
+            remaining = None if total.needed is None else max(total.needed - total.received, 0)
+            items.append({
+                "item": total.item,
+                "unit": total.unit,
+                "received": f"{total.received.normalize():f}",
+                "donations": total.donations,
+                "needed": None if total.needed is None else f"{total.needed.normalize():f}",
+                "remaining": None if remaining is None else f"{remaining.normalize():f}",
+                "progress": round(float(total.received) / float(total.needed) * 100, 2) if total.needed else None,
+            })
+        return Response({"crisis_id": crisis_id, "items": items})
+
+
+# Top supporters, for one crisis or across all of them: ?window=24h|7d (default all-time), ?limit=
+class LeaderboardView(CachedResponseMixin, APIView):
+    permission_classes = [permissions.AllowAny]
     
-    def get(self, request):
-        money_donations = DonationMoney.objects.filter(donor=request.user)
-        goods_donations = DonationGoods.objects.filter(donor=request.user)
+    def get_cache_namespaces(self):
+        return [leaderboard_namespace(self.kwargs.get("crisis_id"))]
+
+    def get_response_cache_key(self, request, namespaces):
+        key = super().get_response_cache_key(request, namespaces)
+        if request.query_params.get("window"):
+            # Buckets age out of a window on the hour without any donation invalidating the board
+            key += ":" + bucket_start(timezone.now()).strftime("%Y%m%d%H")
+        return key
+    
+    def get(self, request, crisis_id=None):
+        window = request.query_params.get("window") or None
+        if window is not None and window not in WINDOWS:
+            raise ValidationError({"window": [f"Must be one of: {', '.join(WINDOWS)}."]})
+        try:
+            limit = min(int(request.query_params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({"limit": ["Must be an integer."]})
+        if limit < 1:
+            raise ValidationError({"limit": ["Must be at least 1."]})
         
-        data = {
-            "money_donations": DonationMoneySerializer(money_donations, many=True).data,
-            "goods_donations": DonationGoodsSerializer(goods_donations, many=True).data,
-            "total_money_donated": float(money_donations.aggregate(total=Sum('amount'))['total'] or 0),
-            "total_donations_count": money_donations.count() + goods_donations.count()
+        return Response({
+            "crisis_id": crisis_id,
+            "window": window or "all",
+            "supporters": top_supporters(crisis_id, window=window, limit=limit),
+        })
+
+
+# My Donations (for logged-in users): lifetime stats from DonorStats plus a page of history,
+# ?type=money (default) or ?type=goods, newest first.
+# The first page also keeps the original `money_donations` / `goods_donations` lists for
+# older clients; they now hold the newest page of each type instead of the full history.
+class MyDonationsView(OptimizedQuerysetMixin, generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_ordering = ('-donated_at',)
+    donation_types = {
+        "money": (DonationMoney, DonationMoneySerializer),
+        "goods": (DonationGoods, DonationGoodsSerializer),
+    }
+    
+    def get_donation_type(self):
+        donation_type = self.request.query_params.get("type", "money")
+        if donation_type not in self.donation_types:
+            raise ValidationError({"type": ["Must be 'money' or 'goods'."]})
+        return donation_type
+    
+    def get_serializer_class(self):
+        return self.donation_types[self.get_donation_type()][1]
+    
+    def get_queryset(self):
+        model = self.donation_types[self.get_donation_type()][0]
+        return model.objects.filter(donor=self.request.user)
+    
+    def newest_donations(self, donation_type):
+        model, serializer_class = self.donation_types[donation_type]
+        serializer = serializer_class(many=True, context=self.get_serializer_context())
+        queryset = optimize_queryset(model.objects.filter(donor=self.request.user), serializer.child)
+        serializer.instance = queryset.order_by("-donated_at", "-id")[:self.paginator.page_size]
+        return serializer.data
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        donation_type = self.get_donation_type()
+        if self.paginator.cursor_query_param not in request.query_params:
+            lists = {
+                f"{kind}_donations": response.data["results"] if kind == donation_type else self.newest_donations(kind)
+                for kind in self.donation_types
+            }
+        else:
+            lists = {}
+        stats = get_donor_stats(request.user)
+        response.data = {
+            "stats": {
+                "total_money_donated": float(stats.total_money),
+                "money_donations": stats.money_donations,
+                "goods_donations": stats.goods_donations,
+                "crises_supported": stats.crises_supported,
+                "last_donated_at": stats.last_donated_at,
+            },
+            "total_money_donated": float(stats.total_money),
+            "total_donations_count": stats.total_donations,
+            **lists,
+            "type": donation_type,
+            **response.data,
         }
+        return response
+
+# Streaming ledger exports for the crisis owner / staff (NDJSON, or CSV with ?format=csv)
+class CrisisMoneyDonationsExportView(CrisisExportView):
+    columns = (
+        "id", "donated_at", "donor", "amount", "payment_method", "transaction_id", "message", "is_anonymous",
+        "reconciliation_status", "settled_amount",
+    )
+    date_field = "donated_at"
+    export_name = "money-donations"
+
+    def get_queryset(self, crisis_post):
+        return (
+            DonationMoney.objects.filter(crisis_post=crisis_post)
+            .select_related("donor")
+            .only("donated_at", "amount", "payment_method", "transaction_id", "message",
+                  "is_anonymous", "donor_name", "donor__username", "reconciliation_status", "settled_amount")
+        )
+
+    def get_row(self, obj):
+        return (
+            obj.id, obj.donated_at, obj.display_name, str(obj.amount),
+            obj.payment_method, obj.transaction_id, obj.message, obj.is_anonymous,
+            obj.reconciliation_status, None if obj.settled_amount is None else str(obj.settled_amount),
+        )
+
+
+class CrisisGoodsDonationsExportView(CrisisExportView):
+    columns = ("id", "donated_at", "donor", "item_description", "quantity", "delivery_method", "message", "is_anonymous")
+    date_field = "donated_at"
+    export_name = "goods-donations"
+
+    def get_queryset(self, crisis_post):
+        return (
+            DonationGoods.objects.filter(crisis_post=crisis_post)
+            .select_related("donor")
+            .only("donated_at", "item_description", "quantity", "delivery_method", "message",
+                  "is_anonymous", "donor_name", "donor__username")
+        )
+
+    def get_row(self, obj):
+        return (
+            obj.id, obj.donated_at, obj.display_name, obj.item_description,
+            obj.quantity, obj.delivery_method, obj.message, obj.is_anonymous,
+        )
+
+
+# Reconciliation status of a crisis' money donations (crisis owner / staff)
+class CrisisReconciliationView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsCrisisOwnerOrStaff]
+    
+    def get(self, request, crisis_id):
+        crisis_post = get_object_or_404(CrisisPost.objects.only("id", "owner_id"), id=crisis_id)
+        self.check_object_permissions(request, crisis_post)
         
-        return Response(data)
\ No newline at end of file
+        statuses = crisis_reconciliation(crisis_id)
+        return Response({
+            "crisis_id": crisis_id,
+            "statuses": {
+                name: {"count": row["count"], "amount": f"{row['amount']:.2f}"} for name, row in statuses.items()
+            },
+        })
@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import CrisisUpdate, Comment
+from core.admin_tools import AutocompleteFilter
+from .models import CrisisUpdate, Comment, comments_count_subquery
 
 @admin.register(CrisisUpdate)
 class CrisisUpdateAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "crisis_post", "creator_display", "total_comments_display", "created_at")
-    list_filter = ("crisis_post", "created_at", "created_by")
+    list_filter = ("created_at", ("crisis_post", AutocompleteFilter), ("created_by", AutocompleteFilter))
+    list_select_related = ("crisis_post", "created_by")
     search_fields = ("title", "description", "crisis_post__title", "created_by__username")
     readonly_fields = ("created_at", "updated_at", "total_comments")
     ordering = ("-created_at",)
@@ -15,8 +17,11 @@ class CrisisUpdateAdmin(admin.ModelAdmin):
         return obj.created_by.username
     creator_display.short_description = "Created By"
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(comments_count=comments_count_subquery())
+
     def total_comments_display(self, obj):
-        count = obj.comments.count()
+        count = obj.total_comments
         if count > 0:
             return format_html('<b style="color: blue;">{} comment(s)</b>', count)
         return format_html('<i style="color: gray;">No comments</i>')
@@ -36,7 +41,8 @@ class CrisisUpdateAdmin(admin.ModelAdmin):
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("id", "commenter_display", "update_title", "text_preview", "created_at")
-    list_filter = ("created_at", "user")
+    list_filter = ("created_at", ("user", AutocompleteFilter))
+    list_select_related = ("user", "update")
     search_fields = ("text", "user__username", "update__title")
     readonly_fields = ("created_at", "updated_at")
     ordering = ("-created_at",)
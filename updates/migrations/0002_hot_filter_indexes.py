@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0005_hot_filter_indexes'),
+        ('updates', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['update', '-created_at', '-id'], name='comment_update_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='comment_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crisisupdate',
+            index=models.Index(fields=['crisis_post', '-created_at', '-id'], name='update_crisis_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crisisupdate',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='update_creator_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('updates', '0002_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crisisupdate',
+            name='update_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
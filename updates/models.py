@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from crisis.models import CrisisPost
+from core.hints import query_hints
 
 USER = settings.AUTH_USER_MODEL
 
@@ -10,11 +13,16 @@ class CrisisUpdate(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     update_image = models.ImageField(upload_to="update_images/", blank=True, null=True)
+    update_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # core.image_pipeline
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']  # Newest first
+        indexes = [
+            models.Index(fields=['crisis_post', '-created_at', '-id'], name='update_crisis_created_idx'),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='update_creator_created_idx'),
+        ]
         verbose_name = "Crisis Update"
         verbose_name_plural = "Crisis Updates"
     
@@ -22,15 +30,21 @@ class CrisisUpdate(models.Model):
         return f"{self.title} - {self.crisis_post.title}"
     
     @property
+    @query_hints("created_by__username")
     def creator_name(self):
         return self.created_by.username
     
     @property
+    @query_hints("created_by__email")
     def creator_email(self):
         return self.created_by.email
     
     @property
+    @query_hints(annotations={"comments_count": lambda: comments_count_subquery()})
     def total_comments(self):
+        # Annotated by list endpoints to avoid one COUNT per row
+        if hasattr(self, "comments_count"):
+            return self.comments_count
         return self.comments.count()
 
 
@@ -43,6 +57,10 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['-created_at']  # Newest first
+        indexes = [
+            models.Index(fields=['update', '-created_at', '-id'], name='comment_update_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='comment_user_created_idx'),
+        ]
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
     
@@ -50,5 +68,18 @@ class Comment(models.Model):
         return f"Comment by {self.user.username} on {self.update.title}"
     
     @property
+    @query_hints("user__username")
     def commenter_name(self):
-        return self.user.username
\ No newline at end of file
+        return self.user.username
+
+
+def comments_count_subquery():
+    """Correlated COUNT per update; unlike a JOIN + GROUP BY it keeps the list on its index order"""
+    counts = (
+        Comment.objects.filter(update=OuterRef("pk"))
+        .order_by()
+        .values("update")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from core.image_pipeline import ImageVariantsField
 from .models import CrisisUpdate, Comment
 
 class CommentSerializer(serializers.ModelSerializer):
     commenter_name = serializers.ReadOnlyField()
-    user_id = serializers.ReadOnlyField(source='user.id')
+    user_id = serializers.ReadOnlyField()
     
     class Meta:
         model = Comment
@@ -34,6 +35,7 @@ class CrisisUpdateSerializer(serializers.ModelSerializer):
     total_comments = serializers.ReadOnlyField()
     comments = CommentSerializer(many=True, read_only=True)
     crisis_title = serializers.ReadOnlyField(source='crisis_post.title')
+    update_image_variants = ImageVariantsField()
     
     class Meta:
         model = CrisisUpdate
@@ -47,6 +49,7 @@ class CrisisUpdateSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "update_image",
+            "update_image_variants",
             "total_comments",
             "comments",
             "created_at",
@@ -60,6 +63,7 @@ class CrisisUpdateListSerializer(serializers.ModelSerializer):
     creator_name = serializers.ReadOnlyField()
     total_comments = serializers.ReadOnlyField()
     crisis_title = serializers.ReadOnlyField(source='crisis_post.title')
+    update_image_variants = ImageVariantsField()
     
     class Meta:
         model = CrisisUpdate
@@ -71,6 +75,7 @@ class CrisisUpdateListSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "update_image",
+            "update_image_variants",
             "total_comments",
             "created_at"
         ]
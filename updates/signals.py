@@ -0,0 +1,97 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from core import sync
+from core.cache import invalidate
+from core.image_pipeline import register_image_fields, variants_ready
+from crisis.stats import adjust_stats, adjust_stats_for_update, replace_stats
+from .models import CrisisUpdate, Comment
+
+register_image_fields(CrisisUpdate, "update_image")
+
+
+def _comment_crisis_post_id(comment):
+    if Comment.update.is_cached(comment):
+        return comment.update.crisis_post_id
+    return CrisisUpdate.objects.filter(pk=comment.update_id).values_list("crisis_post_id", flat=True).first()
+
+
+@receiver(post_init, sender=CrisisUpdate)
+def remember_crisis_post(sender, instance, **kwargs):
+    """Loaded crisis, so post_save can tell an update moved to another one; never loads a deferred field"""
+    instance._stats_crisis_post_id = instance.__dict__.get("crisis_post_id") if instance.pk else None
+
+
+@receiver(post_save, sender=CrisisUpdate)
+def update_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_post_id = None if created else instance._stats_crisis_post_id
+    if created:
+        adjust_stats(instance.crisis_post_id, total_updates=1)
+    elif old_post_id is not None and old_post_id != instance.crisis_post_id:
+        # Moved to another crisis (admin): its comments move along with it
+        counts = {"total_updates": 1, "total_comments": instance.comments.count()}
+        replace_stats(old_post_id, counts, instance.crisis_post_id, counts)
+        invalidate(f"updates:{old_post_id}")
+    instance._stats_crisis_post_id = instance.crisis_post_id
+
+
+@receiver(post_delete, sender=CrisisUpdate)
+def update_deleted(sender, instance, **kwargs):
+    adjust_stats(instance.crisis_post_id, create_missing=False, total_updates=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_stats_for_update(instance.update_id, total_comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    adjust_stats_for_update(instance.update_id, total_comments=-1)
+
+
+@receiver(post_save, sender=CrisisUpdate)
+@receiver(post_delete, sender=CrisisUpdate)
+def invalidate_update_timeline(sender, instance, **kwargs):
+    invalidate(f"updates:{instance.crisis_post_id}", f"update:{instance.pk}")
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_timeline(sender, instance, raw=False, created=True, **kwargs):
+    """
+    Any change shows on the update's detail and comment list; creation and
+    deletion also change the counts on the timeline and the post detail.
+    """
+    if raw:
+        return
+    invalidate(f"update:{instance.update_id}")
+    if not created:
+        return
+    crisis_post_id = _comment_crisis_post_id(instance)
+    if crisis_post_id is not None:
+        invalidate(f"updates:{crisis_post_id}", f"post:{crisis_post_id}")
+
+
+@receiver(variants_ready, sender=CrisisUpdate)
+def update_image_variants_ready(sender, pk, **kwargs):
+    crisis_post_id = CrisisUpdate.objects.filter(pk=pk).values_list("crisis_post_id", flat=True).first()
+    invalidate(f"update:{pk}", f"updates:{crisis_post_id}" if crisis_post_id else None)
+    sync.record(sync.CRISIS_UPDATE, pk, crisis_post_id)
+
+
+# ------------------- Delta sync -------------------
+@receiver(post_save, sender=CrisisUpdate)
+@receiver(post_delete, sender=CrisisUpdate)
+def sync_update(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record(sync.CRISIS_UPDATE, instance.pk, instance.crisis_post_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def sync_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record(sync.COMMENT, instance.pk, _comment_crisis_post_id(instance))
@@ -7,13 +7,15 @@ from .views import (
     CreateCommentView,
     UpdateCommentsListView,
     CommentDetailView,
-    MyCommentsView
+    MyCommentsView,
+    CrisisUpdatesExportView
 )
 
 urlpatterns = [
     # Crisis Updates
     path("create/", CreateCrisisUpdateView.as_view(), name="create_crisis_update"),
     path("crisis/<int:crisis_id>/", CrisisUpdatesListView.as_view(), name="crisis_updates_list"),
+    path("crisis/<int:crisis_id>/export/", CrisisUpdatesExportView.as_view(), name="crisis_updates_export"),
     path("<int:pk>/", CrisisUpdateDetailView.as_view(), name="crisis_update_detail"),
     path("my-updates/", MyUpdatesView.as_view(), name="my_updates"),
     
@@ -1,8 +1,11 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from core.cache import CachedResponseMixin
+from core.mixins import OptimizedQuerysetMixin
 from django.shortcuts import get_object_or_404
-from .models import CrisisUpdate, Comment
+from .models import CrisisUpdate, Comment, comments_count_subquery
+from crisis.exports import CrisisExportView
 from crisis.models import CrisisPost
 from .serializers import (
     CrisisUpdateSerializer,
@@ -31,24 +34,30 @@ class CreateCrisisUpdateView(generics.CreateAPIView):
 
 
 # List All Updates for a Crisis (Timeline)
-class CrisisUpdatesListView(generics.ListAPIView):
+class CrisisUpdatesListView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = CrisisUpdateListSerializer
     permission_classes = [permissions.AllowAny]
     
+    def get_cache_namespaces(self):
+        return [f"updates:{self.kwargs['crisis_id']}"]
+    
     def get_queryset(self):
         crisis_id = self.kwargs.get('crisis_id')
         return CrisisUpdate.objects.filter(crisis_post_id=crisis_id)
 
 
 # Get Single Update with Comments
-class CrisisUpdateDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CrisisUpdateDetailView(CachedResponseMixin, OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = CrisisUpdate.objects.all()
     serializer_class = CrisisUpdateSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsUpdateCreatorOrReadOnly]
+    
+    def get_cache_namespaces(self):
+        return [f"update:{self.kwargs['pk']}"]
 
 
 # My Updates (Created by logged-in user)
-class MyUpdatesView(generics.ListAPIView):
+class MyUpdatesView(OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = CrisisUpdateListSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -73,17 +82,20 @@ class CreateCommentView(generics.CreateAPIView):
 
 
 # List Comments for an Update
-class UpdateCommentsListView(generics.ListAPIView):
+class UpdateCommentsListView(CachedResponseMixin, OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.AllowAny]
     
+    def get_cache_namespaces(self):
+        return [f"update:{self.kwargs['update_id']}"]
+    
     def get_queryset(self):
         update_id = self.kwargs.get('update_id')
         return Comment.objects.filter(update_id=update_id)
 
 
 # Update/Delete Comment
-class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CommentDetailView(OptimizedQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsCommentOwnerOrReadOnly]
@@ -109,9 +121,26 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # My Comments
-class MyCommentsView(generics.ListAPIView):
+class MyCommentsView(OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Comment.objects.filter(user=self.request.user)
\ No newline at end of file
+        return Comment.objects.filter(user=self.request.user)
+
+# Streaming export of a crisis' updates (crisis owner / staff)
+class CrisisUpdatesExportView(CrisisExportView):
+    columns = ("id", "created_at", "title", "description", "created_by", "comments")
+    date_field = "created_at"
+    export_name = "updates"
+
+    def get_queryset(self, crisis_post):
+        return (
+            CrisisUpdate.objects.filter(crisis_post=crisis_post)
+            .select_related("created_by")
+            .only("created_at", "title", "description", "created_by__username")
+            .annotate(comments_count=comments_count_subquery())
+        )
+
+    def get_row(self, obj):
+        return (obj.id, obj.created_at, obj.title, obj.description, obj.creator_name, obj.total_comments)
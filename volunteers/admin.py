@@ -1,11 +1,16 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from core import sync
+from core.admin_tools import AutocompleteFilter, LargeTableAdminMixin
+from crisis.stats import rebuild_stats
 from .models import VolunteerApplication
 
 @admin.register(VolunteerApplication)
-class VolunteerApplicationAdmin(admin.ModelAdmin):
+class VolunteerApplicationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "user_name", "crisis_title", "colored_status", "applied_at")
-    list_filter = ("status", "crisis_post", "applied_at")
+    list_filter = ("status", ("crisis_post", AutocompleteFilter))
+    list_select_related = ("user", "crisis_post")
+    date_hierarchy = "applied_at"
     search_fields = ("user__username", "crisis_post__title", "message")
     ordering = ("-applied_at",)
     readonly_fields = ("applied_at",)
@@ -15,15 +20,23 @@ class VolunteerApplicationAdmin(admin.ModelAdmin):
     actions = ['approve_applications', 'reject_applications']
     
     def approve_applications(self, request, queryset):
-        updated = queryset.update(status='approved')
+        updated = self.set_status(queryset, 'approved')
         self.message_user(request, f'{updated} application(s) approved.')
     approve_applications.short_description = 'Approve selected applications'
     
     def reject_applications(self, request, queryset):
-        updated = queryset.update(status='rejected')
+        updated = self.set_status(queryset, 'rejected')
         self.message_user(request, f'{updated} application(s) rejected.')
     reject_applications.short_description = 'Reject selected applications'
     
+    def set_status(self, queryset, status):
+        """queryset.update() skips the signals: rebuild the counters and log the sync entries here"""
+        rows = list(queryset.values_list('id', 'crisis_post_id', 'user_id'))
+        updated = queryset.update(status=status)
+        rebuild_stats({crisis_post_id for _, crisis_post_id, _ in rows})
+        sync.record_many(sync.VOLUNTEER_APPLICATION, rows)
+        return updated
+    
     def user_name(self, obj):
         return obj.user.username
     user_name.short_description = "Volunteer"
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0005_hot_filter_indexes'),
+        ('volunteers', '0002_alter_volunteerapplication_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['crisis_post', 'status'], name='volunteer_crisis_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['crisis_post', '-applied_at', '-id'], name='volunteer_crisis_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['user', '-applied_at', '-id'], name='volunteer_user_applied_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crisis', '0007_moderation_queue'),
+        ('volunteers', '0003_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['-applied_at', '-id'], name='volunteer_applied_idx'),
+        ),
+    ]
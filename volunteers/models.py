@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from crisis.models import CrisisPost
+from core.hints import query_hints
 
 User = get_user_model()
 
@@ -20,15 +21,23 @@ class VolunteerApplication(models.Model):
     class Meta:
         unique_together = ("user", "crisis_post")
         ordering = ['-applied_at']  # NEW: Latest first
+        indexes = [
+            models.Index(fields=['crisis_post', 'status'], name='volunteer_crisis_status_idx'),
+            models.Index(fields=['crisis_post', '-applied_at', '-id'], name='volunteer_crisis_applied_idx'),
+            models.Index(fields=['user', '-applied_at', '-id'], name='volunteer_user_applied_idx'),
+            models.Index(fields=['-applied_at', '-id'], name='volunteer_applied_idx'),  # admin changelist order / date drilldown
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.crisis_post.title} ({self.status})"
     
     # NEW: Properties for easy access
     @property
+    @query_hints("user__username")
     def volunteer_name(self):
         return self.user.username
     
     @property
+    @query_hints("crisis_post__title")
     def crisis_title(self):
         return self.crisis_post.title
\ No newline at end of file
@@ -5,8 +5,8 @@ from crisis.serializers import CrisisPostListSerializer  # Import from crisis ap
 class VolunteerApplicationSerializer(serializers.ModelSerializer):
     volunteer_name = serializers.ReadOnlyField()  # Use property
     crisis_title = serializers.ReadOnlyField()  # Use property
-    user_id = serializers.ReadOnlyField(source='user.id')
-    crisis_post_id = serializers.ReadOnlyField(source='crisis_post.id')
+    user_id = serializers.ReadOnlyField()
+    crisis_post_id = serializers.ReadOnlyField()
     
     class Meta:
         model = VolunteerApplication
@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from core import sync
+from crisis.stats import adjust_stats
+from .models import VolunteerApplication
+
+STATUS_COUNTERS = {
+    "approved": "approved_volunteers",
+    "pending": "pending_volunteers",
+}
+
+
+def _status_deltas(old_status, new_status):
+    deltas = {}
+    if old_status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[old_status]] = -1
+    if new_status in STATUS_COUNTERS:
+        field = STATUS_COUNTERS[new_status]
+        deltas[field] = deltas.get(field, 0) + 1
+    return deltas
+
+
+def apply_status_changes(rows, new_status):
+    """
+    Counters and sync entries for applications moved by core.moderation's
+    bulk UPDATE, which sends no post_save (rows need "crisis_post_id" and "user_id")
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        for field, delta in _status_deltas(row["status"], new_status).items():
+            deltas[row["crisis_post_id"]][field] += delta
+    for crisis_post_id, changes in deltas.items():
+        adjust_stats(crisis_post_id, **changes)
+    sync.record_many(sync.VOLUNTEER_APPLICATION, [(row["id"], row["crisis_post_id"], row["user_id"]) for row in rows])
+
+
+@receiver(post_init, sender=VolunteerApplication)
+def remember_status(sender, instance, **kwargs):
+    """Keep the loaded status so post_save can tell which counters moved; never loads a deferred field"""
+    instance._stats_status = instance.__dict__.get("status") if instance.pk else None
+
+
+@receiver(pre_delete, sender=VolunteerApplication)
+def load_deferred_status(sender, instance, **kwargs):
+    """A deleted row's counter must be known before the row is gone (one query, only if status was deferred)"""
+    if instance._stats_status is None:
+        instance._stats_status = instance.status
+
+
+@receiver(post_save, sender=VolunteerApplication)
+def application_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or "status" not in instance.__dict__:
+        return  # a deferred status was neither loaded nor saved
+    old_status = None if created else instance._stats_status
+    if old_status != instance.status:
+        adjust_stats(instance.crisis_post_id, **_status_deltas(old_status, instance.status))
+    instance._stats_status = instance.status
+
+
+@receiver(post_delete, sender=VolunteerApplication)
+def application_deleted(sender, instance, **kwargs):
+    adjust_stats(
+        instance.crisis_post_id, create_missing=False,
+        **_status_deltas(instance._stats_status, None)
+    )
+
+
+@receiver(post_save, sender=VolunteerApplication)
+@receiver(post_delete, sender=VolunteerApplication)
+def sync_application(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync.record(sync.VOLUNTEER_APPLICATION, instance.pk, instance.crisis_post_id, instance.user_id)
@@ -4,7 +4,9 @@ from .views import (
     UserVolunteerApplicationsView, 
     CrisisVolunteersListView,
     ApproveVolunteerView,
-    RejectVolunteerView
+    RejectVolunteerView,
+    BulkModerateVolunteersView,
+    CrisisVolunteersExportView
 )
 
 urlpatterns = [
@@ -13,4 +15,7 @@ urlpatterns = [
     path("crisis/<int:crisis_id>/", CrisisVolunteersListView.as_view(), name="crisis_volunteers"),
     path("<int:pk>/approve/", ApproveVolunteerView.as_view(), name="approve_volunteer"),
     path("<int:pk>/reject/", RejectVolunteerView.as_view(), name="reject_volunteer"),
+    path("bulk/approve/", BulkModerateVolunteersView.as_view(target_status="approved"), name="bulk_approve_volunteers"),
+    path("bulk/reject/", BulkModerateVolunteersView.as_view(target_status="rejected"), name="bulk_reject_volunteers"),
+    path("crisis/<int:crisis_id>/export/", CrisisVolunteersExportView.as_view(), name="crisis_volunteers_export"),
 ]
\ No newline at end of file
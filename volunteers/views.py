@@ -1,15 +1,20 @@
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from core.mixins import OptimizedQuerysetMixin
+from core.moderation import FORBIDDEN, NOT_FOUND, UNCHANGED, BulkModerationSerializer, bulk_moderation_response, moderate
 from django.shortcuts import get_object_or_404
 from .models import VolunteerApplication
+from crisis.exports import CrisisExportView
 from crisis.models import CrisisPost
 from .serializers import (
     VolunteerApplicationSerializer, 
     VolunteerApplicationCreateSerializer,
     VolunteerApplicationDetailSerializer
 )
-from .permissions import IsPostOwnerOrReadOnly, IsVolunteerOwner
+from .permissions import IsVolunteerOwner
+from .signals import apply_status_changes
 
 # Apply for volunteering
 class ApplyVolunteerView(generics.CreateAPIView):
@@ -38,18 +43,20 @@ class ApplyVolunteerView(generics.CreateAPIView):
 
 
 # List all volunteer applications for logged-in user
-class UserVolunteerApplicationsView(generics.ListAPIView):
+class UserVolunteerApplicationsView(OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = VolunteerApplicationDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_ordering = ('-applied_at',)
 
     def get_queryset(self):
         return VolunteerApplication.objects.filter(user=self.request.user)
 
 
 # List volunteers for a specific crisis post (Post Owner or Admin only)
-class CrisisVolunteersListView(generics.ListAPIView):
+class CrisisVolunteersListView(OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = VolunteerApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_ordering = ('-applied_at',)
 
     def get_queryset(self):
         crisis_id = self.kwargs.get('crisis_id')
@@ -62,47 +69,70 @@ class CrisisVolunteersListView(generics.ListAPIView):
         return VolunteerApplication.objects.filter(crisis_post=crisis_post)
 
 
-# Approve Volunteer (Post owner or Admin)
-class ApproveVolunteerView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsPostOwnerOrReadOnly]
-
+# Approve / reject a volunteer (post owner or admin)
+class ModerateVolunteerView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    target_status = None
+    
     def post(self, request, pk):
-        application = get_object_or_404(VolunteerApplication, pk=pk)
-        self.check_object_permissions(request, application)
-        
-        if application.status == 'approved':
+        outcomes, changed = moderate(
+            VolunteerApplication, [pk], self.target_status, request.user,
+            owner_field="crisis_post__owner_id", fields=("crisis_post_id", "user_id"),
+        )
+        apply_status_changes(changed, self.target_status)
+        outcome = outcomes[pk]
+        if outcome == NOT_FOUND:
+            raise NotFound()
+        if outcome == FORBIDDEN:
+            raise PermissionDenied()
+        if outcome == UNCHANGED:
             return Response(
-                {"error": "This application is already approved."}, 
+                {"error": f"This application is already {self.target_status}."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        application.status = 'approved'
-        application.save()
-        
+        application = VolunteerApplication.objects.select_related("user", "crisis_post").get(pk=pk)
         return Response({
-            "success": f"Volunteer {application.user.username} approved for {application.crisis_post.title}",
+            "success": f"Volunteer {application.user.username} {self.target_status} for {application.crisis_post.title}",
             "data": VolunteerApplicationSerializer(application).data
         })
 
 
-# Reject Volunteer (Post owner or Admin)
-class RejectVolunteerView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsPostOwnerOrReadOnly]
+class ApproveVolunteerView(ModerateVolunteerView):
+    target_status = "approved"
 
-    def post(self, request, pk):
-        application = get_object_or_404(VolunteerApplication, pk=pk)
-        self.check_object_permissions(request, application)
-        
-        if application.status == 'rejected':
-            return Response(
-                {"error": "This application is already rejected."}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        application.status = 'rejected'
-        application.save()
-        
-        return Response({
-            "success": f"Volunteer {application.user.username} rejected for {application.crisis_post.title}",
-            "data": VolunteerApplicationSerializer(application).data
-        })
\ No newline at end of file
+
+class RejectVolunteerView(ModerateVolunteerView):
+    target_status = "rejected"
+
+
+# Approve / reject many applications at once: {"ids": [...]}, per-ID outcomes
+class BulkModerateVolunteersView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    target_status = None
+    
+    def post(self, request):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcomes, changed = moderate(
+            VolunteerApplication, serializer.validated_data["ids"], self.target_status, request.user,
+            owner_field="crisis_post__owner_id", fields=("crisis_post_id", "user_id"),
+        )
+        apply_status_changes(changed, self.target_status)
+        return bulk_moderation_response(outcomes, self.target_status)
+
+# Streaming export of a crisis' volunteer applications (crisis owner / staff)
+class CrisisVolunteersExportView(CrisisExportView):
+    columns = ("id", "applied_at", "volunteer", "status", "message")
+    date_field = "applied_at"
+    export_name = "volunteers"
+
+    def get_queryset(self, crisis_post):
+        return (
+            VolunteerApplication.objects.filter(crisis_post=crisis_post)
+            .select_related("user")
+            .only("applied_at", "status", "message", "user__username")
+        )
+
+    def get_row(self, obj):
+        return (obj.id, obj.applied_at, obj.volunteer_name, obj.status, obj.message)